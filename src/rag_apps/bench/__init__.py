@@ -0,0 +1 @@
+"""Offline benchmarks for the RAG pipelines using deterministic fake Gemini backends."""
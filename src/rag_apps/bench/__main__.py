@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from rag_apps.common.logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run offline RAG benchmarks against a fake Gemini backend")
+    parser.add_argument("--scenarios", default=None, help="Comma-separated scenario names (default: all)")
+    parser.add_argument("--scale", type=int, default=200, help="Synthetic medical transcriptions (contracts = scale/10)")
+    parser.add_argument("--real-data", action="store_true", help="Use datasets/ mtsamples and CUAD instead of synthetic corpora")
+    parser.add_argument("--queries", type=int, default=30, help="Synthetic questions per query scenario")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake chat latency per call")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Fake embedding latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform extra latency per call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a transient failure per call")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="Probability of a 429 quota error per call")
+    parser.add_argument("--seed", type=int, default=13, help="Seed for latency and error injection")
+    parser.add_argument("--output", type=Path, default=None, help="Result JSON path (defaults to artifacts/bench/)")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier result JSON to compare against")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    from .fakes import FakeBackendConfig
+    from .runner import SCENARIOS, compare_reports, run_benchmarks, write_report
+
+    names = [name.strip() for name in (args.scenarios or ",".join(SCENARIOS)).split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+    backend = FakeBackendConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        embedding_latency_ms=args.embedding_latency_ms,
+        failure_rate=args.failure_rate,
+        quota_error_rate=args.quota_rate,
+        seed=args.seed,
+    )
+    report = run_benchmarks(names, scale=args.scale, queries=args.queries, backend=backend, real_data=args.real_data)
+    output = write_report(report, args.output)
+    for row in report["results"]:
+        LOGGER.info(
+            "%-22s %8.2f ops/s  p50 %8.2f ms  p95 %8.2f ms  peak %7.2f MB",
+            row["scenario"],
+            row["throughput_per_s"],
+            row["latency_ms"]["p50"],
+            row["latency_ms"]["p95"],
+            row["peak_memory_mb"],
+        )
+    if args.baseline:
+        with args.baseline.open("r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        for row in compare_reports(baseline, report):
+            LOGGER.info("vs baseline %s", row)
+    LOGGER.info("Wrote benchmark results to %s", output)
+
+
+if __name__ == "__main__":
+    main()
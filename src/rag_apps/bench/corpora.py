@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import random
+from typing import List
+
+from langchain.schema import Document
+
+
+SPECIALTIES = (
+    "Cardiovascular / Pulmonary",
+    "Orthopedic",
+    "Neurology",
+    "Gastroenterology",
+    "Bariatrics",
+    "Allergy / Immunology",
+    "Urology",
+    "Obstetrics / Gynecology",
+)
+CONDITIONS = (
+    "allergic rhinitis",
+    "mitral regurgitation",
+    "morbid obesity",
+    "lumbar radiculopathy",
+    "chronic cholecystitis",
+    "atrial fibrillation",
+    "type 2 diabetes",
+    "moyamoya disease",
+    "benign prostatic hyperplasia",
+    "asthma exacerbation",
+)
+MEDICATIONS = ("lisinopril", "metformin", "albuterol", "warfarin", "omeprazole", "zyrtec", "prednisone", "atorvastatin")
+PROCEDURES = (
+    "laparoscopic gastric bypass",
+    "echocardiogram",
+    "lumbar discectomy",
+    "colonoscopy",
+    "cardiac catheterization",
+    "cystoscopy",
+)
+MEDICAL_SECTIONS = (
+    "CHIEF COMPLAINT",
+    "HISTORY OF PRESENT ILLNESS",
+    "PAST MEDICAL HISTORY",
+    "MEDICATIONS",
+    "ALLERGIES",
+    "PHYSICAL EXAMINATION",
+    "ASSESSMENT",
+    "PLAN",
+)
+
+CLAUSE_TOPICS = {
+    "Data Privacy": "personal data shall be collected stored and deleted in accordance with GDPR and CCPA",
+    "Access Control": "authentication and authorization of users accessing shared environments shall use unique credentials",
+    "Incident Response": "security incidents shall be notified to the other party within seventy two hours",
+    "Business Continuity": "the vendor shall maintain a disaster recovery plan tested at least annually",
+    "Subprocessor Management": "subcontractors may be engaged only with prior written approval and equivalent obligations",
+    "Encryption": "data in transit and at rest shall be encrypted using industry standard algorithms",
+    "Audit Rights": "customer may audit records and facilities once per calendar year upon notice",
+    "Termination": "upon termination all confidential information shall be returned or destroyed",
+    "Insurance": "each party shall maintain commercial general liability insurance of not less than five million dollars",
+    "Limitation of Liability": "neither party shall be liable for indirect consequential or punitive damages",
+    "Governing Law": "this agreement shall be governed by the laws of the State of New York",
+    "Confidentiality": "each party shall protect the confidential information of the other with reasonable care",
+}
+FILLER = (
+    "The parties acknowledge and agree that",
+    "Notwithstanding anything to the contrary herein,",
+    "Subject to the terms and conditions of this Agreement,",
+    "Except as otherwise expressly provided,",
+    "For the avoidance of doubt,",
+)
+
+
+def _sentence(rng: random.Random) -> str:
+    return (
+        f"The patient with {rng.choice(CONDITIONS)} was treated with {rng.choice(MEDICATIONS)} "
+        f"and referred for {rng.choice(PROCEDURES)}."
+    )
+
+
+def synthetic_medical_documents(count: int, seed: int = 13) -> List[Document]:
+    """mtsamples-shaped transcriptions with the uppercase section headings real notes use."""
+    rng = random.Random(seed)
+    documents: List[Document] = []
+    for index in range(count):
+        condition = rng.choice(CONDITIONS)
+        sections = []
+        for heading in MEDICAL_SECTIONS:
+            body = " ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+            if heading == "HISTORY OF PRESENT ILLNESS":
+                body = f"This {rng.randint(20, 85)}-year-old presents with {condition}. " + body
+            sections.append(f"{heading}:,  {body}")
+        metadata = {
+            "medical_specialty": rng.choice(SPECIALTIES),
+            "sample_name": f"{condition.title()} - Note {index}",
+            "keywords": ", ".join(rng.sample(CONDITIONS, 3)),
+            "source_id": index,
+            "description": f"Evaluation of {condition}.",
+            "doc_id": f"mtsamples:{index}",
+        }
+        documents.append(Document(page_content="\n".join(sections), metadata=metadata))
+    return documents
+
+
+def synthetic_contract_documents(count: int, seed: int = 29) -> List[Document]:
+    """CUAD-shaped agreements with numbered articles and sub-clauses drawn from policy topics."""
+    rng = random.Random(seed)
+    documents: List[Document] = []
+    topics = list(CLAUSE_TOPICS.items())
+    for index in range(count):
+        chosen = rng.sample(topics, rng.randint(6, len(topics)))
+        parts = [f"MASTER SERVICES AGREEMENT {index}\n\nThis Agreement is entered into by Customer and Vendor {index}."]
+        for number, (title, clause) in enumerate(chosen, start=1):
+            parts.append(f"{number}. {title.upper()}")
+            for sub in range(1, rng.randint(2, 5)):
+                parts.append(f"{number}.{sub} {rng.choice(FILLER)} {clause}. {rng.choice(FILLER)} the obligations in this Section survive.")
+        name = f"SYNTHETIC_VENDOR_{index:04d}_SERVICES AGREEMENT"
+        metadata = {
+            "doc_name": name,
+            "doc_id": f"full_contract_txt/{name}.txt",
+            "source_path": f"full_contract_txt/{name}.txt",
+            "file_type": ".txt",
+        }
+        documents.append(Document(page_content="\n\n".join(parts), metadata=metadata))
+    return documents
+
+
+def synthetic_medical_queries(count: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    templates = (
+        "What medications were prescribed for {condition}?",
+        "How was {condition} evaluated before {procedure}?",
+        "Which findings supported the diagnosis of {condition}?",
+        "Describe the plan after {procedure} for {condition}.",
+    )
+    return [
+        rng.choice(templates).format(condition=rng.choice(CONDITIONS), procedure=rng.choice(PROCEDURES))
+        for _ in range(count)
+    ]
+
+
+def synthetic_compliance_questions(count: int, seed: int = 11) -> List[str]:
+    rng = random.Random(seed)
+    templates = (
+        "Do these agreements meet our {topic} obligations?",
+        "Are {topic} requirements addressed in the vendor contracts?",
+    )
+    return [rng.choice(templates).format(topic=rng.choice(list(CLAUSE_TOPICS)).lower()) for _ in range(count)]
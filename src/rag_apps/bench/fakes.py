@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from rag_apps.common.key_manager import GeminiKeyManager
+from rag_apps.common.llm import RotatingGeminiChat, RotatingGeminiEmbeddings
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+VERDICTS = ("Compliant", "Non-Compliant", "NotFound")
+
+
+class InjectedFailure(RuntimeError):
+    """Transient error raised by the fake backend."""
+
+
+class QuotaExceededError(RuntimeError):
+    """Mimics Gemini's 429 ResourceExhausted so key rotation kicks in."""
+
+
+@dataclass(slots=True)
+class FakeBackendConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    embedding_latency_ms: float = 0.0
+    failure_rate: float = 0.0
+    quota_error_rate: float = 0.0
+    dimensions: int = 256
+    seed: int = 13
+
+
+class FakeGeminiBackend:
+    """Shared state for fake chat/embedding clients: latency, error injection and call counts.
+
+    Clients are rebuilt on every attempt by the rotating wrappers, so the random
+    stream lives here rather than on the client to keep injected errors spread
+    across calls instead of repeating on each fresh client.
+    """
+
+    def __init__(self, config: FakeBackendConfig | None = None):
+        self.config = config or FakeBackendConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.calls = {"chat": 0, "embedding": 0, "failures": 0, "quota_errors": 0}
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _sleep(self, base_ms: float) -> None:
+        delay = base_ms + (self._roll() * self.config.jitter_ms if self.config.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def call(self, kind: str, api_key: str) -> None:
+        with self._lock:
+            self.calls[kind] += 1
+        roll = self._roll()
+        if roll < self.config.quota_error_rate:
+            with self._lock:
+                self.calls["quota_errors"] += 1
+            raise QuotaExceededError(f"429 Resource has been exhausted (key ****{api_key[-4:]})")
+        if roll < self.config.quota_error_rate + self.config.failure_rate:
+            with self._lock:
+                self.calls["failures"] += 1
+            raise InjectedFailure("503 injected transient failure")
+        self._sleep(self.config.latency_ms if kind == "chat" else self.config.embedding_latency_ms)
+
+    def embed(self, text: str) -> List[float]:
+        """Signed feature hashing of lower-cased tokens, so lexical overlap means vector similarity."""
+        vector = [0.0] * self.config.dimensions
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            bucket = zlib.crc32(token.encode("utf-8"))
+            vector[bucket % self.config.dimensions] += 1.0 if bucket & 0x80000000 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def respond(self, prompt: str) -> str:
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        if "Rule ID:" in prompt:
+            rule_id = re.search(r"Rule ID:\s*(\S+)", prompt)
+            sources = re.findall(r"^\[([^\]\n]+)\]$", prompt, flags=re.MULTILINE)
+            return json.dumps(
+                {
+                    "verdict": VERDICTS[digest % len(VERDICTS)],
+                    "evidence": [f"{name}: synthetic clause" for name in sources[:2]],
+                    "remediation": f"Review {rule_id.group(1) if rule_id else 'rule'} obligations.",
+                }
+            )
+        sources = re.findall(r"^\[([^|\]\n]+)", prompt, flags=re.MULTILINE)
+        if not sources:
+            return "I could not find that information."
+        return "\n".join(f"- Finding {i + 1} [Source:{name.strip()}]" for i, name in enumerate(sources[:3]))
+
+
+class FakeChatClient:
+    def __init__(self, backend: FakeGeminiBackend, api_key: str):
+        self.backend = backend
+        self.api_key = api_key
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.backend.call("chat", self.api_key)
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = self.backend.respond(prompt)
+        usage = {
+            "input_tokens": len(prompt.split()),
+            "output_tokens": len(content.split()),
+            "total_tokens": len(prompt.split()) + len(content.split()),
+        }
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+
+class FakeEmbeddingClient:
+    def __init__(self, backend: FakeGeminiBackend, api_key: str):
+        self.backend = backend
+        self.api_key = api_key
+
+    def embed_documents(self, texts: List[str], task_type: Optional[str] = None, **kwargs: Any) -> List[List[float]]:
+        self.backend.call("embedding", self.api_key)
+        return [self.backend.embed(text) for text in texts]
+
+    def embed_query(self, text: str, task_type: Optional[str] = None, **kwargs: Any) -> List[float]:
+        self.backend.call("embedding", self.api_key)
+        return self.backend.embed(text)
+
+
+class FakeRotatingChat(RotatingGeminiChat):
+    """RotatingGeminiChat whose per-key clients are local fakes; rotation and metrics stay real."""
+
+    backend: Any = None
+
+    def __init__(self, key_manager: GeminiKeyManager, backend: FakeGeminiBackend, model_name: str = "fake-gemini"):
+        super().__init__(key_manager, model_name=model_name)
+        self.backend = backend
+
+    def _build_client(self, api_key: str) -> FakeChatClient:
+        return FakeChatClient(self.backend, api_key)
+
+
+class FakeRotatingEmbeddings(RotatingGeminiEmbeddings):
+    def __init__(self, key_manager: GeminiKeyManager, backend: FakeGeminiBackend, model_name: str = "fake-embedding"):
+        super().__init__(key_manager, model_name=model_name)
+        self.backend = backend
+
+    def _build_client(self, api_key: str) -> FakeEmbeddingClient:
+        return FakeEmbeddingClient(self.backend, api_key)
+
+
+def build_fake_resources(
+    config: FakeBackendConfig | None = None,
+    key_count: int = 4,
+) -> tuple[FakeRotatingChat, FakeRotatingEmbeddings, FakeGeminiBackend]:
+    backend = FakeGeminiBackend(config)
+    manager = GeminiKeyManager(f"fake-key-{index:04d}" for index in range(1, key_count + 1))
+    chat = FakeRotatingChat(manager, backend)
+    embeddings = FakeRotatingEmbeddings(manager, backend)
+    return chat, embeddings, backend
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from rag_apps.common import paths
+from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.vector_index import IndexLayout, MemmapVectorIndex
+
+
+LOGGER = get_logger(__name__)
+
+
+def default_layouts(width: int) -> Dict[str, IndexLayout]:
+    """float32 baseline plus int8, half-width truncation, quarter-width PCA and their combination."""
+    half, quarter = max(width // 2, 1), max(width // 4, 1)
+    return {
+        "float32": IndexLayout(),
+        "int8": IndexLayout(quantization="int8"),
+        f"truncate{half}": IndexLayout(dimensions=half, reduction="truncate"),
+        f"pca{quarter}": IndexLayout(dimensions=quarter, reduction="pca"),
+        f"int8_pca{quarter}": IndexLayout(quantization="int8", dimensions=quarter, reduction="pca"),
+    }
+
+
+def compare_layouts(
+    index: MemmapVectorIndex,
+    query_vectors: Sequence[Sequence[float]],
+    layouts: Dict[str, IndexLayout] | None = None,
+    k: int = 10,
+    rescore_factors: Sequence[int] = (0, 4),
+) -> List[dict]:
+    """Scan size, query latency and recall@k of each layout against exact float32 search."""
+    queries = np.asarray(query_vectors, dtype=np.float32)
+    layouts = layouts or default_layouts(index.vectors.shape[1])
+    exact = index.with_layout(IndexLayout())
+    truth = [set(exact.search_rows(query, k).tolist()) for query in queries]
+    baseline_bytes = exact.scan_bytes
+    rows: List[dict] = []
+    for name, layout in layouts.items():
+        for factor in rescore_factors if layout.compressed else (0,):
+            variant = index.with_layout(layout, rescore_factor=factor)
+            variant.search_rows(queries[0], k)
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                found = variant.search_rows(query, k)
+                latencies.append(time.perf_counter() - started)
+                recalls.append(len(expected.intersection(found.tolist())) / max(len(expected), 1))
+            ordered = sorted(latencies)
+            rows.append(
+                {
+                    "layout": name,
+                    "rescore_factor": factor,
+                    "scan_bytes": variant.scan_bytes,
+                    "scan_ratio": round(variant.scan_bytes / baseline_bytes, 4),
+                    f"recall@{k}": round(statistics.fmean(recalls), 4),
+                    "latency_ms": {
+                        "p50": round(ordered[len(ordered) // 2] * 1000, 3),
+                        "p95": round(ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)] * 1000, 3),
+                    },
+                }
+            )
+    return rows
+
+
+def _query_texts(app: str) -> List[str]:
+    if app == "medical":
+        with paths.MEDICAL_QUERY_FILE.open("r", encoding="utf-8") as handle:
+            return json.load(handle)
+    from rag_apps.compliance.config import ComplianceConfig
+    from rag_apps.compliance.rules import load_rules
+
+    return [rule.description for rule in load_rules(ComplianceConfig().rules_path)]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare quantized/reduced index layouts on an exported memmap index")
+    parser.add_argument("--app", choices=("medical", "compliance"), default="medical")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=0, help="Reduced width to test (default: half/quarter of full)")
+    parser.add_argument("--rescore-factors", default="0,4", help="Comma-separated re-scoring factors")
+    parser.add_argument("--output", type=Path, default=None, help="Report JSON path (defaults to artifacts/bench/)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Report on the app's exported index using real Gemini query embeddings of the eval queries."""
+    args = parse_args()
+    from rag_apps.common.key_manager import GeminiKeyManager
+    from rag_apps.common.llm import RotatingGeminiEmbeddings
+    from rag_apps.common.vectorstores import load_vector_index
+    from rag_apps.compliance.config import ComplianceConfig
+    from rag_apps.medical.config import MedicalRAGConfig
+
+    config = MedicalRAGConfig() if args.app == "medical" else ComplianceConfig()
+    embeddings = RotatingGeminiEmbeddings(GeminiKeyManager.from_defaults())
+    index = load_vector_index(embeddings, config.persist_directory, config.index_directory, "memmap")
+    layouts = default_layouts(index.vectors.shape[1])
+    if args.dimensions:
+        layouts.update(
+            {
+                f"truncate{args.dimensions}": IndexLayout(dimensions=args.dimensions, reduction="truncate"),
+                f"pca{args.dimensions}": IndexLayout(dimensions=args.dimensions, reduction="pca"),
+                f"int8_pca{args.dimensions}": IndexLayout(quantization="int8", dimensions=args.dimensions, reduction="pca"),
+            }
+        )
+    queries = _query_texts(args.app)
+    factors = [int(value) for value in args.rescore_factors.split(",") if value.strip()]
+    rows = compare_layouts(index, embeddings.embed_queries(queries), layouts, k=args.k, rescore_factors=factors)
+    report = {"app": args.app, "vectors": len(index), "queries": len(queries), "k": args.k, "results": rows}
+    output = args.output or paths.BENCH_OUTPUT_DIR / f"quantization_{args.app}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for row in rows:
+        LOGGER.info(
+            "%-16s rescore x%-2d scan %5.1f%%  recall %.3f  p50 %.3f ms",
+            row["layout"],
+            row["rescore_factor"],
+            row["scan_ratio"] * 100,
+            row[f"recall@{args.k}"],
+            row["latency_ms"]["p50"],
+        )
+    LOGGER.info("Wrote quantization report to %s", output)
+
+
+if __name__ == "__main__":
+    main()
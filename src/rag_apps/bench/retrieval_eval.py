@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import csv
+import hashlib
+import json
+import math
+import re
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence
+
+from rag_apps.common import paths
+from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.vectorstores import iter_stored_chunks, search_with_embeddings
+
+
+LOGGER = get_logger(__name__)
+
+HISTORY_COLUMNS = (
+    "run_at",
+    "app",
+    "labels",
+    "queries",
+    "store",
+    "variant",
+    "k",
+    "recall",
+    "mrr",
+    "ndcg",
+    "p50_ms",
+    "p95_ms",
+    "index_bytes",
+    "scan_bytes",
+)
+
+# Rule categories with a CUAD clause type close enough to act as ground truth; the rest have no labels.
+CUAD_CATEGORY_MAP: Dict[str, Sequence[str]] = {
+    "Audit Rights": ("Audit Rights",),
+    "Termination": ("Termination For Convenience", "Post-Termination Services"),
+    "Intellectual Property": ("Ip Ownership Assignment", "Joint Ip Ownership", "License Grant"),
+    "Third-Party Risk": ("Anti-Assignment", "Change Of Control", "Third Party Beneficiary"),
+    "Business Continuity": ("Source Code Escrow",),
+}
+
+SILVER_FIELDS = ("sample_name", "description", "keywords")
+STOPWORDS = frozenset(
+    "what which were with that this from into have been when where than then they their there these those "
+    "patient patients describe summarize list dataset reported report reports case documented performed "
+    "involved discussed before after during used does were about findings".split()
+)
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9\-]{3,}")
+SPAN_PREFIX_CHARS = 60
+
+
+@dataclass(slots=True)
+class LabelledQuery:
+    """A query and the keys that count as relevant.
+
+    ``unit`` says what a key is: a ``doc_id``, a chunk id (``"chunk"``), or the
+    normalised opening of an annotated clause span (``"span"``). Span labels do
+    not depend on how the store was chunked.
+    """
+
+    text: str
+    relevant: FrozenSet[str]
+    where: Optional[Dict[str, Any]] = None
+    unit: str = "doc_id"
+
+
+@dataclass(slots=True)
+class RetrievalVariant:
+    name: str
+    store: Any
+    index_bytes: int
+    scan_bytes: Optional[int] = None
+
+
+def _terms(text: str) -> set[str]:
+    return {token.rstrip("s") for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS}
+
+
+def medical_silver_labels(
+    store: Any,
+    queries: Sequence[str],
+    fields: Sequence[str] = SILVER_FIELDS,
+    min_overlap: float = 0.5,
+    max_relevant: int = 10,
+) -> List[LabelledQuery]:
+    """Label transcriptions whose title/description/keywords cover most of a query's content terms.
+
+    The labels come from mtsamples metadata rather than the embedded text, so
+    they do not simply reward whatever the embedding model already prefers.
+    Queries with no transcription above ``min_overlap`` are dropped.
+    """
+    documents: Dict[str, set[str]] = {}
+    for _, _, metadata in iter_stored_chunks(store):
+        doc_id = metadata.get("doc_id")
+        if doc_id is not None and doc_id not in documents:
+            documents[doc_id] = _terms(" ".join(str(metadata.get(field, "")) for field in fields))
+    labelled = []
+    for query in queries:
+        terms = _terms(query)
+        if not terms:
+            continue
+        scored = sorted(
+            ((len(terms & doc_terms) / len(terms), doc_id) for doc_id, doc_terms in documents.items()),
+            reverse=True,
+        )
+        relevant = [doc_id for score, doc_id in scored[:max_relevant] if score >= min_overlap]
+        if relevant:
+            labelled.append(LabelledQuery(query, frozenset(relevant)))
+    LOGGER.info("Silver-labelled %d of %d medical queries over %d transcriptions", len(labelled), len(queries), len(documents))
+    return labelled
+
+
+def _normalise(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _spans(cell: str) -> List[str]:
+    cell = (cell or "").strip()
+    if not cell or cell == "[]":
+        return []
+    try:
+        value = ast.literal_eval(cell)
+    except (ValueError, SyntaxError):
+        value = [cell]
+    return [str(span) for span in (value if isinstance(value, list) else [value]) if str(span).strip()]
+
+
+def cuad_labels(
+    store: Any,
+    rules: Sequence[Any],
+    master_clauses: Path = paths.CUAD_MASTER_CLAUSES,
+    category_map: Dict[str, Sequence[str]] = CUAD_CATEGORY_MAP,
+    contracts: Optional[int] = None,
+) -> List[LabelledQuery]:
+    """One query per (mapped rule, annotated contract), filtered to that contract like portfolio mode.
+
+    The relevant keys are the openings of the contract's CUAD answer spans for
+    the rule's clause types. Spans whose text cannot be found in the indexed
+    contract (for example, PDF extraction drift) are dropped.
+    """
+    chunks: Dict[str, List[str]] = {}
+    for _, text, metadata in iter_stored_chunks(store):
+        if metadata.get("doc_name") is not None:
+            chunks.setdefault(metadata["doc_name"], []).append(_normalise(text))
+    annotations: Dict[str, Dict[str, List[str]]] = {}
+    with Path(master_clauses).open("r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            name = Path(row.get("Filename", "")).stem
+            if name in chunks:
+                annotations[name] = {column: _spans(row.get(column, "")) for column in row}
+    names = sorted(annotations)[:contracts] if contracts else sorted(annotations)
+    labelled = []
+    for rule in rules:
+        columns = category_map.get(rule.category)
+        if not columns:
+            continue
+        for name in names:
+            prefixes = {_normalise(span)[:SPAN_PREFIX_CHARS] for column in columns for span in annotations[name].get(column, [])}
+            relevant = {prefix for prefix in prefixes if any(prefix in text for text in chunks[name])}
+            if relevant:
+                labelled.append(LabelledQuery(rule.description, frozenset(relevant), {"doc_name": name}, "span"))
+    LOGGER.info(
+        "Labelled %d (rule, contract) queries from %s across %d indexed contracts",
+        len(labelled),
+        master_clauses,
+        len(names),
+    )
+    return labelled
+
+
+def load_labels(path: Path) -> List[LabelledQuery]:
+    """Hand labels: a JSON list of ``{"query", "relevant", "where"?, "unit"?}`` objects."""
+    with Path(path).open("r", encoding="utf-8") as handle:
+        entries = json.load(handle)
+    return [
+        LabelledQuery(entry["query"], frozenset(entry["relevant"]), entry.get("where"), entry.get("unit", "doc_id"))
+        for entry in entries
+    ]
+
+
+def label_fingerprint(labelled: Iterable[LabelledQuery]) -> str:
+    """Short hash of the label set; only runs with the same fingerprint are comparable."""
+    payload = sorted(
+        json.dumps([item.text, sorted(item.relevant), item.where, item.unit], sort_keys=True) for item in labelled
+    )
+    return hashlib.sha256("\n".join(payload).encode("utf-8")).hexdigest()[:12]
+
+
+def retrieval_metrics(ranked: Sequence[set[str]], relevant: FrozenSet[str], k: int) -> Dict[str, float]:
+    """Recall@k, reciprocal rank and nDCG@k over ranked hits, each given as the relevant keys it covers.
+
+    A hit only gains when it covers a key no earlier hit did, so a second chunk
+    of an already-found transcription counts as a miss. The ideal ranking
+    covers one new key per rank.
+    """
+    covered: set[str] = set()
+    first = None
+    dcg = 0.0
+    for rank, keys in enumerate(ranked[:k], start=1):
+        new = (keys & relevant) - covered
+        if keys & relevant and first is None:
+            first = rank
+        if new:
+            covered |= new
+            dcg += 1.0 / math.log2(rank + 1)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return {
+        "recall": len(covered) / len(relevant) if relevant else 0.0,
+        "mrr": 1.0 / first if first else 0.0,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+
+def _hit_keys(hit: Any, item: LabelledQuery) -> set[str]:
+    if item.unit == "chunk":
+        return {hit.id}
+    if item.unit == "span":
+        text = _normalise(hit.document.page_content)
+        return {prefix for prefix in item.relevant if prefix in text}
+    key = hit.document.metadata.get(item.unit)
+    return {str(key)} if key is not None else set()
+
+
+def evaluate_variants(
+    variants: Sequence[RetrievalVariant],
+    labelled: Sequence[LabelledQuery],
+    query_vectors: Sequence[Sequence[float]],
+    ks: Sequence[int] = (4, 8, 16),
+) -> List[dict]:
+    """Mean metrics and search latency (query embedding excluded) for every variant and k."""
+    if not labelled:
+        raise ValueError("No labelled queries to evaluate; every label was filtered out or none were found")
+    if len(query_vectors) != len(labelled):
+        raise ValueError(f"Got {len(query_vectors)} query vectors for {len(labelled)} labelled queries")
+    rows: List[dict] = []
+    for variant in variants:
+        search_with_embeddings(variant.store, query_vectors[0], max(ks), labelled[0].where)
+        for k in ks:
+            latencies, scores = [], {"recall": [], "mrr": [], "ndcg": []}
+            for item, vector in zip(labelled, query_vectors):
+                started = time.perf_counter()
+                hits = search_with_embeddings(variant.store, vector, k, item.where)
+                latencies.append(time.perf_counter() - started)
+                for name, value in retrieval_metrics([_hit_keys(hit, item) for hit in hits], item.relevant, k).items():
+                    scores[name].append(value)
+            ordered = sorted(latencies)
+            rows.append(
+                {
+                    "variant": variant.name,
+                    "k": k,
+                    **{name: round(statistics.fmean(values), 4) for name, values in scores.items()},
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+                    "p95_ms": round(ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)] * 1000, 3),
+                    "index_bytes": variant.index_bytes,
+                    "scan_bytes": variant.scan_bytes,
+                }
+            )
+    return rows
+
+
+def embed_queries_cached(embeddings: Any, texts: Sequence[str], cache_path: Path = paths.QUERY_EMBEDDING_CACHE) -> List[List[float]]:
+    """Query vectors keyed by model and text, so repeated sweeps never re-embed the label set."""
+    model = getattr(embeddings, "model_name", type(embeddings).__name__)
+    cache: Dict[str, List[float]] = {}
+    if cache_path.exists():
+        try:
+            cache = json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Discarding unreadable query embedding cache %s: %s", cache_path, exc)
+    keys = [hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest() for text in texts]
+    missing = {key: text for key, text in zip(keys, texts) if key not in cache}
+    if missing:
+        LOGGER.info("Embedding %d uncached evaluation queries", len(missing))
+        embed = getattr(embeddings, "embed_queries", None)
+        vectors = embed(list(missing.values())) if embed else [embeddings.embed_query(text) for text in missing.values()]
+        cache.update(zip(missing.keys(), ([float(value) for value in vector] for vector in vectors)))
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(cache), encoding="utf-8")
+        tmp_path.replace(cache_path)
+    return [cache[key] for key in keys]
+
+
+def directory_bytes(directory: Path) -> int:
+    return sum(path.stat().st_size for path in Path(directory).rglob("*") if path.is_file())
+
+
+def build_variants(
+    embeddings: Any,
+    persist_directory: Path,
+    index_directory: Path,
+    layouts: Dict[str, Any],
+    rescore_factors: Sequence[int],
+    include_chroma: bool = True,
+) -> List[RetrievalVariant]:
+    """Chroma itself plus the memmap export scanned with each layout and re-scoring factor."""
+    from rag_apps.common.vectorstores import load_chroma_store, load_vector_index
+
+    variants = []
+    if include_chroma:
+        variants.append(RetrievalVariant("chroma", load_chroma_store(embeddings, persist_directory), directory_bytes(persist_directory)))
+    if layouts:
+        index = load_vector_index(embeddings, persist_directory, index_directory, "memmap")
+        for name, layout in layouts.items():
+            for factor in rescore_factors if layout.compressed else (0,):
+                variant = index.with_layout(layout, rescore_factor=factor)
+                label = f"memmap:{name}" + (f"@x{factor}" if layout.compressed else "")
+                extra = variant.compressed.nbytes if variant.compressed is not None else 0
+                variants.append(RetrievalVariant(label, variant, index.vectors.nbytes + extra, variant.scan_bytes))
+    return variants
+
+
+def append_history(rows: Sequence[dict], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not path.exists()
+    with path.open("a", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=HISTORY_COLUMNS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def _select_layouts(names: str, width: int) -> Dict[str, Any]:
+    """``float32``, ``int8``, ``truncate``, ``pca`` or ``int8_pca`` at the default reduced widths."""
+    from .quantization import default_layouts
+
+    available = {
+        (name if name in ("float32", "int8") else name.rstrip("0123456789")): (name, layout)
+        for name, layout in default_layouts(width).items()
+    }
+    unknown = [name for name in names.split(",") if name and name not in available]
+    if unknown:
+        raise SystemExit(f"Unknown --layouts: {', '.join(unknown)} (choose from {', '.join(available)})")
+    return dict(available[name] for name in names.split(",") if name)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline retrieval quality vs latency sweep (no LLM calls)")
+    parser.add_argument("--app", choices=("medical", "compliance"), default="medical")
+    parser.add_argument("--k", default="4,8,16", help="Comma-separated cut-offs")
+    parser.add_argument("--layouts", default="float32,int8,int8_pca", help="memmap layouts from bench.quantization (empty: Chroma only)")
+    parser.add_argument("--rescore-factors", default="4", help="Comma-separated re-scoring factors for compressed layouts")
+    parser.add_argument("--no-chroma", action="store_true", help="Skip the Chroma baseline")
+    parser.add_argument(
+        "--store",
+        action="append",
+        type=Path,
+        default=None,
+        help="Extra Chroma directory to sweep (e.g. built with another chunk size); repeatable",
+    )
+    parser.add_argument("--labels", type=Path, default=None, help="Hand-labelled queries JSON instead of silver/CUAD labels")
+    parser.add_argument("--contracts", type=int, default=None, help="Only label the first N annotated CUAD contracts")
+    parser.add_argument("--output", type=Path, default=None, help="Report JSON path (defaults to artifacts/evaluation/)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    from rag_apps.common.key_manager import GeminiKeyManager
+    from rag_apps.common.llm import RotatingGeminiEmbeddings
+    from rag_apps.common.vectorstores import load_chroma_store
+    from rag_apps.compliance.config import ComplianceConfig
+    from rag_apps.medical.config import MedicalRAGConfig
+
+    config = MedicalRAGConfig() if args.app == "medical" else ComplianceConfig()
+    embeddings = RotatingGeminiEmbeddings(GeminiKeyManager.from_defaults())
+    ks = [int(value) for value in args.k.split(",") if value.strip()]
+    factors = [int(value) for value in args.rescore_factors.split(",") if value.strip()]
+    stores = [(config.persist_directory.name, config.persist_directory, config.index_directory)]
+    stores += [(path.name, path, path.with_name(f"{path.name}_memmap")) for path in args.store or []]
+
+    label_store = load_chroma_store(embeddings, config.persist_directory)
+    if args.labels:
+        labelled = load_labels(args.labels)
+    elif args.app == "medical":
+        with paths.MEDICAL_QUERY_FILE.open("r", encoding="utf-8") as handle:
+            labelled = medical_silver_labels(label_store, json.load(handle))
+    else:
+        from rag_apps.compliance.rules import load_rules
+
+        labelled = cuad_labels(label_store, load_rules(config.rules_path), contracts=args.contracts)
+    if not labelled:
+        raise SystemExit("No labelled queries; check the dataset/annotations or pass --labels")
+    fingerprint = label_fingerprint(labelled)
+    vectors = embed_queries_cached(embeddings, [item.text for item in labelled])
+
+    run_at = datetime.now().isoformat(timespec="seconds")
+    rows: List[dict] = []
+    for store_name, persist_directory, index_directory in stores:
+        layouts = _select_layouts(args.layouts, len(vectors[0]))
+        variants = build_variants(embeddings, persist_directory, index_directory, layouts, factors, not args.no_chroma)
+        for row in evaluate_variants(variants, labelled, vectors, ks):
+            rows.append({"run_at": run_at, "app": args.app, "labels": fingerprint, "queries": len(labelled), "store": store_name, **row})
+
+    output = args.output or paths.EVAL_OUTPUT_DIR / f"retrieval_eval_{args.app}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"labels": fingerprint, "queries": len(labelled), "results": rows}, indent=2), encoding="utf-8")
+    history = paths.EVAL_OUTPUT_DIR / "retrieval_eval_history.csv"
+    append_history(rows, history)
+    for row in rows:
+        LOGGER.info(
+            "%-22s %-24s k=%-3d recall %.3f  MRR %.3f  nDCG %.3f  p50 %.2f ms  p95 %.2f ms  %.1f MB",
+            row["store"],
+            row["variant"],
+            row["k"],
+            row["recall"],
+            row["mrr"],
+            row["ndcg"],
+            row["p50_ms"],
+            row["p95_ms"],
+            row["index_bytes"] / 1_048_576,
+        )
+    LOGGER.info("Wrote retrieval report to %s and appended %d rows to %s", output, len(rows), history)
+
+
+if __name__ == "__main__":
+    main()
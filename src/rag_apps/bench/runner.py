@@ -0,0 +1,544 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from langchain.chains import LLMChain
+from langchain.prompts import PromptTemplate
+from langchain.schema import Document
+
+from rag_apps.common import paths
+from rag_apps.common.chunking import chunk_documents, create_text_splitter, load_chunk_cache
+from rag_apps.common.evaluation import run_batch_queries
+from rag_apps.common.instrumentation import REGISTRY
+from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.neighbours import ChunkNeighbourIndex
+from rag_apps.common.sections import SECTION_PATTERNS, find_sections
+from rag_apps.common.vector_index import MemmapVectorIndex
+from rag_apps.common.vectors import as_matrix, cosine_scores, normalize
+from rag_apps.common.vectorstores import build_chroma_store
+from rag_apps.compliance import agent as compliance_agent
+from rag_apps.compliance.config import ComplianceConfig
+from rag_apps.compliance.ingest import load_documents, persist_chunks
+from rag_apps.compliance.rule_index import RuleEmbeddingIndex
+from rag_apps.compliance.rules import load_rules
+from rag_apps.medical import pipeline as medical_pipeline
+from rag_apps.medical.config import MedicalRAGConfig
+from rag_apps.medical.prepare_dataset import load_medical_documents
+from .corpora import (
+    synthetic_compliance_questions,
+    synthetic_contract_documents,
+    synthetic_medical_documents,
+    synthetic_medical_queries,
+)
+from .fakes import FakeBackendConfig, build_fake_resources
+from .quantization import compare_layouts, default_layouts
+from .retrieval_eval import RetrievalVariant, directory_bytes, evaluate_variants, medical_silver_labels
+from .startup import heaviest_imports, startup_targets, time_startup
+
+
+LOGGER = get_logger(__name__)
+
+
+@dataclass
+class BenchResult:
+    scenario: str
+    ops: int
+    seconds: float
+    throughput_per_s: float
+    latency_ms: Dict[str, float]
+    peak_memory_mb: float
+    errors: int = 0
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+def measure(
+    scenario: str,
+    items: Sequence[Any],
+    operation: Callable[[Any], Any],
+    units: Optional[Callable[[List[Any]], Dict[str, Any]]] = None,
+) -> BenchResult:
+    """Time ``operation`` over ``items``.
+
+    Peak memory comes from a separate traced pass on the first item, which
+    also serves as warm-up so tracemalloc overhead never skews latencies.
+    """
+    if not items:
+        raise ValueError(f"Benchmark {scenario} has no work items")
+    tracemalloc.start()
+    try:
+        operation(items[0])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies: List[float] = []
+    outputs: List[Any] = []
+    errors = 0
+    started = time.perf_counter()
+    for item in items:
+        op_start = time.perf_counter()
+        try:
+            outputs.append(operation(item))
+        except Exception as exc:  # noqa: BLE001
+            errors += 1
+            LOGGER.warning("Benchmark %s operation failed: %s", scenario, exc)
+        latencies.append(time.perf_counter() - op_start)
+    seconds = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return BenchResult(
+        scenario=scenario,
+        ops=len(items),
+        seconds=round(seconds, 6),
+        throughput_per_s=round(len(items) / seconds, 3) if seconds else 0.0,
+        latency_ms={
+            "mean": round(statistics.fmean(ordered) * 1000, 3),
+            "p50": round(_percentile(ordered, 50) * 1000, 3),
+            "p95": round(_percentile(ordered, 95) * 1000, 3),
+            "p99": round(_percentile(ordered, 99) * 1000, 3),
+        },
+        peak_memory_mb=round(peak / 1_048_576, 3),
+        errors=errors,
+        extra=units(outputs) if units else {},
+    )
+
+
+class BenchContext:
+    """Lazily builds the synthetic corpora, stores and pipelines shared between scenarios."""
+
+    def __init__(self, scale: int, queries: int, backend: FakeBackendConfig, workdir: Path, real_data: bool = False):
+        self.scale = scale
+        self.real_data = real_data
+        self.query_count = queries
+        self.backend_config = backend
+        self.workdir = workdir
+        self.chat, self.embeddings, self.backend = build_fake_resources(backend)
+
+    @cached_property
+    def medical_documents(self) -> List[Document]:
+        if self.real_data:
+            return load_medical_documents(MedicalRAGConfig(), sample_size=self.scale)
+        return synthetic_medical_documents(self.scale)
+
+    @cached_property
+    def contract_documents(self) -> List[Document]:
+        if self.real_data:
+            return load_documents(ComplianceConfig(), limit=max(self.scale // 10, 5))
+        return synthetic_contract_documents(max(self.scale // 10, 5))
+
+    @cached_property
+    def medical_chunks(self) -> List[Document]:
+        config = MedicalRAGConfig()
+        return chunk_documents(self.medical_documents, config.chunk_size, config.chunk_overlap)
+
+    @cached_property
+    def contract_chunks(self) -> List[Document]:
+        config = ComplianceConfig()
+        return chunk_documents(self.contract_documents, config.chunk_size, config.chunk_overlap)
+
+    @cached_property
+    def medical_store(self):
+        return build_chroma_store(self.medical_chunks, self.embeddings, self.workdir / "medical_chroma", force_recreate=True)
+
+    @cached_property
+    def compliance_store(self):
+        return build_chroma_store(self.contract_chunks, self.embeddings, self.workdir / "compliance_chroma", force_recreate=True)
+
+    @cached_property
+    def medical_queries(self) -> List[str]:
+        return synthetic_medical_queries(self.query_count)
+
+    @cached_property
+    def compliance_questions(self) -> List[str]:
+        return synthetic_compliance_questions(max(self.query_count // 10, 2))
+
+    @cached_property
+    def pipeline(self) -> medical_pipeline.MedicalRAGPipeline:
+        config = MedicalRAGConfig()
+        prompt = PromptTemplate(template=medical_pipeline.PROMPT_TEMPLATE, input_variables=["context", "question"])
+        return medical_pipeline.MedicalRAGPipeline(
+            chain=LLMChain(llm=self.chat, prompt=prompt),
+            retriever=self.medical_store.as_retriever(search_kwargs={"k": config.retriever_k}),
+            neighbours=ChunkNeighbourIndex(self.medical_chunks),
+            neighbour_window=config.neighbour_window,
+            dedupe_neighbours=config.dedupe_neighbours,
+        )
+
+    @cached_property
+    def agent(self) -> compliance_agent.ComplianceAgent:
+        config = ComplianceConfig()
+        prompt = PromptTemplate(
+            template=compliance_agent.PROMPT,
+            input_variables=["rule_id", "rule_description", "severity", "question", "context"],
+        )
+        rules = load_rules(config.rules_path)
+        rule_index = RuleEmbeddingIndex(self.embeddings, self.workdir / "rule_embeddings.json")
+        return compliance_agent.ComplianceAgent(
+            chain=LLMChain(llm=self.chat, prompt=prompt),
+            retriever=self.compliance_store.as_retriever(search_kwargs={"k": config.retriever_k}),
+            rules=rules,
+            neighbours=ChunkNeighbourIndex(self.contract_chunks),
+            neighbour_window=config.neighbour_window,
+            dedupe_neighbours=config.dedupe_neighbours,
+            passage_char_limit=config.passage_char_limit,
+            store=self.compliance_store,
+            embeddings=self.embeddings,
+            rule_vectors=rule_index.vectors_for(rules),
+            retriever_k=config.retriever_k,
+            pool_k=config.pool_k,
+            pool_approx_margin=config.pool_approx_margin,
+            rule_index=rule_index,
+        )
+
+
+def bench_chunking(ctx: BenchContext) -> BenchResult:
+    config = MedicalRAGConfig()
+    docs = ctx.medical_documents + ctx.contract_documents
+    return measure(
+        "chunking",
+        docs,
+        lambda doc: chunk_documents([doc], config.chunk_size, config.chunk_overlap),
+        units=lambda out: {"chunks": sum(len(chunks) for chunks in out), "chars": sum(len(d.page_content) for d in docs)},
+    )
+
+
+def bench_chunker_compare(ctx: BenchContext) -> BenchResult:
+    """Reference LangChain splitter vs the offset chunker (serial and process pool) on both corpora."""
+    corpora = {
+        "medical": (ctx.medical_documents, MedicalRAGConfig()),
+        "compliance": (ctx.contract_documents, ComplianceConfig()),
+    }
+    workers = max(os.cpu_count() or 1, 2)
+
+    def run(name: str) -> Dict[str, Any]:
+        documents, config = corpora[name]
+        reference = create_text_splitter(config.chunk_size, config.chunk_overlap)
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        expected = [[chunk.page_content for chunk in reference.split_documents([doc])] for doc in documents]
+        timings["langchain"] = time.perf_counter() - started
+        started = time.perf_counter()
+        chunks = chunk_documents(documents, config.chunk_size, config.chunk_overlap)
+        timings["offset"] = time.perf_counter() - started
+        started = time.perf_counter()
+        chunk_documents(documents, config.chunk_size, config.chunk_overlap, workers=workers)
+        timings[f"offset_{workers}_workers"] = time.perf_counter() - started
+
+        produced: Dict[str, List[str]] = {}
+        for chunk in chunks:
+            produced.setdefault(chunk.metadata["doc_id"], []).append(chunk.page_content)
+        ids = [str(doc.metadata.get("doc_id", position)) for position, doc in enumerate(documents)]
+        identical = sum(produced.get(doc_id, []) == texts for doc_id, texts in zip(ids, expected))
+        total_chunks = sum(len(texts) for texts in expected)
+        return {
+            "corpus": name,
+            "documents": len(documents),
+            "chunks": total_chunks,
+            "chunks_per_s": {label: round(total_chunks / seconds, 1) if seconds else None for label, seconds in timings.items()},
+            "speedup": round(timings["langchain"] / timings["offset"], 2) if timings["offset"] else None,
+            "identical_documents": identical,
+        }
+
+    return measure(
+        "chunker_compare",
+        list(corpora),
+        run,
+        units=lambda out: {row["corpus"]: row for row in out},
+    )
+
+
+def _section_coverage(chunks: Sequence[Document], start: int, end: int) -> List[int]:
+    """Characters of ``[start, end)`` covered by each chunk."""
+    return [
+        max(min(end, chunk.metadata["end_index"]) - max(start, chunk.metadata["start_index"]), 0)
+        for chunk in chunks
+    ]
+
+
+def _structure_stats(ctx: BenchContext, documents: Sequence[Document], chunks: Sequence[Document], kind: str) -> Dict[str, Any]:
+    """Per-section retrieval inside each document with lexical fake embeddings.
+
+    Every titled section becomes a query (its title plus a few words from its
+    middle); we record how much of the top hit belongs to the section, how many
+    chunks are needed to cover 90% of it and how many prompt characters that costs.
+    """
+    by_doc: Dict[str, List[Document]] = {}
+    for chunk in chunks:
+        by_doc.setdefault(chunk.metadata["doc_id"], []).append(chunk)
+    purity: List[float] = []
+    k_needed: List[int] = []
+    prompt_chars: List[int] = []
+    fragmented = sections_seen = 0
+    for position, document in enumerate(documents):
+        doc_chunks = by_doc.get(str(document.metadata.get("doc_id", position)), [])
+        if not doc_chunks:
+            continue
+        text = document.page_content
+        matrix = normalize(as_matrix([ctx.backend.embed(chunk.page_content) for chunk in doc_chunks]))
+        for section in find_sections(text, SECTION_PATTERNS[kind]):
+            body = text[section.start:section.end].strip()
+            if not section.title or len(body) <= len(section.title) + 20:
+                continue
+            sections_seen += 1
+            covered = _section_coverage(doc_chunks, section.start, section.end)
+            if max(covered) < len(body):
+                fragmented += 1
+            words = body.split()
+            middle = len(words) // 2
+            query = f"{section.title} {' '.join(words[middle:middle + 8])}"
+            order = np.argsort(-cosine_scores(matrix, ctx.backend.embed(query)), kind="stable")
+            top = doc_chunks[order[0]]
+            purity.append(covered[order[0]] / max(len(top.page_content), 1))
+            target = 0.9 * len(body)
+            total = chars = 0
+            for k, index in enumerate(order, start=1):
+                total += covered[index]
+                chars += len(doc_chunks[index].page_content)
+                if total >= target or k == len(order):
+                    break
+            k_needed.append(k)
+            prompt_chars.append(chars)
+    return {
+        "chunks": len(chunks),
+        "mean_chunk_chars": round(statistics.fmean(len(c.page_content) for c in chunks), 1) if chunks else 0.0,
+        "sections": sections_seen,
+        "fragmented_section_rate": round(fragmented / sections_seen, 4) if sections_seen else 0.0,
+        "top1_purity": round(statistics.fmean(purity), 4) if purity else 0.0,
+        "mean_k_for_90pct": round(statistics.fmean(k_needed), 3) if k_needed else 0.0,
+        "mean_prompt_chars": round(statistics.fmean(prompt_chars), 1) if prompt_chars else 0.0,
+    }
+
+
+def bench_structure_compare(ctx: BenchContext) -> BenchResult:
+    """Recursive vs section-aware chunking: chunk counts, clause fragmentation, k to cover a section and prompt size."""
+    corpora = {
+        "medical": (ctx.medical_documents, MedicalRAGConfig(), "transcript"),
+        "compliance": (ctx.contract_documents, ComplianceConfig(), "contract"),
+    }
+
+    def run(name: str) -> Dict[str, Any]:
+        documents, config, kind = corpora[name]
+        row: Dict[str, Any] = {"corpus": name, "documents": len(documents)}
+        for strategy, sections in (("recursive", None), ("sections", kind)):
+            chunks = chunk_documents(documents, config.chunk_size, config.chunk_overlap, sections=sections)
+            row[strategy] = _structure_stats(ctx, documents, chunks, kind)
+        return row
+
+    return measure(
+        "structure_compare",
+        list(corpora),
+        run,
+        units=lambda out: {row["corpus"]: row for row in out},
+    )
+
+
+def bench_chunk_cache(ctx: BenchContext) -> BenchResult:
+    cache_path = ctx.workdir / "medical_chunks.jsonl"
+    persist_chunks(ctx.medical_chunks, cache_path)
+    return measure(
+        "chunk_cache_load",
+        list(range(5)),
+        lambda _: load_chunk_cache(cache_path),
+        units=lambda out: {"chunks": len(out[0]) if out else 0, "bytes": cache_path.stat().st_size},
+    )
+
+
+def bench_store_build(ctx: BenchContext) -> BenchResult:
+    chunks = ctx.medical_chunks
+    builds = itertools.count()
+    # Chroma keeps a client per persist directory alive, so every build gets a fresh one.
+    return measure(
+        "store_build",
+        [0],
+        lambda _: build_chroma_store(chunks, ctx.embeddings, ctx.workdir / f"store_build_{next(builds)}"),
+        units=lambda _: {"chunks": len(chunks)},
+    )
+
+
+def bench_retrieval(ctx: BenchContext) -> BenchResult:
+    retriever = ctx.medical_store.as_retriever(search_kwargs={"k": MedicalRAGConfig().retriever_k})
+    return measure("retrieval", ctx.medical_queries, retriever.get_relevant_documents)
+
+
+def bench_quantization(ctx: BenchContext) -> BenchResult:
+    """Index scan size, search latency and recall@10 of int8/reduced layouts vs exact float32 search."""
+    index = MemmapVectorIndex.export_chroma(ctx.medical_store, ctx.workdir / "medical_index")
+    query_vectors = ctx.embeddings.embed_queries(ctx.medical_queries)
+    return measure(
+        "quantization",
+        [index],
+        lambda idx: compare_layouts(idx, query_vectors, k=10),
+        units=lambda out: {"vectors": len(index), "layouts": out[0] if out else []},
+    )
+
+
+def bench_retrieval_quality(ctx: BenchContext) -> BenchResult:
+    """recall@k/MRR/nDCG and search latency of Chroma vs memmap layouts on silver-labelled synthetic queries."""
+    labelled = medical_silver_labels(ctx.medical_store, ctx.medical_queries)
+    query_vectors = ctx.embeddings.embed_queries([item.text for item in labelled])
+    index = MemmapVectorIndex.export_chroma(ctx.medical_store, ctx.workdir / "medical_eval_index")
+    layouts = {name: layout for name, layout in default_layouts(index.vectors.shape[1]).items() if name in ("float32", "int8")}
+    variants = [RetrievalVariant("chroma", ctx.medical_store, directory_bytes(ctx.workdir / "medical_chroma"))]
+    for name, layout in layouts.items():
+        variant = index.with_layout(layout)
+        extra = variant.compressed.nbytes if variant.compressed is not None else 0
+        variants.append(RetrievalVariant(f"memmap:{name}", variant, index.vectors.nbytes + extra, variant.scan_bytes))
+    return measure(
+        "retrieval_quality",
+        [variants],
+        lambda items: evaluate_variants(items, labelled, query_vectors, ks=(4, 8)),
+        units=lambda out: {"labelled_queries": len(labelled), "results": out[0] if out else []},
+    )
+
+
+def bench_medical_answer(ctx: BenchContext) -> BenchResult:
+    pipeline = ctx.pipeline
+    return measure("medical_answer", ctx.medical_queries, pipeline.answer)
+
+
+def bench_compliance_assessment(ctx: BenchContext) -> BenchResult:
+    agent = ctx.agent
+
+    def run(question: str) -> int:
+        agent.run_assessment(question)
+        return agent.last_stats.store_queries_saved if agent.last_stats is not None else 0
+
+    return measure(
+        "compliance_assessment",
+        ctx.compliance_questions,
+        run,
+        units=lambda out: {"rules": len(agent.rules), "store_queries_saved": sum(out)},
+    )
+
+
+def bench_batch_queries(ctx: BenchContext) -> BenchResult:
+    pipeline = ctx.pipeline
+    return measure(
+        "batch_queries",
+        [ctx.medical_queries],
+        lambda queries: run_batch_queries(pipeline.answer, queries, ctx.workdir / "evaluation", prefix="bench"),
+        units=lambda _: {"queries": len(ctx.medical_queries)},
+    )
+
+
+def bench_startup(ctx: BenchContext) -> BenchResult:
+    def summarize(out: List[tuple]) -> Dict[str, Any]:
+        slowest = max(out, key=lambda item: item[1])[0] if out else None
+        return {
+            "seconds_by_target": {label: round(seconds, 4) for label, seconds in out},
+            "heaviest_imports": heaviest_imports(slowest.split(":", 1)[1]) if slowest else [],
+        }
+
+    return measure("startup", startup_targets(), time_startup, units=summarize)
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext], BenchResult]] = {
+    "startup": bench_startup,
+    "chunking": bench_chunking,
+    "chunker_compare": bench_chunker_compare,
+    "structure_compare": bench_structure_compare,
+    "chunk_cache": bench_chunk_cache,
+    "store_build": bench_store_build,
+    "retrieval": bench_retrieval,
+    "quantization": bench_quantization,
+    "retrieval_quality": bench_retrieval_quality,
+    "medical_answer": bench_medical_answer,
+    "compliance_assessment": bench_compliance_assessment,
+    "batch_queries": bench_batch_queries,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=paths.PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    scenarios: Iterable[str],
+    scale: int = 200,
+    queries: int = 30,
+    backend: FakeBackendConfig | None = None,
+    real_data: bool = False,
+) -> dict:
+    backend = backend or FakeBackendConfig()
+    REGISTRY.reset()
+    with tempfile.TemporaryDirectory(prefix="rag_bench_") as tmp:
+        ctx = BenchContext(scale, queries, backend, Path(tmp), real_data=real_data)
+        results = []
+        for name in scenarios:
+            LOGGER.info("Running benchmark scenario %s", name)
+            results.append(asdict(SCENARIOS[name](ctx)))
+        backend_calls = dict(ctx.backend.calls)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "scale": scale,
+            "queries": queries,
+            "real_data": real_data,
+            "backend": asdict(backend),
+            "backend_calls": backend_calls,
+        },
+        "results": results,
+        "metrics": REGISTRY.to_dict(),
+    }
+
+
+def write_report(report: dict, output: Path | None = None) -> Path:
+    if output is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = paths.BENCH_OUTPUT_DIR / f"bench_{report['meta'].get('commit') or 'local'}_{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    return output
+
+
+def compare_reports(baseline: dict, current: dict) -> List[dict]:
+    """Per-scenario throughput and p95 ratios of ``current`` over ``baseline`` (>1 throughput is faster)."""
+    previous = {row["scenario"]: row for row in baseline.get("results", [])}
+    rows = []
+    for row in current.get("results", []):
+        old = previous.get(row["scenario"])
+        if not old:
+            continue
+        rows.append(
+            {
+                "scenario": row["scenario"],
+                "throughput_ratio": round(row["throughput_per_s"] / old["throughput_per_s"], 3) if old["throughput_per_s"] else None,
+                "p95_ratio": round(row["latency_ms"]["p95"] / old["latency_ms"]["p95"], 3) if old["latency_ms"]["p95"] else None,
+                "peak_memory_delta_mb": round(row["peak_memory_mb"] - old["peak_memory_mb"], 3),
+            }
+        )
+    return rows
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from rag_apps.common import paths
+
+
+CLI_ENTRY_POINTS: Tuple[str, ...] = (
+    "rag_apps.medical.prepare_dataset",
+    "rag_apps.medical.build_vector_store",
+    "rag_apps.medical.evaluate",
+    "rag_apps.compliance.ingest",
+    "rag_apps.compliance.build_vector_store",
+    "rag_apps.compliance.comparison",
+    "rag_apps.bench",
+)
+IMPORT_TARGETS: Tuple[str, ...] = (
+    "rag_apps.common.paths",
+    "rag_apps.medical.streamlit_app",
+    "rag_apps.compliance.streamlit_app",
+)
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    source_root = str(paths.PROJECT_ROOT / "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [source_root, env.get("PYTHONPATH")]))
+    return env
+
+
+def startup_targets() -> List[Tuple[str, str]]:
+    return [("help", module) for module in CLI_ENTRY_POINTS] + [("import", module) for module in IMPORT_TARGETS]
+
+
+def time_startup(target: Tuple[str, str]) -> Tuple[str, float]:
+    """Wall time of a fresh interpreter running ``--help`` on a CLI or importing a module."""
+    kind, module = target
+    command = [sys.executable, "-m", module, "--help"] if kind == "help" else [sys.executable, "-c", f"import {module}"]
+    started = time.perf_counter()
+    subprocess.run(command, env=_env(), capture_output=True, check=True)
+    return f"{kind}:{module}", time.perf_counter() - started
+
+
+def heaviest_imports(module: str, top: int = 10) -> List[Tuple[str, float]]:
+    """Top cumulative import costs (seconds) reported by ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    costs: List[Tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        costs.append((name, int(cumulative) / 1e6))
+    return sorted(costs, key=lambda item: item[1], reverse=True)[:top]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from .instrumentation import counter, histogram
+from .logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+BATCH_SIZES = histogram(
+    "embedding_batch_size",
+    "Distinct query texts per micro-batched embedding request",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+BATCH_WAIT = histogram(
+    "embedding_batch_wait_seconds",
+    "Time a query waited in the micro-batcher before its batch was sent",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+BATCH_DEDUPED = counter("embedding_batch_deduped_total", "Queries answered by an identical text in the same batch")
+
+_STOP = object()
+
+
+class EmbeddingMicroBatcher(Embeddings):
+    """Coalesces concurrent ``embed_query`` calls into one batched embedding request.
+
+    The first query opens a window of ``max_wait_ms``; everything that arrives
+    before it closes (or until ``max_batch_size`` distinct texts are queued)
+    is sent as one ``embed_queries`` call and fanned back out to the callers.
+    Identical texts in a window are embedded once, and up to ``concurrency``
+    batches are in flight while the next one collects. Document embedding is
+    passed straight through, so this is a drop-in ``Embeddings`` for stores.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0, concurrency: int = 4):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="embedding-batch")
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __getattr__(self, name: str):
+        # Attributes such as key_manager or model_name resolve on the wrapped embeddings.
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        futures = [self._submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._submit(text).result()
+
+    def close(self) -> None:
+        """Send what is queued, then stop; later queries raise instead of restarting the batcher."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingMicroBatcher is closed; embed through the current shared resources")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def _collect(self, first: Tuple[str, Future, float]) -> Tuple[Dict[str, List[Tuple[Future, float]]], bool]:
+        pending: Dict[str, List[Tuple[Future, float]]] = {first[0]: [(first[1], first[2])]}
+        deadline = first[2] + self.max_wait
+        while len(pending) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return pending, True
+            text, future, enqueued = item
+            pending.setdefault(text, []).append((future, enqueued))
+        return pending, False
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            pending, stop = self._collect(item)
+            self._executor.submit(self._dispatch, pending)
+            if stop:
+                return
+
+    def _dispatch(self, pending: Dict[str, List[Tuple[Future, float]]]) -> None:
+        texts = list(pending)
+        sent = time.perf_counter()
+        for waiters in pending.values():
+            for _, enqueued in waiters:
+                BATCH_WAIT.observe(sent - enqueued)
+        BATCH_SIZES.observe(len(texts))
+        duplicates = sum(len(waiters) for waiters in pending.values()) - len(texts)
+        if duplicates:
+            BATCH_DEDUPED.inc(duplicates)
+        try:
+            if len(texts) == 1:
+                vectors = [self.embeddings.embed_query(texts[0])]
+            elif hasattr(self.embeddings, "embed_queries"):
+                vectors = self.embeddings.embed_queries(texts)
+            else:
+                vectors = [self.embeddings.embed_query(text) for text in texts]
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning("Batched embedding of %d queries failed: %s", len(texts), exc)
+            for waiters in pending.values():
+                for future, _ in waiters:
+                    future.set_exception(exc)
+            return
+        for text, vector in zip(texts, vectors):
+            for future, _ in pending[text]:
+                future.set_result(vector)
@@ -1,19 +1,77 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List
 
-from langchain.schema import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from .sections import SECTION_PATTERNS, SectionAwareSplitter, SectionIndex
+from .splitter import DEFAULT_SEPARATORS, OffsetTextSplitter, split_many
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 
 def create_text_splitter(chunk_size: int = 1200, chunk_overlap: int = 200) -> RecursiveCharacterTextSplitter:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ". ", "? ", "! ", " "],
+        separators=list(DEFAULT_SEPARATORS),
+        add_start_index=True,
     )
 
 
-def chunk_documents(documents: Iterable[Document], chunk_size: int = 1200, chunk_overlap: int = 200) -> List[Document]:
-    splitter = create_text_splitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return splitter.split_documents(list(documents))
+def chunk_documents(
+    documents: Iterable[Document],
+    chunk_size: int = 1200,
+    chunk_overlap: int = 200,
+    workers: int = 1,
+    sections: str | None = None,
+) -> List[Document]:
+    """Split documents and tag every chunk with ``doc_id``, ``chunk_index`` and its ``start_index``/``end_index``.
+
+    Produces the same chunk texts as :func:`create_text_splitter`, but splits on
+    offsets (optionally across ``workers`` processes) and builds each chunk's
+    metadata as a shallow copy of its parent's instead of a deep copy. Chunks
+    are built with ``Document.construct`` since their fields are already valid.
+
+    ``sections`` names a heading pattern from
+    :data:`rag_apps.common.sections.SECTION_PATTERNS` (``"contract"`` or
+    ``"transcript"``); chunks then never straddle sections and also carry
+    ``section_title`` and ``section_index``.
+    """
+    from langchain.schema import Document
+
+    documents = list(documents)
+    pattern = SECTION_PATTERNS[sections] if sections else None
+    if pattern is not None:
+        splitter = SectionAwareSplitter(chunk_size, chunk_overlap, pattern, DEFAULT_SEPARATORS)
+    else:
+        splitter = OffsetTextSplitter(chunk_size, chunk_overlap, DEFAULT_SEPARATORS)
+    spans_per_document = split_many(splitter, [document.page_content for document in documents], workers)
+    chunks: List[Document] = []
+    for position, (document, spans) in enumerate(zip(documents, spans_per_document)):
+        text = document.page_content
+        base = document.metadata
+        doc_id = str(base.get("doc_id", position))
+        index = SectionIndex(text, pattern) if pattern is not None else None
+        for chunk_index, (start, end) in enumerate(spans):
+            metadata = {**base, "doc_id": doc_id, "chunk_index": chunk_index, "start_index": start, "end_index": end}
+            if index is not None:
+                section_index, titles = index.lookup(start, end)
+                metadata["section_index"] = section_index
+                metadata["section_title"] = " | ".join(titles)
+            chunks.append(Document.construct(page_content=text[start:end], metadata=metadata))
+    return chunks
+
+
+def load_chunk_cache(cache_path: Path) -> List[Document]:
+    from langchain.schema import Document
+
+    with Path(cache_path).open("r", encoding="utf-8") as handle:
+        return [
+            Document(page_content=payload["page_content"], metadata=payload["metadata"])
+            for payload in (json.loads(line) for line in handle)
+        ]
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [{"labels": dict(key), "value": value} for key, value in self._values.items()]
+
+    def prometheus(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(key)} {value:g}" for key, value in values)
+        return lines
+
+
+@dataclass
+class _HistogramSeries:
+    buckets: List[int]
+    count: int = 0
+    total: float = 0.0
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=2048))
+
+
+class Histogram:
+    """Cumulative-bucket histogram that also keeps a bounded sample window for percentiles."""
+
+    def __init__(self, name: str, help: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(buckets=[0] * len(self.bounds))
+            index = bisect.bisect_left(self.bounds, value)
+            if index < len(self.bounds):
+                series.buckets[index] += 1
+            series.count += 1
+            series.total += value
+            series.samples.append(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def percentile(self, q: float, **labels: Any) -> Optional[float]:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            samples = list(series.samples) if series is not None else None
+        return _pick(sorted(samples), q) if samples is not None else None
+
+    def _copy(self) -> List[Tuple[LabelKey, _HistogramSeries]]:
+        """Consistent copy of every series, so callers can format it without holding the lock."""
+        with self._lock:
+            return [
+                (key, _HistogramSeries(list(series.buckets), series.count, series.total, deque(series.samples)))
+                for key, series in self._series.items()
+            ]
+
+    def snapshot(self) -> List[dict]:
+        rows = []
+        for key, series in self._copy():
+            ordered = sorted(series.samples)
+            rows.append(
+                {
+                    "labels": dict(key),
+                    "count": series.count,
+                    "sum": series.total,
+                    "p50": _pick(ordered, 50),
+                    "p95": _pick(ordered, 95),
+                    "p99": _pick(ordered, 99),
+                }
+            )
+        return rows
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in self._copy():
+            running = 0
+            for bound, hits in zip(self.bounds, series.buckets):
+                running += hits
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {running}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series.count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series.total:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+
+def _pick(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(int(q / 100 * len(ordered)), len(ordered) - 1)]
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_otel(self) -> dict:
+        """Span encoded like an OTLP/JSON ``Span`` message."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otel_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+def _otel_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+_CURRENT_SPAN: contextvars.ContextVar[Optional[SpanRecord]] = contextvars.ContextVar("rag_current_span", default=None)
+
+
+class MetricsRegistry:
+    """Process-wide counters, histograms and a ring buffer of finished spans."""
+
+    def __init__(self, max_spans: int = 5000):
+        self._counters: Dict[str, Counter] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._spans: Deque[SpanRecord] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self.stage_seconds = self.histogram("rag_stage_seconds", "Wall time per pipeline stage")
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = Counter(name, help)
+            return self._counters[name]
+
+    def histogram(self, name: str, help: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, help, buckets)
+            return self._histograms[name]
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[SpanRecord]:
+        parent = _CURRENT_SPAN.get()
+        record = SpanRecord(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=dict(attributes),
+        )
+        token = _CURRENT_SPAN.set(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as exc:
+            record.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            record.end_ns = record.start_ns + int(elapsed * 1e9)
+            _CURRENT_SPAN.reset(token)
+            self.stage_seconds.observe(elapsed, stage=name)
+            with self._lock:
+                self._spans.append(record)
+
+    def spans(self) -> List[SpanRecord]:
+        with self._lock:
+            return list(self._spans)
+
+    def reset(self) -> None:
+        """Zero every metric in place so handles held by callers stay valid."""
+        with self._lock:
+            for item in self._counters.values():
+                item.clear()
+            for item in self._histograms.values():
+                item.clear()
+            self._spans.clear()
+
+    def _metrics(self) -> Tuple[Dict[str, Counter], Dict[str, Histogram]]:
+        with self._lock:
+            return dict(self._counters), dict(self._histograms)
+
+    def to_dict(self) -> dict:
+        counters, histograms = self._metrics()
+        return {
+            "counters": {name: counter.snapshot() for name, counter in counters.items()},
+            "histograms": {name: histogram.snapshot() for name, histogram in histograms.items()},
+        }
+
+    def to_json(self, include_spans: bool = True) -> str:
+        payload = self.to_dict()
+        if include_spans:
+            payload["spans"] = self.to_otel_spans()
+        return json.dumps(payload, indent=2)
+
+    def to_prometheus(self) -> str:
+        counters, histograms = self._metrics()
+        lines: List[str] = []
+        for counter in counters.values():
+            lines.extend(counter.prometheus())
+        for histogram in histograms.values():
+            lines.extend(histogram.prometheus())
+        return "\n".join(lines) + "\n"
+
+    def to_otel_spans(self, service_name: str = "rag_apps") -> dict:
+        """Finished spans wrapped as an OTLP/JSON ``ExportTraceServiceRequest`` body."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "rag_apps.common.instrumentation"},
+                            "spans": [record.to_otel() for record in self.spans()],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def write(self, path: Path) -> Path:
+        """Write metrics as Prometheus text for ``.prom``/``.txt`` paths, JSON otherwise."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = self.to_prometheus() if path.suffix in {".prom", ".txt"} else self.to_json()
+        path.write_text(text, encoding="utf-8")
+        return path
+
+
+REGISTRY = MetricsRegistry()
+
+
+def span(name: str, **attributes: Any):
+    return REGISTRY.span(name, **attributes)
+
+
+def counter(name: str, help: str = "") -> Counter:
+    return REGISTRY.counter(name, help)
+
+
+def histogram(name: str, help: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, help, buckets)
+
+
+def key_label(api_key: str) -> str:
+    return f"****{api_key[-4:]}"
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import itertools
 import os
+import threading
 from typing import Iterable, List
 
 from .logging_utils import get_logger
@@ -23,6 +24,7 @@ class GeminiKeyManager:
         self._keys: List[str] = list(dict.fromkeys(cleaned))
         self._cycle = itertools.cycle(self._keys)
         self._current: str | None = None
+        self._lock = threading.Lock()
         LOGGER.debug("Loaded %d Gemini API keys", len(self._keys))
 
     @classmethod
@@ -37,14 +39,19 @@ class GeminiKeyManager:
 
     @property
     def current(self) -> str:
-        if self._current is None:
-            self._current = next(self._cycle)
-        return self._current
+        with self._lock:
+            if self._current is None:
+                self._current = next(self._cycle)
+            return self._current
 
-    def advance(self) -> str:
-        self._current = next(self._cycle)
-        LOGGER.warning("Switching to next Gemini key")
-        return self._current
+    def advance(self, failed: str | None = None) -> str:
+        """Rotate to the next key; with ``failed``, only if no other thread already rotated away from it."""
+        with self._lock:
+            if failed is not None and self._current is not None and self._current != failed:
+                return self._current
+            self._current = next(self._cycle)
+            LOGGER.warning("Switching to next Gemini key")
+            return self._current
 
     @property
     def all_keys(self) -> List[str]:
@@ -1,41 +1,143 @@
 from __future__ import annotations
 
-from typing import Any, Iterable, List, Optional
+from contextlib import nullcontext
+from typing import Any, ContextManager, Dict, Iterable, List, Optional
 
 from langchain_core.callbacks import CallbackManagerForLLMRun
 from langchain_core.embeddings import Embeddings
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import ChatResult
+from langchain_core.pydantic_v1 import Field
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 
+from .instrumentation import counter, key_label, span
 from .key_manager import GeminiKeyManager
 from .logging_utils import get_logger
 
 
 LOGGER = get_logger(__name__)
 
+GEMINI_CALLS = counter("gemini_calls_total", "Gemini API attempts by kind, key and outcome")
+GEMINI_RETRIES = counter("gemini_key_retries_total", "Gemini failures that triggered a key rotation")
+LLM_TOKENS = counter("llm_tokens_total", "Prompt and completion tokens reported by the chat model")
+EMBEDDED_TEXTS = counter("embedded_texts_total", "Texts sent to the embedding model")
+
+
+def _slot(scheduler: Any, tenant: str) -> ContextManager[Any]:
+    return scheduler.slot(tenant) if scheduler is not None else nullcontext()
+
+
+def _pooled(pool: Any, key: tuple, factory: Any) -> Any:
+    return pool.get(key, factory) if pool is not None else factory()
+
+
+def _record_usage(result: ChatResult, model_name: str) -> tuple[int, int]:
+    tokens_in = tokens_out = 0
+    for generation in result.generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        tokens_in += int(usage.get("input_tokens", 0))
+        tokens_out += int(usage.get("output_tokens", 0))
+    LLM_TOKENS.inc(tokens_in, direction="in", model=model_name)
+    LLM_TOKENS.inc(tokens_out, direction="out", model=model_name)
+    return tokens_in, tokens_out
+
+
+class _UsageReportingChat(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI that keeps the response's token counts.
+
+    langchain-google-genai 1.0.x drops ``usage_metadata`` when converting the
+    response, so this repeats its ``_generate`` and copies the counts onto the
+    first generation's message, where ``_record_usage`` reads them.
+    """
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        *,
+        tools: Any = None,
+        functions: Any = None,
+        safety_settings: Any = None,
+        tool_config: Any = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        from langchain_google_genai.chat_models import _chat_with_retry, _response_to_result
+
+        request = self._prepare_request(
+            messages,
+            stop=stop,
+            tools=tools,
+            functions=functions,
+            safety_settings=safety_settings,
+            tool_config=tool_config,
+            generation_config=generation_config,
+        )
+        response = _chat_with_retry(
+            request=request,
+            **kwargs,
+            generation_method=self.client.generate_content,
+            metadata=self.default_metadata,
+        )
+        result = _response_to_result(response)
+        usage = getattr(response, "usage_metadata", None)
+        if usage and result.generations:
+            result.generations[0].message.usage_metadata = {
+                "input_tokens": usage.prompt_token_count,
+                "output_tokens": usage.candidates_token_count,
+                "total_tokens": usage.total_token_count,
+            }
+        return result
+
 
 class RotatingGeminiChat(BaseChatModel):
-    """Wraps ChatGoogleGenerativeAI with API key rotation."""
+    """Wraps ChatGoogleGenerativeAI with API key rotation.
 
+    With a ``client_pool`` clients are reused per key instead of built per call,
+    and with a ``scheduler`` every call waits for a slot of its ``tenant`` app
+    (see :mod:`rag_apps.common.resources`).
+    """
+
+    key_manager: Any
     model_name: str = "gemini-1.5-pro"
+    client_kwargs: Dict[str, Any] = Field(default_factory=dict)
+    client_pool: Any = None
+    scheduler: Any = None
+    tenant: str = "default"
 
-    def __init__(self, key_manager: GeminiKeyManager, model_name: str = "gemini-1.5-pro", **client_kwargs: Any):
-        super().__init__()
-        self.key_manager = key_manager
-        self.model_name = model_name
-        self.client_kwargs = client_kwargs
+    def __init__(
+        self,
+        key_manager: GeminiKeyManager,
+        model_name: str = "gemini-1.5-pro",
+        client_pool: Any = None,
+        scheduler: Any = None,
+        tenant: str = "default",
+        **client_kwargs: Any,
+    ):
+        super().__init__(
+            key_manager=key_manager,
+            model_name=model_name,
+            client_kwargs=client_kwargs,
+            client_pool=client_pool,
+            scheduler=scheduler,
+            tenant=tenant,
+        )
 
     @property
     def _llm_type(self) -> str:
         return "rotating-gemini-chat"
 
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, **self.client_kwargs}
+
     def _build_client(self, api_key: str) -> ChatGoogleGenerativeAI:
-        return ChatGoogleGenerativeAI(
-            model=self.model_name,
-            google_api_key=api_key,
-            **self.client_kwargs,
+        return _pooled(
+            self.client_pool,
+            ("chat", self.model_name, api_key, repr(sorted(self.client_kwargs.items()))),
+            lambda: _UsageReportingChat(model=self.model_name, google_api_key=api_key, **self.client_kwargs),
         )
 
     def _generate(
@@ -47,66 +149,107 @@ class RotatingGeminiChat(BaseChatModel):
     ) -> ChatResult:
         attempts = len(self.key_manager.all_keys)
         last_error: Optional[Exception] = None
-        for _ in range(attempts):
-            api_key = self.key_manager.current
-            client = self._build_client(api_key)
-            try:
-                return client._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
-            except Exception as exc:  # noqa: BLE001
-                last_error = exc
-                LOGGER.warning("Gemini call failed with key ****%s: %s", api_key[-4:], exc)
-                self.key_manager.advance()
+        with _slot(self.scheduler, self.tenant), span("llm.generate", model=self.model_name) as record:
+            for attempt in range(attempts):
+                api_key = self.key_manager.current
+                client = self._build_client(api_key)
+                try:
+                    result = client._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                except Exception as exc:  # noqa: BLE001
+                    last_error = exc
+                    GEMINI_CALLS.inc(kind="chat", key=key_label(api_key), outcome="error")
+                    if attempt < attempts - 1:
+                        GEMINI_RETRIES.inc(kind="chat", key=key_label(api_key))
+                    LOGGER.warning("Gemini call failed with key ****%s: %s", api_key[-4:], exc)
+                    self.key_manager.advance(api_key)
+                    continue
+                GEMINI_CALLS.inc(kind="chat", key=key_label(api_key), outcome="ok")
+                tokens_in, tokens_out = _record_usage(result, self.model_name)
+                record.set(attempts=attempt + 1, key=key_label(api_key), tokens_in=tokens_in, tokens_out=tokens_out)
+                return result
+            record.set(attempts=attempts)
         if last_error:
             raise last_error
         raise RuntimeError("Gemini key rotation exhausted without success")
 
 
 class RotatingGeminiEmbeddings(Embeddings):
-    """Embedding wrapper that rotates Gemini keys."""
+    """Embedding wrapper that rotates Gemini keys; ``client_pool``/``scheduler`` as for the chat model."""
 
-    def __init__(self, key_manager: GeminiKeyManager, model_name: str = "models/embedding-001", **client_kwargs: Any):
+    def __init__(
+        self,
+        key_manager: GeminiKeyManager,
+        model_name: str = "models/embedding-001",
+        client_pool: Any = None,
+        scheduler: Any = None,
+        tenant: str = "default",
+        **client_kwargs: Any,
+    ):
         self.key_manager = key_manager
         self.model_name = model_name
+        self.client_pool = client_pool
+        self.scheduler = scheduler
+        self.tenant = tenant
         self.client_kwargs = client_kwargs
 
     def _build_client(self, api_key: str) -> GoogleGenerativeAIEmbeddings:
-        return GoogleGenerativeAIEmbeddings(
-            model=self.model_name,
-            google_api_key=api_key,
-            **self.client_kwargs,
+        return _pooled(
+            self.client_pool,
+            ("embedding", self.model_name, api_key, repr(sorted(self.client_kwargs.items()))),
+            lambda: GoogleGenerativeAIEmbeddings(model=self.model_name, google_api_key=api_key, **self.client_kwargs),
         )
 
     def _call_with_rotation(self, func_name: str, *args: Any, **kwargs: Any) -> Any:
         attempts = len(self.key_manager.all_keys)
         last_error: Optional[Exception] = None
-        for _ in range(attempts):
-            api_key = self.key_manager.current
-            client = self._build_client(api_key)
-            try:
-                return getattr(client, func_name)(*args, **kwargs)
-            except Exception as exc:  # noqa: BLE001
-                last_error = exc
-                LOGGER.warning("Gemini embedding failed with key ****%s: %s", api_key[-4:], exc)
-                self.key_manager.advance()
+        with _slot(self.scheduler, self.tenant), span(f"embedding.{func_name}", model=self.model_name) as record:
+            for attempt in range(attempts):
+                api_key = self.key_manager.current
+                client = self._build_client(api_key)
+                try:
+                    result = getattr(client, func_name)(*args, **kwargs)
+                except Exception as exc:  # noqa: BLE001
+                    last_error = exc
+                    GEMINI_CALLS.inc(kind="embedding", key=key_label(api_key), outcome="error")
+                    if attempt < attempts - 1:
+                        GEMINI_RETRIES.inc(kind="embedding", key=key_label(api_key))
+                    LOGGER.warning("Gemini embedding failed with key ****%s: %s", api_key[-4:], exc)
+                    self.key_manager.advance(api_key)
+                    continue
+                GEMINI_CALLS.inc(kind="embedding", key=key_label(api_key), outcome="ok")
+                record.set(attempts=attempt + 1, key=key_label(api_key))
+                return result
+            record.set(attempts=attempts)
         if last_error:
             raise last_error
         raise RuntimeError("Gemini embedding call failed for all keys")
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDED_TEXTS.inc(len(texts), kind="document")
         return self._call_with_rotation("embed_documents", texts)
 
     def embed_query(self, text: str) -> List[float]:
+        EMBEDDED_TEXTS.inc(kind="query")
         return self._call_with_rotation("embed_query", text)
 
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one request, matching ``embed_query`` vectors."""
+        EMBEDDED_TEXTS.inc(len(texts), kind="query")
+        return self._call_with_rotation("embed_documents", texts, task_type="retrieval_query")
+
 
 def build_rotating_resources(
     *,
+    app: str = "default",
     chat_model: str = "gemini-1.5-pro",
     embedding_model: str = "models/embedding-001",
     chat_kwargs: Optional[dict[str, Any]] = None,
     embedding_kwargs: Optional[dict[str, Any]] = None,
 ) -> tuple[RotatingGeminiChat, RotatingGeminiEmbeddings]:
-    manager = GeminiKeyManager.from_defaults()
-    chat = RotatingGeminiChat(manager, model_name=chat_model, **(chat_kwargs or {}))
-    embeddings = RotatingGeminiEmbeddings(manager, model_name=embedding_model, **(embedding_kwargs or {}))
+    """Chat model and embeddings for ``app`` from the process-wide resource registry."""
+    from .resources import shared_resources
+
+    resources = shared_resources()
+    chat = resources.chat(app, chat_model, **(chat_kwargs or {}))
+    embeddings = resources.embeddings(app, embedding_model, **(embedding_kwargs or {}))
     return chat, embeddings
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.messages import BaseMessage
+
+from .instrumentation import counter
+from .logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+CACHE_LOOKUPS = counter("llm_cache_lookups_total", "LLM generation cache lookups by outcome")
+CACHE_EVICTIONS = counter("llm_cache_evictions_total", "Generations evicted to keep the cache under its size bound")
+CACHE_FORGOTTEN = counter("llm_cache_forgotten_total", "Cached generations dropped after failing validation")
+
+# langchain_core.load is marked beta but is what LangChain's own caches use to round-trip generations.
+warnings.filterwarnings("ignore", message=r"The function `(loads|dumps)` is in beta")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used);
+"""
+
+
+class SQLiteLLMCache(BaseCache):
+    """Persistent LangChain generation cache with least-recently-used eviction.
+
+    Keys hash the model's ``llm_string`` (model name, client kwargs, stop
+    words) with the serialized prompt, which for our chains is the fully
+    rendered template, so only byte-identical requests hit. Values are capped
+    at ``max_bytes`` in total; the oldest-used rows are dropped first.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        if row is None:
+            CACHE_LOOKUPS.inc(outcome="miss")
+            return None
+        try:
+            generations = [loads(value) for value in _split(row[0])]
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.warning("Ignoring unreadable cached generation %s: %s", key[:12], exc)
+            CACHE_LOOKUPS.inc(outcome="corrupt")
+            return None
+        CACHE_LOOKUPS.inc(outcome="hit")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        value = _join([dumps(generation) for generation in return_val])
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self.key(prompt, llm_string), value, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM generations").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM generations ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM generations WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        CACHE_EVICTIONS.inc(evicted)
+        LOGGER.info("Evicted %d cached generations to stay under %d bytes", evicted, self.max_bytes)
+
+    def forget(self, prompt: str, llm_string: str) -> bool:
+        """Drop one generation (e.g. a reply that failed validation) so the next request regenerates it."""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM generations WHERE key = ?", (self.key(prompt, llm_string),)).rowcount
+            self._conn.commit()
+        if deleted:
+            CACHE_FORGOTTEN.inc()
+        return bool(deleted)
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM generations")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generations").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def log_stats(self, label: str = "LLM cache") -> None:
+        stats = self.stats()
+        LOGGER.info(
+            "%s: %d hits / %d misses (hit rate %.1f%%), %d entries, %.1f MB",
+            label,
+            stats["hits"],
+            stats["misses"],
+            stats["hit_rate"] * 100,
+            stats["entries"],
+            stats["bytes"] / 1_048_576,
+        )
+
+
+# Generations are stored as newline-separated JSON documents; dumps() never emits raw newlines.
+def _join(values: Sequence[str]) -> str:
+    return "\n".join(values)
+
+
+def _split(value: str) -> Sequence[str]:
+    return value.split("\n")
+
+
+def forget_generation(chat: BaseChatModel, messages: List[BaseMessage], stop: Optional[List[str]] = None) -> bool:
+    """Drop ``chat``'s cached reply to ``messages``, keyed exactly as LangChain looked it up."""
+    if not isinstance(chat.cache, SQLiteLLMCache):
+        return False
+    return chat.cache.forget(dumps(messages), chat._get_llm_string(stop=stop))
+
+
+_CACHES: Dict[Path, SQLiteLLMCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def open_llm_cache(path: Path, max_mb: int = 256) -> SQLiteLLMCache:
+    """One cache object per file per process, shared by every chat model that uses it."""
+    resolved = Path(path).resolve()
+    with _CACHES_LOCK:
+        if resolved not in _CACHES:
+            _CACHES[resolved] = SQLiteLLMCache(resolved, max_mb * 1024 * 1024)
+        return _CACHES[resolved]
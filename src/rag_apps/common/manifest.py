@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .instrumentation import REGISTRY, span
+from .logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+STALE_STORE_POLICIES = ("error", "warn", "ignore")
+OUTLIER_LIMIT = 10
+
+
+class StaleVectorStoreError(RuntimeError):
+    """The vector store on disk was not built from the current config, corpus or chunk cache."""
+
+    def __init__(self, store: Path, problems: Sequence[str]):
+        super().__init__(f"Vector store at {store} is stale: " + "; ".join(problems))
+        self.store = store
+        self.problems = list(problems)
+
+
+def config_hash(config: Any, fields: Sequence[str], **extra: Any) -> str:
+    """Hash of the config fields (plus ``extra``, e.g. the embedding model) that shape the stored vectors."""
+    payload = {name: getattr(config, name) for name in fields}
+    payload.update(extra)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def source_fingerprint(files: Iterable[Path], root: Path, limit: Optional[int] = None) -> str:
+    """Hash of relative path and size of every source file, cheap enough to recompute at load time.
+
+    Modification times are left out so a copied dataset still matches.
+    """
+    digest = hashlib.sha256(f"limit={limit}\n".encode("utf-8"))
+    for path in files:
+        try:
+            relative = path.relative_to(root)
+        except ValueError:
+            relative = Path(path.name)
+        digest.update(f"{relative.as_posix()}\x00{path.stat().st_size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def file_digest(path: Path) -> Optional[dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def _same_file(path: Path, recorded: dict) -> bool:
+    """Size and mtime first; only re-hash a file that was touched."""
+    path = Path(path)
+    if not path.exists():
+        return False
+    stat = path.stat()
+    if stat.st_size != recorded["size"]:
+        return False
+    if stat.st_mtime_ns == recorded["mtime_ns"]:
+        return True
+    current = file_digest(path)
+    return current is not None and current["sha256"] == recorded["sha256"]
+
+
+def _embedding_usage() -> Dict[str, Dict[str, float]]:
+    """Embedding calls, errors and key rotations per key so far in this process."""
+    usage: Dict[str, Dict[str, float]] = {}
+    for row in REGISTRY.counter("gemini_calls_total").snapshot():
+        labels = row["labels"]
+        if labels.get("kind") == "embedding":
+            entry = usage.setdefault(labels.get("key", "?"), {"calls": 0.0, "errors": 0.0, "retries": 0.0})
+            entry["calls"] += row["value"]
+            if labels.get("outcome") == "error":
+                entry["errors"] += row["value"]
+    for row in REGISTRY.counter("gemini_key_retries_total").snapshot():
+        labels = row["labels"]
+        if labels.get("kind") == "embedding":
+            entry = usage.setdefault(labels.get("key", "?"), {"calls": 0.0, "errors": 0.0, "retries": 0.0})
+            entry["retries"] += row["value"]
+    return usage
+
+
+def _embedding_seconds() -> float:
+    return sum(
+        row["sum"]
+        for row in REGISTRY.stage_seconds.snapshot()
+        if str(row["labels"].get("stage", "")).startswith("embedding.")
+    )
+
+
+@dataclass
+class BuildManifest:
+    """What one ingest/build produced and how long each stage took.
+
+    Chunking writes one for the chunk cache; the store build writes another that
+    carries those stages over and adds embedding. The apps compare the store
+    build's manifest with the current config, corpus and chunk cache at load
+    time (:func:`verify_build`).
+    """
+
+    app: str
+    config_hash: str = ""
+    chunking_strategy: str = ""
+    corpus_fingerprint: str = ""
+    content_fingerprint: str = ""
+    limit: Optional[int] = None
+    embedding_model: str = ""
+    chunk_cache: Optional[dict] = None
+    vectors: Optional[int] = None
+    stages: Dict[str, dict] = field(default_factory=dict)
+    extraction: dict = field(default_factory=dict)
+    embedding_usage: Dict[str, dict] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+    created_at: str = ""
+    version: int = MANIFEST_VERSION
+    _files: List[dict] = field(default_factory=list, repr=False)
+    _content: Any = field(default_factory=hashlib.sha256, repr=False)
+    _documents: int = field(default=0, repr=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, float]]:
+        """Time a build stage; counts the caller puts in the yielded dict also get a per-second rate."""
+        counts: Dict[str, float] = {}
+        embed_before = _embedding_seconds()
+        started = time.perf_counter()
+        with span(f"build.{name}", app=self.app):
+            yield counts
+        seconds = time.perf_counter() - started
+        entry: Dict[str, Any] = {"seconds": round(seconds, 3)}
+        for key, value in counts.items():
+            entry[key] = value
+            entry[f"{key}_per_second"] = round(value / seconds, 2) if seconds > 0 else None
+        embedding = _embedding_seconds() - embed_before
+        if embedding > 0:
+            entry["embedding_seconds"] = round(embedding, 3)
+        self.stages[name] = entry
+        LOGGER.info(
+            "Build stage %s took %.2fs%s",
+            name,
+            seconds,
+            "".join(f", {key}={value:g}" for key, value in counts.items()),
+        )
+
+    def record_file(self, source: str, seconds: float, size: int) -> None:
+        """Extraction time and size of one source file, for the outlier report."""
+        self._files.append({"source": source, "seconds": seconds, "bytes": size})
+
+    def add_content(self, source: str, text: str) -> None:
+        """Fold one extracted document into the content fingerprint."""
+        self._content.update(f"{source}\x00{len(text)}\x00".encode("utf-8"))
+        self._content.update(text.encode("utf-8", "ignore"))
+        self._documents += 1
+
+    def _summarize_extraction(self) -> None:
+        if self._documents:
+            self.content_fingerprint = self._content.hexdigest()
+        if not self._files:
+            return
+        times = sorted(item["seconds"] for item in self._files)
+        median = statistics.median(times)
+        p95 = times[min(int(0.95 * len(times)), len(times) - 1)]
+        threshold = max(p95, 3 * median)
+        slowest = sorted(self._files, key=lambda item: item["seconds"], reverse=True)
+        self.extraction = {
+            "files": len(self._files),
+            "bytes": sum(item["bytes"] for item in self._files),
+            "median_seconds": round(median, 4),
+            "p95_seconds": round(p95, 4),
+            "max_seconds": round(times[-1], 4),
+            "outliers": [
+                {**item, "seconds": round(item["seconds"], 4)}
+                for item in slowest[:OUTLIER_LIMIT]
+                if item["seconds"] >= threshold and item["seconds"] > median
+            ],
+        }
+
+    def capture_embedding_usage(self, before: Dict[str, Dict[str, float]]) -> None:
+        after = _embedding_usage()
+        self.embedding_usage = {
+            key: {name: value - before.get(key, {}).get(name, 0.0) for name, value in counts.items()}
+            for key, counts in after.items()
+            if counts["calls"] - before.get(key, {}).get("calls", 0.0) > 0
+        }
+
+    @staticmethod
+    def usage_snapshot() -> Dict[str, Dict[str, float]]:
+        return _embedding_usage()
+
+    def to_dict(self) -> dict:
+        self._summarize_extraction()
+        return {name: getattr(self, name) for name in self.__dataclass_fields__ if not name.startswith("_")}
+
+    def write(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        tmp_path.replace(path)
+        LOGGER.info("Wrote build manifest to %s", path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BuildManifest"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Ignoring unreadable build manifest %s: %s", path, exc)
+            return None
+        known = {name for name in cls.__dataclass_fields__ if not name.startswith("_")}
+        return cls(**{key: value for key, value in payload.items() if key in known})
+
+    def continue_from(self, previous: Optional["BuildManifest"], chunk_cache: Path) -> bool:
+        """Carry over the chunking stages (and config hash) when the chunk cache is still the one ``previous`` wrote."""
+        if previous is None or previous.chunk_cache is None or not _same_file(chunk_cache, previous.chunk_cache):
+            return False
+        self.config_hash = previous.config_hash
+        self.chunking_strategy = previous.chunking_strategy
+        self.corpus_fingerprint = previous.corpus_fingerprint
+        self.content_fingerprint = previous.content_fingerprint
+        self.limit = previous.limit
+        self.chunk_cache = previous.chunk_cache
+        self.extraction = previous.extraction
+        self.stages = {**previous.stages, **self.stages}
+        return True
+
+
+def verify_build(
+    manifest_path: Path,
+    expected_config_hash: Callable[[Optional[str]], str],
+    store: Any,
+    store_path: Path,
+    chunk_cache: Optional[Path] = None,
+    corpus: Optional[Callable[[Optional[int]], Optional[str]]] = None,
+    embedding_model: Optional[str] = None,
+    policy: str = "error",
+) -> List[str]:
+    """Compare the build manifest with what the app is about to serve.
+
+    Problems are raised as :class:`StaleVectorStoreError` (``policy="error"``),
+    logged (``"warn"``) or skipped (``"ignore"``). A store without a manifest
+    predates manifests and is only warned about. ``corpus`` recomputes the
+    source fingerprint for the manifest's ``limit``, or returns ``None`` when
+    the dataset is not present on this machine; a missing chunk cache is
+    likewise skipped, so a deployment can ship only the store and manifest.
+    ``expected_config_hash`` gets the chunking strategy the store was built
+    with (``None`` for older manifests): that is a build choice, so the app
+    does not need to be started with the same one.
+    """
+    if policy == "ignore":
+        return []
+    manifest = BuildManifest.load(manifest_path)
+    if manifest is None:
+        LOGGER.warning("No build manifest at %s; cannot verify %s is current", manifest_path, store_path)
+        return []
+    problems: List[str] = []
+    if manifest.config_hash and manifest.config_hash != expected_config_hash(manifest.chunking_strategy or None):
+        problems.append("chunking/embedding config changed since the build")
+    if embedding_model and manifest.embedding_model and manifest.embedding_model != embedding_model:
+        problems.append(f"store was embedded with {manifest.embedding_model}, app uses {embedding_model}")
+    if manifest.vectors is not None:
+        from .vectorstores import count_vectors
+
+        actual = count_vectors(store)
+        if actual != manifest.vectors:
+            problems.append(f"store holds {actual} vectors but the build wrote {manifest.vectors}")
+    if (
+        chunk_cache is not None
+        and manifest.chunk_cache is not None
+        and Path(chunk_cache).exists()
+        and not _same_file(chunk_cache, manifest.chunk_cache)
+    ):
+        problems.append(f"chunk cache {chunk_cache} was rewritten after the build")
+    if corpus is not None and manifest.corpus_fingerprint:
+        current = corpus(manifest.limit)
+        if current is not None and current != manifest.corpus_fingerprint:
+            problems.append("source corpus changed since the build")
+    if problems:
+        if policy == "error":
+            raise StaleVectorStoreError(store_path, problems)
+        LOGGER.warning("Vector store at %s may be stale: %s", store_path, "; ".join(problems))
+    return problems
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from langchain.schema import Document
+
+from .chunking import load_chunk_cache
+from .logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class ChunkNeighbourIndex:
+    """Looks up chunk i±n of the same source document from the local chunk store.
+
+    Chunks must carry the ``doc_id``/``chunk_index`` metadata written by
+    :func:`rag_apps.common.chunking.chunk_documents`; older caches without it
+    simply produce an empty index and expansion becomes a no-op.
+    """
+
+    def __init__(self, chunks: Iterable[Document]):
+        self._chunks: Dict[str, Dict[int, Document]] = {}
+        for chunk in chunks:
+            key = _chunk_key(chunk)
+            if key is None:
+                continue
+            doc_id, chunk_index = key
+            self._chunks.setdefault(doc_id, {})[chunk_index] = chunk
+        LOGGER.debug("Indexed neighbours for %d source documents", len(self._chunks))
+
+    @classmethod
+    def from_cache(cls, cache_path: Path) -> "ChunkNeighbourIndex":
+        index = cls(load_chunk_cache(cache_path))
+        if not index:
+            LOGGER.warning("Chunk cache %s has no doc_id/chunk_index metadata; rebuild it to enable expansion", cache_path)
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(chunks) for chunks in self._chunks.values())
+
+    def neighbours(self, doc_id: str, chunk_index: int, window: int) -> List[Document]:
+        chunks = self._chunks.get(doc_id, {})
+        return [chunks[i] for i in range(chunk_index - window, chunk_index + window + 1) if i in chunks]
+
+    def expand(self, hits: Sequence[Document], window: int = 1, dedupe: bool = True) -> List[Document]:
+        """Replace each hit with the contiguous window of chunks around it.
+
+        With ``dedupe`` enabled, overlapping or touching windows from the same
+        document are merged into one passage ranked at its best hit.
+        """
+        if window <= 0 or not self._chunks:
+            return list(hits)
+
+        ranges: List[Tuple[str, int, int, int]] = []
+        passthrough: List[Tuple[int, Document]] = []
+        for rank, hit in enumerate(hits):
+            key = _chunk_key(hit)
+            if key is None or key[0] not in self._chunks:
+                passthrough.append((rank, hit))
+                continue
+            doc_id, chunk_index = key
+            available = self._chunks[doc_id]
+            low = max(chunk_index - window, min(available))
+            high = min(chunk_index + window, max(available))
+            ranges.append((doc_id, low, high, rank))
+
+        if dedupe:
+            ranges = _merge_ranges(ranges)
+
+        windows: List[Tuple[int, Document]] = [
+            (rank, self._stitch(doc_id, low, high, _count_hits(hits, doc_id, low, high)))
+            for doc_id, low, high, rank in ranges
+        ]
+        seen_text = set()
+        expanded: List[Document] = []
+        for _, doc in sorted(windows + passthrough, key=lambda item: item[0]):
+            if dedupe and doc.page_content in seen_text:
+                continue
+            seen_text.add(doc.page_content)
+            expanded.append(doc)
+        return expanded
+
+    def _stitch(self, doc_id: str, low: int, high: int, hit_count: int) -> Document:
+        chunks = self._chunks[doc_id]
+        ordered = [chunks[i] for i in range(low, high + 1) if i in chunks]
+        text = ordered[0].page_content
+        end = _chunk_end(ordered[0])
+        for chunk in ordered[1:]:
+            start = chunk.metadata.get("start_index")
+            if end is not None and isinstance(start, int) and start < end:
+                text += chunk.page_content[end - start:]
+            else:
+                text += "\n" + chunk.page_content
+            end = _chunk_end(chunk)
+        metadata = dict(ordered[0].metadata)
+        metadata.update({"window_start": low, "window_end": high, "hit_count": hit_count})
+        return Document(page_content=text, metadata=metadata)
+
+
+def _chunk_key(doc: Document) -> Tuple[str, int] | None:
+    doc_id = doc.metadata.get("doc_id")
+    chunk_index = doc.metadata.get("chunk_index")
+    if doc_id is None or chunk_index is None:
+        return None
+    return str(doc_id), int(chunk_index)
+
+
+def _chunk_end(doc: Document) -> int | None:
+    start = doc.metadata.get("start_index")
+    if not isinstance(start, int) or start < 0:
+        return None
+    return start + len(doc.page_content)
+
+
+def _merge_ranges(ranges: List[Tuple[str, int, int, int]]) -> List[Tuple[str, int, int, int]]:
+    merged: List[Tuple[str, int, int, int]] = []
+    for doc_id, low, high, rank in sorted(ranges, key=lambda r: (r[0], r[1])):
+        if merged and merged[-1][0] == doc_id and low <= merged[-1][2] + 1:
+            prev = merged[-1]
+            merged[-1] = (doc_id, prev[1], max(prev[2], high), min(prev[3], rank))
+        else:
+            merged.append((doc_id, low, high, rank))
+    return merged
+
+
+def _count_hits(hits: Sequence[Document], doc_id: str, low: int, high: int) -> int:
+    count = 0
+    for hit in hits:
+        key = _chunk_key(hit)
+        if key and key[0] == doc_id and low <= key[1] <= high:
+            count += 1
+    return count
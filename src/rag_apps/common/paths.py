@@ -6,21 +6,31 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 DATA_DIR = PROJECT_ROOT / "datasets"
 ARTIFACTS_DIR = PROJECT_ROOT / "artifacts"
-ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
 
 MEDICAL_DATASET = DATA_DIR / "MedicalTranscriptions" / "mtsamples.csv"
 CUAD_DIR = DATA_DIR / "CUAD_v1"
 CUAD_PDF_DIR = CUAD_DIR / "full_contract_pdf"
 CUAD_TXT_DIR = CUAD_DIR / "full_contract_txt"
+CUAD_MASTER_CLAUSES = CUAD_DIR / "master_clauses.csv"
 
 MEDICAL_VECTOR_DIR = ARTIFACTS_DIR / "medical_chroma"
 COMPLIANCE_VECTOR_DIR = ARTIFACTS_DIR / "compliance_chroma"
+MEDICAL_INDEX_DIR = ARTIFACTS_DIR / "medical_index"
+COMPLIANCE_INDEX_DIR = ARTIFACTS_DIR / "compliance_index"
 
 MEDICAL_CHUNK_CACHE = ARTIFACTS_DIR / "medical_chunks.jsonl"
 COMPLIANCE_CHUNK_CACHE = ARTIFACTS_DIR / "compliance_chunks.jsonl"
+MEDICAL_CHUNK_MANIFEST = ARTIFACTS_DIR / "medical_chunks_manifest.json"
+COMPLIANCE_CHUNK_MANIFEST = ARTIFACTS_DIR / "compliance_chunks_manifest.json"
+MEDICAL_BUILD_MANIFEST = ARTIFACTS_DIR / "medical_build_manifest.json"
+COMPLIANCE_BUILD_MANIFEST = ARTIFACTS_DIR / "compliance_build_manifest.json"
+RULE_EMBEDDING_CACHE = ARTIFACTS_DIR / "compliance_rule_embeddings.json"
+LLM_CACHE_FILE = ARTIFACTS_DIR / "llm_cache.sqlite"
+VERDICT_CACHE_FILE = ARTIFACTS_DIR / "compliance_verdicts.sqlite"
+QUERY_EMBEDDING_CACHE = ARTIFACTS_DIR / "eval_query_embeddings.json"
 
 EVAL_OUTPUT_DIR = ARTIFACTS_DIR / "evaluation"
-EVAL_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+BENCH_OUTPUT_DIR = ARTIFACTS_DIR / "bench"
 
 RULES_FILE = PROJECT_ROOT / "src" / "rag_apps" / "assets" / "compliance_rules.json"
 MEDICAL_QUERY_FILE = PROJECT_ROOT / "src" / "rag_apps" / "assets" / "medical_eval_queries.json"
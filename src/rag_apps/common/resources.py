@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from .instrumentation import counter, histogram
+from .key_manager import GeminiKeyManager
+from .llm import RotatingGeminiChat, RotatingGeminiEmbeddings
+from .logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+SLOT_WAIT = histogram("resource_slot_wait_seconds", "Time Gemini calls queued for a slot, by app")
+CLIENTS_BUILT = counter("gemini_clients_built_total", "Gemini clients created by the shared pool, by kind")
+INDEX_LOADS = counter("vector_index_loads_total", "Vector stores loaded by the shared registry, by outcome")
+
+
+class FairScheduler:
+    """Shares ``capacity`` concurrent Gemini calls between apps.
+
+    Each app may hold at most its quota of slots. A freed slot goes to the
+    waiting app with the fewest calls in flight (oldest request first on a
+    tie), so a burst of compliance calls queues behind its own quota instead
+    of in front of medical questions.
+    """
+
+    def __init__(self, capacity: int, quotas: Optional[Dict[str, int]] = None):
+        self.capacity = max(capacity, 1)
+        self.quotas = dict(quotas or {})
+        self._cond = threading.Condition()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._waiting: Dict[str, Deque[list]] = defaultdict(deque)
+        self._sequence = itertools.count()
+        self._total = 0
+
+    def quota(self, app: str) -> int:
+        return max(min(self.quotas.get(app, self.capacity), self.capacity), 1)
+
+    def _grant(self) -> None:
+        while self._total < self.capacity:
+            eligible = [app for app, queue in self._waiting.items() if queue and self._running[app] < self.quota(app)]
+            if not eligible:
+                return
+            app = min(eligible, key=lambda name: (self._running[name], self._waiting[name][0][0]))
+            ticket = self._waiting[app].popleft()
+            ticket[1] = True
+            self._running[app] += 1
+            self._total += 1
+
+    def _release(self, app: str) -> None:
+        self._running[app] -= 1
+        self._total -= 1
+        self._grant()
+        self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, app: str) -> Iterator[None]:
+        queued = time.perf_counter()
+        with self._cond:
+            ticket = [next(self._sequence), False]
+            self._waiting[app].append(ticket)
+            self._grant()
+            self._cond.notify_all()
+            try:
+                while not ticket[1]:
+                    self._cond.wait()
+            except BaseException:
+                if ticket[1]:
+                    self._release(app)
+                else:
+                    self._waiting[app].remove(ticket)
+                raise
+        SLOT_WAIT.observe(time.perf_counter() - queued, app=app)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release(app)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            apps = sorted(set(self._running) | set(self._waiting) | set(self.quotas))
+            return {
+                "capacity": self.capacity,
+                "in_flight": self._total,
+                "apps": {
+                    app: {"quota": self.quota(app), "running": self._running[app], "waiting": len(self._waiting[app])}
+                    for app in apps
+                },
+            }
+
+
+class ClientPool:
+    """One Gemini client per (kind, model, key, kwargs), built on first use and shared by every caller."""
+
+    def __init__(self) -> None:
+        self._clients: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+                CLIENTS_BUILT.inc(kind=key[0])
+            return client
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+def share_quotas(apps: Iterable[str], capacity: int, share: float) -> Dict[str, int]:
+    """Cap every app at ``share`` of the slots when more than one app shares them."""
+    apps = list(apps)
+    if len(apps) < 2:
+        return {app: capacity for app in apps}
+    quota = min(max(int(capacity * share), 1), capacity)
+    return {app: quota for app in apps}
+
+
+class ResourceRegistry:
+    """Gemini keys, clients, models and loaded vector stores shared by every app in the process.
+
+    Both apps rotate through one :class:`GeminiKeyManager` and one
+    :class:`ClientPool`. Models and stores are built once per settings and
+    handed out again to later callers. With a ``capacity`` (the server sets
+    one through :func:`configure_resources`) their Gemini calls also go
+    through one :class:`FairScheduler`; without one, as for the CLIs, calls
+    are not capped here and the caller's own worker count applies.
+    """
+
+    def __init__(
+        self,
+        key_manager: Optional[GeminiKeyManager] = None,
+        capacity: int = 0,
+        quotas: Optional[Dict[str, int]] = None,
+    ):
+        self._key_manager = key_manager
+        self._capacity = capacity
+        self._quotas = dict(quotas or {})
+        self.clients = ClientPool()
+        self._scheduler: Optional[FairScheduler] = None
+        self._chats: Dict[tuple, RotatingGeminiChat] = {}
+        self._embeddings: Dict[tuple, Embeddings] = {}
+        self._indexes: Dict[tuple, Any] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def key_manager(self) -> GeminiKeyManager:
+        with self._lock:
+            if self._key_manager is None:
+                self._key_manager = GeminiKeyManager.from_defaults()
+            return self._key_manager
+
+    @property
+    def scheduler(self) -> Optional[FairScheduler]:
+        with self._lock:
+            if self._scheduler is None and self._capacity > 0:
+                self._scheduler = FairScheduler(self._capacity, self._quotas)
+                LOGGER.info("Sharing %d concurrent Gemini calls between apps (quotas: %s)", self._scheduler.capacity, self._quotas or "none")
+            return self._scheduler
+
+    def chat(self, app: str, model_name: str = "gemini-1.5-pro", cache: Any = None, **client_kwargs: Any) -> RotatingGeminiChat:
+        key = (app, model_name, id(cache) if cache is not None else None, repr(sorted(client_kwargs.items())))
+        with self._lock:
+            if key not in self._chats:
+                chat = RotatingGeminiChat(
+                    self.key_manager,
+                    model_name,
+                    client_pool=self.clients,
+                    scheduler=self.scheduler,
+                    tenant=app,
+                    **client_kwargs,
+                )
+                if cache is not None:
+                    chat.cache = cache
+                self._chats[key] = chat
+            return self._chats[key]
+
+    def embeddings(self, app: str, model_name: str = "models/embedding-001", **client_kwargs: Any) -> RotatingGeminiEmbeddings:
+        key = (app, model_name, repr(sorted(client_kwargs.items())))
+        with self._lock:
+            if key not in self._embeddings:
+                self._embeddings[key] = RotatingGeminiEmbeddings(
+                    self.key_manager,
+                    model_name,
+                    client_pool=self.clients,
+                    scheduler=self.scheduler,
+                    tenant=app,
+                    **client_kwargs,
+                )
+            return self._embeddings[key]
+
+    def batcher(self, app: str, embeddings: Embeddings, max_batch_size: int, max_wait_ms: float) -> Embeddings:
+        """One query micro-batcher per app and window, so its thread and executor are not duplicated."""
+        from .batching import EmbeddingMicroBatcher
+
+        key = (app, id(embeddings), max_batch_size, max_wait_ms)
+        with self._lock:
+            if key not in self._embeddings:
+                self._embeddings[key] = EmbeddingMicroBatcher(embeddings, max_batch_size, max_wait_ms)
+            return self._embeddings[key]
+
+    def vector_index(
+        self,
+        embeddings: Embeddings,
+        persist_directory: Path,
+        index_directory: Path,
+        backend: str = "chroma",
+        layout: Any = None,
+        rescore_factor: int = 4,
+    ) -> Any:
+        """:func:`load_vector_index`, loaded once per store and settings.
+
+        A Chroma store embeds queries with the embeddings it was loaded with,
+        so those are part of its key; the memmap index is shared regardless.
+        """
+        from .vectorstores import load_vector_index
+
+        key = (
+            backend,
+            Path(persist_directory).resolve(),
+            Path(index_directory).resolve(),
+            repr(layout),
+            rescore_factor,
+            id(embeddings) if backend == "chroma" else None,
+        )
+        with self._lock:
+            if key in self._indexes:
+                INDEX_LOADS.inc(outcome="shared")
+                return self._indexes[key]
+            store = load_vector_index(embeddings, persist_directory, index_directory, backend, layout, rescore_factor)
+            INDEX_LOADS.inc(outcome="loaded")
+            self._indexes[key] = store
+            return store
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self.clients),
+                "chat_models": len(self._chats),
+                "embeddings": len(self._embeddings),
+                "indexes": len(self._indexes),
+                "scheduler": self._scheduler.snapshot() if self._scheduler is not None else None,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for embeddings in self._embeddings.values():
+                close = getattr(embeddings, "close", None)
+                if close is not None:
+                    close()
+
+
+_SHARED: Optional[ResourceRegistry] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_resources() -> ResourceRegistry:
+    """The process-wide registry, created with default settings on first use."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is None:
+            _SHARED = ResourceRegistry()
+        return _SHARED
+
+
+def configure_resources(**kwargs: Any) -> ResourceRegistry:
+    """Replace the process-wide registry (e.g. with serving capacity and quotas) before any app is built."""
+    global _SHARED
+    with _SHARED_LOCK:
+        if _SHARED is not None:
+            _SHARED.close()
+        _SHARED = ResourceRegistry(**kwargs)
+        return _SHARED
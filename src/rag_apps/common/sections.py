@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Pattern, Sequence, Tuple
+
+from .splitter import DEFAULT_SEPARATORS, OffsetTextSplitter, Span
+
+
+# "ARTICLE IV", "Section 12." or a numbered clause such as "7. TERMINATION" / "7. Termination." at line start.
+CONTRACT_HEADING = re.compile(
+    r"^[ \t]*(?P<title>(?:ARTICLE|Article|SECTION|Section)[ \t]+(?:\d{1,3}|[IVXLC]{1,6})\b[^\n]{0,80}"
+    r"|\d{1,2}\.[ \t]+[A-Z][A-Za-z,;&/' -]{2,60}?(?=\.[ \t]|\.?[ \t]*$))",
+    re.MULTILINE,
+)
+# mtsamples-style "HISTORY OF PRESENT ILLNESS:" headings, which may also appear mid-line after a sentence.
+TRANSCRIPT_HEADING = re.compile(r"(?:^|(?<=[\s,.]))(?P<title>[A-Z][A-Z /&()'-]{3,60}):")
+
+SECTION_PATTERNS: Dict[str, Pattern[str]] = {
+    "contract": CONTRACT_HEADING,
+    "transcript": TRANSCRIPT_HEADING,
+}
+
+
+@dataclass(slots=True)
+class Section:
+    title: str
+    start: int
+    end: int
+
+
+def find_sections(text: str, pattern: Pattern[str]) -> List[Section]:
+    """Partition ``text`` at heading matches; text before the first heading is an untitled section."""
+    starts = [(match.start("title"), match.group("title").strip()) for match in pattern.finditer(text)]
+    if not starts or starts[0][0] > 0:
+        starts.insert(0, (0, ""))
+    sections = []
+    for index, (start, title) in enumerate(starts):
+        end = starts[index + 1][0] if index + 1 < len(starts) else len(text)
+        if end > start:
+            sections.append(Section(title=title, start=start, end=end))
+    return sections
+
+
+class SectionAwareSplitter(OffsetTextSplitter):
+    """Splits inside section boundaries so no chunk straddles two clauses or headings.
+
+    Consecutive short sections are packed together up to ``chunk_size``; a
+    section longer than that is split on its own with the recursive separator
+    hierarchy (overlap applies within, never across, sections).
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1200,
+        chunk_overlap: int = 200,
+        pattern: Pattern[str] = TRANSCRIPT_HEADING,
+        separators: Sequence[str] = DEFAULT_SEPARATORS,
+    ):
+        super().__init__(chunk_size, chunk_overlap, separators)
+        self.pattern = pattern
+
+    def split_spans(self, text: str) -> List[Span]:
+        spans: List[Span] = []
+        for start, end in self._groups(find_sections(text, self.pattern)):
+            spans.extend(self._split(text, start, end, self.separators))
+        return spans
+
+    def _groups(self, sections: List[Section]) -> List[Span]:
+        groups: List[Span] = []
+        for section in sections:
+            if groups and section.end - groups[-1][0] <= self.chunk_size:
+                groups[-1] = (groups[-1][0], section.end)
+            else:
+                groups.append((section.start, section.end))
+        return groups
+
+
+class SectionIndex:
+    """Maps chunk offsets back to the titles of the sections they cover."""
+
+    def __init__(self, text: str, pattern: Pattern[str]):
+        sections = find_sections(text, pattern)
+        self._starts = [section.start for section in sections]
+        self._sections = sections
+
+    def lookup(self, start: int, end: int) -> Tuple[int, List[str]]:
+        first = max(bisect.bisect_right(self._starts, start) - 1, 0)
+        last = max(bisect.bisect_left(self._starts, end) - 1, first)
+        titles = [section.title for section in self._sections[first:last + 1] if section.title]
+        return first, titles
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, List, Sequence, Tuple
+
+Span = Tuple[int, int]
+
+DEFAULT_SEPARATORS: Tuple[str, ...] = ("\n\n", "\n", ". ", "? ", "! ", " ")
+
+
+class OffsetTextSplitter:
+    """Recursive separator splitter that works on ``(start, end)`` offsets into the source text.
+
+    It reproduces ``RecursiveCharacterTextSplitter(keep_separator=True,
+    strip_whitespace=True)`` with ``len`` as the length function: pieces keep
+    their leading separator, so every merged chunk is a contiguous slice of the
+    original text and no substring is materialised until the caller emits it.
+    """
+
+    def __init__(self, chunk_size: int = 1200, chunk_overlap: int = 200, separators: Sequence[str] = DEFAULT_SEPARATORS):
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"Chunk overlap ({chunk_overlap}) is larger than chunk size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(separators)
+
+    def split_spans(self, text: str) -> List[Span]:
+        return self._split(text, 0, len(text), self.separators)
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[start:end] for start, end in self.split_spans(text)]
+
+    def _split(self, text: str, start: int, end: int, separators: Sequence[str]) -> List[Span]:
+        separator = separators[-1]
+        remaining: Sequence[str] = ()
+        for index, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if text.find(candidate, start, end) != -1:
+                separator = candidate
+                remaining = separators[index + 1:]
+                break
+
+        chunks: List[Span] = []
+        good: List[Span] = []
+        for piece in _pieces(text, start, end, separator):
+            if piece[1] - piece[0] < self.chunk_size:
+                good.append(piece)
+                continue
+            if good:
+                chunks.extend(self._merge(text, good))
+                good = []
+            if remaining:
+                chunks.extend(self._split(text, piece[0], piece[1], remaining))
+            else:
+                chunks.append(piece)
+        if good:
+            chunks.extend(self._merge(text, good))
+        return chunks
+
+    def _merge(self, text: str, pieces: List[Span]) -> List[Span]:
+        merged: List[Span] = []
+        window: Deque[Span] = deque()
+        total = 0
+        for piece in pieces:
+            length = piece[1] - piece[0]
+            if total + length > self.chunk_size and window:
+                span = _strip(text, window[0][0], window[-1][1])
+                if span is not None:
+                    merged.append(span)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    head = window.popleft()
+                    total -= head[1] - head[0]
+            window.append(piece)
+            total += length
+        if window:
+            span = _strip(text, window[0][0], window[-1][1])
+            if span is not None:
+                merged.append(span)
+        return merged
+
+
+def _pieces(text: str, start: int, end: int, separator: str) -> List[Span]:
+    """Offsets equivalent to ``re.split`` with the separator re-attached to the following piece."""
+    if separator == "":
+        return [(i, i + 1) for i in range(start, end)]
+    pieces: List[Span] = []
+    width = len(separator)
+    cursor = start
+    hit = text.find(separator, start, end)
+    while hit != -1:
+        if hit > cursor:
+            pieces.append((cursor, hit))
+        cursor = hit
+        hit = text.find(separator, hit + width, end)
+    if cursor < end:
+        pieces.append((cursor, end))
+    return pieces
+
+
+def _strip(text: str, start: int, end: int) -> Span | None:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if end > start else None
+
+
+_WORKER_SPLITTER: OffsetTextSplitter | None = None
+
+
+def _init_worker(splitter: OffsetTextSplitter) -> None:
+    global _WORKER_SPLITTER
+    _WORKER_SPLITTER = splitter
+
+
+def _worker_split(text: str) -> List[Span]:
+    return _WORKER_SPLITTER.split_spans(text)
+
+
+def split_many(splitter: OffsetTextSplitter, texts: Sequence[str], workers: int = 1) -> List[List[Span]]:
+    """Span lists for many texts, fanned out over a process pool when ``workers > 1``.
+
+    Only offsets travel back from the workers; slicing stays in the caller.
+    """
+    if workers <= 1 or len(texts) < 2 * workers:
+        return [splitter.split_spans(text) for text in texts]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(splitter,),
+    ) as pool:
+        return list(pool.map(_worker_split, texts, chunksize=max(len(texts) // (workers * 4), 1)))
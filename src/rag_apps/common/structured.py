@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence
+
+from .instrumentation import counter
+
+
+STRUCTURED_FAILURES = counter(
+    "structured_output_failures_total",
+    "Model replies that failed JSON extraction or schema validation, by schema and stage",
+)
+
+FENCE_PATTERN = re.compile(r"```[a-zA-Z0-9_-]*[ \t]*\n?(.*?)```", re.DOTALL)
+_DECODER = json.JSONDecoder()
+
+
+class StructuredOutputError(ValueError):
+    """A model reply that could not be turned into the expected object."""
+
+    def __init__(self, stage: str, problems: Sequence[str]):
+        super().__init__("; ".join(problems))
+        self.stage = stage
+        self.problems = list(problems)
+
+
+def extract_json_object(text: str) -> Dict[str, Any]:
+    """First JSON object in ``text``, tolerating markdown fences and surrounding prose."""
+    candidates = [text.strip()]
+    candidates.extend(match.group(1).strip() for match in FENCE_PATTERN.finditer(text))
+    for candidate in candidates:
+        if candidate.startswith("{"):
+            try:
+                payload = json.loads(candidate)
+            except json.JSONDecodeError:
+                pass
+            else:
+                if isinstance(payload, dict):
+                    return payload
+    start = text.find("{")
+    while start != -1:
+        try:
+            payload, _ = _DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            payload = None
+        if isinstance(payload, dict):
+            return payload
+        start = text.find("{", start + 1)
+    raise StructuredOutputError("extract", ["no JSON object found in the reply"])
+
+
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """One expected key; ``coerce`` normalises the value or raises ``ValueError`` with a short reason."""
+
+    name: str
+    coerce: Callable[[Any], Any]
+    required: bool = True
+    default: Any = None
+
+
+def validate(payload: Dict[str, Any], fields: Sequence[FieldSpec]) -> Dict[str, Any]:
+    """Coerce ``payload`` to exactly ``fields``; every problem is reported at once."""
+    lowered = {str(key).strip().lower(): value for key, value in payload.items()}
+    result: Dict[str, Any] = {}
+    problems: List[str] = []
+    for field in fields:
+        if field.name.lower() not in lowered or lowered[field.name.lower()] is None:
+            if field.required:
+                problems.append(f"missing '{field.name}'")
+            else:
+                result[field.name] = field.coerce(field.default) if field.default is not None else None
+            continue
+        try:
+            result[field.name] = field.coerce(lowered[field.name.lower()])
+        except ValueError as exc:
+            problems.append(f"'{field.name}' {exc}")
+    if problems:
+        raise StructuredOutputError("validate", problems)
+    return result
+
+
+def parse_structured(text: str, fields: Sequence[FieldSpec], schema: str) -> Dict[str, Any]:
+    """Extract and validate in one step, counting failures under ``schema``."""
+    try:
+        return validate(extract_json_object(text), fields)
+    except StructuredOutputError as exc:
+        STRUCTURED_FAILURES.inc(schema=schema, stage=exc.stage)
+        raise
+
+
+def _squash(value: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", value.lower())
+
+
+def one_of(*choices: str) -> Callable[[Any], str]:
+    """Case/punctuation-insensitive enum, so "non compliant" or "NOT_FOUND" map to the canonical spelling."""
+    canonical = {_squash(choice): choice for choice in choices}
+
+    def coerce(value: Any) -> str:
+        if isinstance(value, str) and _squash(value) in canonical:
+            return canonical[_squash(value)]
+        raise ValueError(f"must be one of {', '.join(choices)} (got {value!r})")
+
+    return coerce
+
+
+def as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return " ".join(item.strip() for item in value)
+    raise ValueError(f"must be a string (got {type(value).__name__})")
+
+
+def as_text_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value.strip()] if value.strip() else []
+    if not isinstance(value, list):
+        raise ValueError(f"must be a list of strings (got {type(value).__name__})")
+    items = []
+    for item in value:
+        if isinstance(item, (dict, list)):
+            item = json.dumps(item, ensure_ascii=False)
+        items.append(str(item).strip())
+    return [item for item in items if item]
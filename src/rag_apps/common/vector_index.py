@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .logging_utils import get_logger
+from .vectors import normalize, top_k
+from .vectorstores import StoredChunk
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.retrievers import BaseRetriever
+
+
+LOGGER = get_logger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.jsonl"
+LAYOUT_FILE = "layout.json"
+CODES_FILE = "codes.npy"
+PROJECTION_FILE = "projection.npy"
+SCALES_FILE = "scales.npy"
+EXPORT_BATCH = 2048
+SCAN_BLOCK = 16384
+PCA_SAMPLE = 20000
+# Metadata fields with a value -> rows map built at load, so filtered searches skip the Python scan.
+INDEXED_FIELDS = ("doc_name", "doc_id")
+
+
+def _build_postings(records: List[dict]) -> Dict[str, Dict[Any, np.ndarray]]:
+    postings: Dict[str, Dict[Any, List[int]]] = {name: {} for name in INDEXED_FIELDS}
+    for row, record in enumerate(records):
+        metadata = record["metadata"]
+        for name in INDEXED_FIELDS:
+            value = metadata.get(name)
+            if value is not None:
+                postings[name].setdefault(value, []).append(row)
+    return {
+        name: {value: np.asarray(rows, dtype=np.int64) for value, rows in values.items()}
+        for name, values in postings.items()
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class IndexLayout:
+    """How the scanned copy of the vectors is stored; full float32 rows are always kept for re-scoring."""
+
+    quantization: str = "none"  # or "int8": symmetric per-dimension scalar quantization
+    dimensions: int = 0  # 0 keeps the full embedding width
+    reduction: str = "truncate"  # or "pca" (uncentred, so dot products are preserved)
+
+    def __post_init__(self) -> None:
+        if self.quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown quantization: {self.quantization}")
+        if self.reduction not in ("truncate", "pca"):
+            raise ValueError(f"Unknown dimension reduction: {self.reduction}")
+
+    @property
+    def compressed(self) -> bool:
+        return self.quantization != "none" or self.dimensions > 0
+
+    def label(self) -> str:
+        if not self.compressed:
+            return "float32"
+        parts = [self.quantization if self.quantization != "none" else "float32"]
+        if self.dimensions:
+            parts.append(f"{self.reduction}{self.dimensions}")
+        return "_".join(parts)
+
+
+@dataclass(slots=True)
+class CompressedVectors:
+    codes: np.ndarray
+    projection: Optional[np.ndarray] = None
+    scales: Optional[np.ndarray] = None
+    truncate: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.codes, self.projection, self.scales) if array is not None)
+
+    def project(self, query: np.ndarray) -> np.ndarray:
+        """Map a normalised query into the scanned space, folding in the quantization scales."""
+        if self.projection is not None:
+            query = query @ self.projection
+        elif self.truncate:
+            query = normalize(query[: self.truncate])
+        if self.scales is not None:
+            query = query * self.scales
+        return query.astype(np.float32, copy=False)
+
+
+def compress_vectors(vectors: np.ndarray, layout: IndexLayout) -> Optional[CompressedVectors]:
+    """Reduce and/or quantize normalised rows according to ``layout``; ``None`` when nothing changes."""
+    width = vectors.shape[1]
+    dimensions = layout.dimensions if 0 < layout.dimensions < width else 0
+    if layout.quantization == "none" and not dimensions:
+        return None
+    projection = None
+    if dimensions and layout.reduction == "pca":
+        step = max(len(vectors) // PCA_SAMPLE, 1)
+        sample = np.asarray(vectors[::step], dtype=np.float32)
+        _, _, components = np.linalg.svd(sample, full_matrices=False)
+        projection = np.ascontiguousarray(components[:dimensions].T, dtype=np.float32)
+    reduced = np.empty((len(vectors), dimensions or width), dtype=np.float32)
+    for start in range(0, len(vectors), SCAN_BLOCK):
+        block = np.asarray(vectors[start:start + SCAN_BLOCK], dtype=np.float32)
+        if projection is not None:
+            block = block @ projection
+        elif dimensions:
+            block = normalize(block[:, :dimensions])
+        reduced[start:start + len(block)] = block
+    scales = None
+    codes = reduced
+    if layout.quantization == "int8":
+        peak = np.abs(reduced).max(axis=0)
+        scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(reduced / scales), -127, 127).astype(np.int8)
+    truncate = dimensions if dimensions and projection is None else 0
+    return CompressedVectors(codes=codes, projection=projection, scales=scales, truncate=truncate)
+
+
+class MemmapVectorIndex:
+    """Read-only brute-force index over a memory-mapped ``vectors.npy``.
+
+    Rows are L2-normalised float32 embeddings exported from a Chroma
+    collection; ``chunks.jsonl`` holds the matching ids, texts and metadata.
+    Processes that load the same directory share the vector pages through the
+    OS page cache, so serving workers do not each hold a copy of the matrix.
+
+    With a compressed :class:`IndexLayout` the scan runs over int8 and/or
+    dimension-reduced codes, and the best ``k * rescore_factor`` candidates are
+    re-scored against the float rows, which are only paged in for those hits.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        vectors: np.ndarray,
+        records: List[dict],
+        layout: IndexLayout = IndexLayout(),
+        compressed: Optional[CompressedVectors] = None,
+        rescore_factor: int = 4,
+        postings: Optional[Dict[str, Dict[Any, np.ndarray]]] = None,
+    ):
+        if len(records) != len(vectors):
+            raise ValueError(f"Index at {directory} has {len(vectors)} vectors but {len(records)} chunks")
+        self.directory = Path(directory)
+        self.vectors = vectors
+        self.records = records
+        self.layout = layout
+        self.compressed = compressed
+        self.rescore_factor = rescore_factor
+        self.postings = postings if postings is not None else _build_postings(records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def scan_bytes(self) -> int:
+        return self.compressed.nbytes if self.compressed is not None else self.vectors.nbytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.directory.iterdir() if path.is_file())
+
+    @classmethod
+    def load(cls, directory: Path, rescore_factor: int = 4) -> "MemmapVectorIndex":
+        directory = Path(directory)
+        vectors_path, chunks_path = directory / VECTORS_FILE, directory / CHUNKS_FILE
+        if not vectors_path.exists() or not chunks_path.exists():
+            raise FileNotFoundError(f"No memory-mapped index found at {directory}")
+        vectors = np.load(vectors_path, mmap_mode="r")
+        with chunks_path.open("r", encoding="utf-8") as handle:
+            records = [json.loads(line) for line in handle if line.strip()]
+        layout, compressed = read_layout(directory), None
+        if layout.compressed and (directory / CODES_FILE).exists():
+            optional = {name: directory / name for name in (PROJECTION_FILE, SCALES_FILE)}
+            codes = np.load(directory / CODES_FILE, mmap_mode="r")
+            projection = np.load(optional[PROJECTION_FILE]) if optional[PROJECTION_FILE].exists() else None
+            compressed = CompressedVectors(
+                codes=codes,
+                projection=projection,
+                scales=np.load(optional[SCALES_FILE]) if optional[SCALES_FILE].exists() else None,
+                truncate=codes.shape[1] if projection is None and codes.shape[1] < vectors.shape[1] else 0,
+            )
+        LOGGER.info("Loaded memory-mapped index with %d vectors (%s) from %s", len(records), layout.label(), directory)
+        return cls(directory, vectors, records, layout, compressed, rescore_factor)
+
+    @classmethod
+    def export_chroma(cls, store: Chroma, directory: Path, layout: IndexLayout = IndexLayout()) -> "MemmapVectorIndex":
+        """Write every vector in ``store`` to ``directory`` and return the loaded index."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        collection = store._collection
+        total = collection.count()
+        vectors_tmp = directory / f"{VECTORS_FILE}.tmp"
+        chunks_tmp = directory / f"{CHUNKS_FILE}.tmp"
+        matrix: Optional[np.ndarray] = None
+        with chunks_tmp.open("w", encoding="utf-8") as handle:
+            for offset in range(0, total, EXPORT_BATCH):
+                batch = collection.get(
+                    limit=EXPORT_BATCH,
+                    offset=offset,
+                    include=["documents", "metadatas", "embeddings"],
+                )
+                embeddings = normalize(np.asarray(batch["embeddings"], dtype=np.float32))
+                if matrix is None:
+                    matrix = np.lib.format.open_memmap(vectors_tmp, mode="w+", dtype=np.float32, shape=(total, embeddings.shape[1]))
+                matrix[offset:offset + len(embeddings)] = embeddings
+                for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                    record = {"id": chunk_id, "text": text or "", "metadata": metadata or {}}
+                    handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if matrix is None:
+            raise ValueError("Cannot export an empty vector store")
+        matrix.flush()
+        del matrix
+        os.replace(vectors_tmp, directory / VECTORS_FILE)
+        os.replace(chunks_tmp, directory / CHUNKS_FILE)
+        LOGGER.info("Exported %d vectors to %s", total, directory)
+        write_layout(directory, layout)
+        return cls.load(directory)
+
+    def with_layout(self, layout: IndexLayout, rescore_factor: int | None = None) -> "MemmapVectorIndex":
+        """In-memory copy of this index scanning a different layout (used to compare layouts)."""
+        return MemmapVectorIndex(
+            self.directory,
+            self.vectors,
+            self.records,
+            layout,
+            compress_vectors(self.vectors, layout),
+            self.rescore_factor if rescore_factor is None else rescore_factor,
+            self.postings,
+        )
+
+    def _candidates(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Sorted rows matching ``where``; indexed fields are looked up, any others checked on those rows only."""
+        if not where:
+            return None
+        rows: Optional[np.ndarray] = None
+        remaining = {}
+        for name, value in where.items():
+            if name not in self.postings:
+                remaining[name] = value
+                continue
+            try:
+                matches = self.postings[name].get(value)
+            except TypeError:  # unhashable filter value
+                matches = None
+            if matches is None:
+                return np.empty(0, dtype=np.int64)
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+        if not remaining:
+            return rows
+        scan = ((i, self.records[i]) for i in rows) if rows is not None else enumerate(self.records)
+        return np.fromiter(
+            (i for i, record in scan if all(record["metadata"].get(k) == v for k, v in remaining.items())),
+            dtype=np.int64,
+        )
+
+    def _scan(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        matrix = self.vectors if self.compressed is None else self.compressed.codes
+        projected = query if self.compressed is None else self.compressed.project(query)
+        if rows is not None:
+            return np.asarray(matrix[rows], dtype=np.float32) @ projected
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCAN_BLOCK):
+            block = matrix[start:start + SCAN_BLOCK]
+            scores[start:start + len(block)] = np.asarray(block, dtype=np.float32) @ projected
+        return scores
+
+    def search_rows(self, vector: Sequence[float], k: int, where: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Row numbers of the ``k`` best matches, best first."""
+        query = normalize(np.asarray(vector, dtype=np.float32))
+        rows = self._candidates(where)
+        scores = self._scan(query, rows)
+        if self.compressed is not None and self.rescore_factor > 0:
+            shortlist = top_k(scores, k * self.rescore_factor)
+            # Sorted row numbers keep the memmap reads sequential.
+            shortlist = np.sort(shortlist if rows is None else rows[shortlist])
+            exact = np.asarray(self.vectors[shortlist], dtype=np.float32) @ query
+            return shortlist[top_k(exact, k)]
+        order = top_k(scores, k)
+        return order if rows is None else rows[order]
+
+    def search_with_embeddings(
+        self,
+        vector: Sequence[float],
+        k: int,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> List[StoredChunk]:
+        """Same contract as :func:`rag_apps.common.vectorstores.search_with_embeddings`.
+
+        Embeddings are returned as float32 rows rather than Python lists.
+        """
+        from langchain.schema import Document
+
+        hits = []
+        for index in self.search_rows(vector, k, where):
+            record = self.records[index]
+            hits.append(
+                StoredChunk(
+                    id=record["id"],
+                    document=Document.construct(page_content=record["text"], metadata=dict(record["metadata"])),
+                    embedding=np.array(self.vectors[index], dtype=np.float32),
+                )
+            )
+        return hits
+
+    def similarity_search(self, query: str, embeddings: Embeddings, k: int = 4, where: Optional[Dict[str, Any]] = None):
+        return [hit.document for hit in self.search_with_embeddings(embeddings.embed_query(query), k, where)]
+
+    def as_retriever(self, embeddings: Embeddings, k: int = 4, where: Optional[Dict[str, Any]] = None) -> BaseRetriever:
+        return _retriever_class()(index=self, embeddings=embeddings, k=k, where=where)
+
+
+def read_layout(directory: Path) -> IndexLayout:
+    path = Path(directory) / LAYOUT_FILE
+    if not path.exists():
+        return IndexLayout()
+    with path.open("r", encoding="utf-8") as handle:
+        return IndexLayout(**json.load(handle))
+
+
+def _replace_array(path: Path, array: Optional[np.ndarray]) -> None:
+    """Swap in ``array`` (or remove the file) without touching pages another process has mapped."""
+    if array is None:
+        path.unlink(missing_ok=True)
+        return
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("wb") as handle:
+        np.save(handle, array)
+    os.replace(tmp_path, path)
+
+
+def write_layout(directory: Path, layout: IndexLayout) -> None:
+    """(Re)build the compressed scan files for an exported index and record ``layout``.
+
+    Every file is written to a temporary name and renamed into place, so
+    processes that have the old codes memory-mapped keep reading them intact.
+    """
+    directory = Path(directory)
+    compressed = compress_vectors(np.load(directory / VECTORS_FILE, mmap_mode="r"), layout)
+    _replace_array(directory / CODES_FILE, compressed.codes if compressed is not None else None)
+    _replace_array(directory / PROJECTION_FILE, compressed.projection if compressed is not None else None)
+    _replace_array(directory / SCALES_FILE, compressed.scales if compressed is not None else None)
+    layout_tmp = directory / f"{LAYOUT_FILE}.tmp"
+    with layout_tmp.open("w", encoding="utf-8") as handle:
+        json.dump(asdict(layout), handle)
+    os.replace(layout_tmp, directory / LAYOUT_FILE)
+    if compressed is not None:
+        LOGGER.info("Wrote %s scan codes (%d bytes) to %s", layout.label(), compressed.nbytes, directory)
+
+
+@lru_cache(maxsize=None)
+def _retriever_class():
+    # Subclasses a LangChain model, so it is defined on first use to keep imports light.
+    from langchain_core.callbacks import CallbackManagerForRetrieverRun
+    from langchain_core.retrievers import BaseRetriever
+
+    class MemmapRetriever(BaseRetriever):
+        """LangChain retriever over a :class:`MemmapVectorIndex`."""
+
+        index: Any
+        embeddings: Any
+        k: int = 4
+        where: Optional[Dict[str, Any]] = None
+
+        def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun):
+            return self.index.similarity_search(query, self.embeddings, self.k, self.where)
+
+    return MemmapRetriever
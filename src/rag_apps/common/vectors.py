@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+
+
+def as_matrix(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise a vector or the rows of a matrix, leaving zero rows untouched."""
+    array = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    return array / np.where(norms == 0, 1.0, norms)
+
+
+def combine(*vectors: Sequence[float]) -> np.ndarray:
+    """Unit-length mean of several unit vectors, used to merge question and rule intent."""
+    return normalize(np.sum([normalize(np.asarray(v, dtype=np.float32)) for v in vectors], axis=0))
+
+
+def cosine_scores(matrix: np.ndarray, vector: Sequence[float]) -> np.ndarray:
+    """Cosine similarity of ``vector`` against every row of an already-normalised ``matrix``."""
+    return matrix @ normalize(np.asarray(vector, dtype=np.float32))
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
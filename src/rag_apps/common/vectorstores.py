@@ -1,24 +1,103 @@
 from __future__ import annotations
 
 import shutil
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from langchain.schema import Document
-from langchain_community.vectorstores import Chroma
-from langchain_core.embeddings import Embeddings
+from .logging_utils import get_logger
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.embeddings import Embeddings
+
+
+LOGGER = get_logger(__name__)
 
 
 def _ensure_dir(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+def load_vector_index(
+    embeddings: Embeddings,
+    persist_directory: Path,
+    index_directory: Path,
+    backend: str = "chroma",
+    layout: Any = None,
+    rescore_factor: int = 4,
+    persist_layout: bool = False,
+) -> Any:
+    """Chroma store, or its memory-mapped export when ``backend == "memmap"``.
+
+    The export is (re)written from Chroma when missing or older than the store.
+    A ``layout`` (an ``IndexLayout``) other than the stored one is applied in
+    memory, so readers never rewrite the scan codes another process is using;
+    only an export step (``persist_layout=True``) records it on disk.
+    """
+    if backend == "chroma":
+        return load_chroma_store(embeddings, persist_directory)
+    if backend != "memmap":
+        raise ValueError(f"Unknown vector backend: {backend}")
+    from .vector_index import VECTORS_FILE, MemmapVectorIndex, read_layout, write_layout
+
+    exported = Path(index_directory) / VECTORS_FILE
+    source = Path(persist_directory)
+    if exported.exists() and (not source.exists() or exported.stat().st_mtime >= _latest_mtime(source)):
+        stored = read_layout(index_directory)
+        if layout is None or layout == stored:
+            return MemmapVectorIndex.load(index_directory, rescore_factor)
+        if persist_layout:
+            write_layout(index_directory, layout)
+            return MemmapVectorIndex.load(index_directory, rescore_factor)
+        LOGGER.info("Scanning %s as %s in memory (stored layout: %s)", index_directory, layout.label(), stored.label())
+        return MemmapVectorIndex.load(index_directory, rescore_factor).with_layout(layout)
+    store = load_chroma_store(embeddings, source)
+    index = MemmapVectorIndex.export_chroma(store, index_directory, layout or read_layout(index_directory))
+    index.rescore_factor = rescore_factor
+    return index
+
+
+def as_retriever(store: Any, embeddings: Embeddings, k: int) -> Any:
+    if hasattr(store, "search_with_embeddings"):
+        return store.as_retriever(embeddings, k)
+    return store.as_retriever(search_kwargs={"k": k})
+
+
+def count_vectors(store: Any) -> int:
+    if hasattr(store, "records"):
+        return len(store)
+    return store._collection.count()
+
+
+def iter_stored_chunks(store: Any, batch_size: int = 2048) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Every ``(id, text, metadata)`` in a Chroma store or memory-mapped index, without vectors."""
+    records = getattr(store, "records", None)
+    if records is not None:
+        for record in records:
+            yield record["id"], record["text"], record["metadata"]
+        return
+    collection = store._collection
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+        for chunk_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+            yield chunk_id, text or "", metadata or {}
+
+
+def _latest_mtime(directory: Path) -> float:
+    return max((path.stat().st_mtime for path in directory.rglob("*") if path.is_file()), default=0.0)
+
+
 def build_chroma_store(
     documents: Iterable[Document],
     embeddings: Embeddings,
     persist_directory: Path,
     force_recreate: bool = False,
 ) -> Chroma:
+    from langchain_community.vectorstores import Chroma
+
     path = Path(persist_directory)
     if force_recreate and path.exists():
         shutil.rmtree(path)
@@ -31,6 +110,8 @@ def build_chroma_store(
 
 
 def load_chroma_store(embeddings: Embeddings, persist_directory: Path) -> Chroma:
+    from langchain_community.vectorstores import Chroma
+
     path = Path(persist_directory)
     if not path.exists():
         raise FileNotFoundError(f"No vector store found at {path}")
@@ -38,3 +119,47 @@ def load_chroma_store(embeddings: Embeddings, persist_directory: Path) -> Chroma
         embedding_function=embeddings,
         persist_directory=str(path),
     )
+
+
+@dataclass(slots=True)
+class StoredChunk:
+    id: str
+    document: Document
+    embedding: Sequence[float]
+
+
+def search_with_embeddings(
+    store: Chroma,
+    vector: Sequence[float],
+    k: int,
+    where: Optional[Dict[str, Any]] = None,
+) -> List[StoredChunk]:
+    """Nearest-neighbour query that also returns the stored vectors, best match first.
+
+    Stores with their own ``search_with_embeddings`` (e.g. ``MemmapVectorIndex``) answer directly.
+    """
+    from langchain.schema import Document
+
+    native = getattr(store, "search_with_embeddings", None)
+    if native is not None:
+        return native(vector, k, where)
+
+    result = store._collection.query(
+        query_embeddings=[list(map(float, vector))],
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "embeddings"],
+    )
+    return [
+        StoredChunk(
+            id=chunk_id,
+            document=Document(page_content=text or "", metadata=metadata or {}),
+            embedding=list(embedding),
+        )
+        for chunk_id, text, metadata, embedding in zip(
+            result["ids"][0],
+            result["documents"][0],
+            result["metadatas"][0],
+            result["embeddings"][0],
+        )
+    ]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from .logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def start_in_background(name: str, factory: Callable[[], T]) -> Future[T]:
+    """Run ``factory`` on a daemon worker thread so the caller can render before it finishes."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+    future = executor.submit(factory)
+    executor.shutdown(wait=False)
+    future.add_done_callback(
+        lambda done: LOGGER.info("%s finished%s", name, " with an error" if done.exception() else "")
+    )
+    return future
+
+
+def await_ready(future: Future[T], on_error: Callable[[], None]) -> T:
+    """Block until a warm-up finishes; ``on_error`` lets callers drop a cached failed future."""
+    try:
+        return future.result()
+    except Exception:
+        on_error()
+        raise
@@ -1,23 +1,42 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
-from typing import Any, Dict, List
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional
 
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
+from langchain_core.messages import BaseMessage, HumanMessage
 
-from rag_apps.common.key_manager import GeminiKeyManager
-from rag_apps.common.llm import RotatingGeminiChat, RotatingGeminiEmbeddings
+from rag_apps.common.instrumentation import counter, span
+from rag_apps.common.llm_cache import forget_generation, open_llm_cache
 from rag_apps.common.logging_utils import get_logger
-from rag_apps.common.vectorstores import load_chroma_store
+from rag_apps.common.manifest import verify_build
+from rag_apps.common.neighbours import ChunkNeighbourIndex
+from rag_apps.common.resources import shared_resources
+from rag_apps.common.structured import FieldSpec, StructuredOutputError, as_text, as_text_list, one_of, parse_structured
+from rag_apps.common.vector_index import IndexLayout
+from rag_apps.common.vectorstores import as_retriever
 from .config import ComplianceConfig
-from .rules import Rule, load_rules
+from .ingest import build_hash, corpus_fingerprint
+from .pool import AssessmentStats, CandidatePool
+from .rule_index import RuleEmbeddingIndex
+from .rules import Rule, RuleSetWatcher, load_rules
 
 
 LOGGER = get_logger(__name__)
 
+PARSE_FAILURES = counter("compliance_parse_failures_total", "Rule verdicts still unusable after the re-ask")
+REASKS = counter("compliance_reasks_total", "Single-rule re-asks after a malformed verdict, by outcome")
+
+VERDICTS = ("Compliant", "Non-Compliant", "NotFound")
+VERDICT_FIELDS = (
+    FieldSpec("verdict", one_of(*VERDICTS)),
+    FieldSpec("evidence", as_text_list, required=False, default=[]),
+    FieldSpec("remediation", as_text, required=False, default=""),
+)
+
 
 PROMPT = """
 You are a strict enterprise compliance auditor. Review the provided contract excerpts and rule details.
@@ -34,15 +53,36 @@ Context:
 {context}
 """.strip()
 
+REASK_PROMPT = """
+Your previous reply for Rule ID: {rule_id} could not be used ({problems}).
+Rewrite it as a single JSON object and nothing else, with keys:
+verdict (one of "Compliant", "Non-Compliant", "NotFound"), evidence (list of strings), remediation (string).
+Keep the substance of your previous reply; do not add new findings.
+
+Previous reply:
+{reply}
+""".strip()
+
+
+def _passage_key(doc: Document) -> tuple:
+    meta = doc.metadata
+    if meta.get("doc_id") is None:
+        return (doc.page_content,)
+    return (meta["doc_id"], meta.get("window_start", meta.get("chunk_index")), meta.get("window_end"))
+
 
-def _format_context(docs: List[Document]) -> str:
+def _format_context(docs: List[Document], char_limit: int = 1200, cache: Optional[Dict[tuple, str]] = None) -> str:
     if not docs:
         return "No supporting passages found."
     formatted = []
     for doc in docs:
-        formatted.append(
-            f"[{doc.metadata.get('doc_name', 'unknown')}]\n{doc.page_content[:1200]}"
-        )
+        key = _passage_key(doc)
+        passage = cache.get(key) if cache is not None else None
+        if passage is None:
+            passage = f"[{doc.metadata.get('doc_name', 'unknown')}]\n{doc.page_content[:char_limit]}"
+            if cache is not None:
+                cache[key] = passage
+        formatted.append(passage)
     return "\n\n".join(formatted)
 
 
@@ -69,29 +109,88 @@ class ComplianceAgent:
     chain: LLMChain
     retriever: any
     rules: List[Rule]
+    neighbours: Optional[ChunkNeighbourIndex] = None
+    neighbour_window: int = 0
+    dedupe_neighbours: bool = True
+    passage_char_limit: int = 1200
+    store: Any = None
+    embeddings: Any = None
+    rule_vectors: Dict[str, List[float]] = field(default_factory=dict)
+    retriever_k: int = 8
+    pool_k: int = 0
+    pool_approx_margin: Optional[float] = None
+    last_stats: Optional[AssessmentStats] = None
+    rule_index: Optional[RuleEmbeddingIndex] = None
+    rules_watcher: Optional[RuleSetWatcher] = None
+    reasks: int = 1
 
-    def assess_rule(self, rule: Rule, question: str) -> dict:
-        compound_query = f"{question}\nRule: {rule.description}"
-        docs = self.retriever.get_relevant_documents(compound_query)
-        context = _format_context(docs)
-        response = self.chain.invoke(
-            {
+    def set_rules(self, rules: List[Rule]) -> None:
+        """Swap in a new rule set, re-embedding only rules whose description changed."""
+        rule_vectors = self.rule_index.vectors_for(rules) if self.rule_index is not None else {}
+        self.rules, self.rule_vectors = rules, rule_vectors
+
+    def refresh_rules(self) -> bool:
+        """Reload rules if the watched rules file changed; returns True when rules were swapped."""
+        if self.rules_watcher is None:
+            return False
+        try:
+            rules = self.rules_watcher.poll(self.set_rules)
+        except Exception as exc:  # noqa: BLE001 - keep serving the previous rules; the next poll retries
+            LOGGER.warning("Keeping the previous rules; reloading %s failed: %s", self.rules_watcher.path, exc)
+            return False
+        if rules is None:
+            return False
+        LOGGER.info("Hot-reloaded %d compliance rules from %s", len(rules), self.rules_watcher.path)
+        return True
+
+    def open_pool(self, question: str) -> Optional[CandidatePool]:
+        """Retrieve a shared candidate pool for one assessment, if the agent is configured for it."""
+        if self.pool_k <= 0 or self.store is None or self.embeddings is None or not self.rule_vectors:
+            return None
+        with span("retrieval.pool", app="compliance", size=self.pool_k) as record:
+            question_vector = self.embeddings.embed_query(question)
+            pool = CandidatePool.fetch(
+                self.store,
+                question_vector,
+                max(self.pool_k, self.retriever_k),
+                approx_margin=self.pool_approx_margin,
+            )
+            record.set(hits=len(pool.chunks))
+        return pool
+
+    def retrieve(self, rule: Rule, question: str, pool: Optional[CandidatePool] = None) -> List[Document]:
+        rule_vector = self.rule_vectors.get(rule.id)
+        with span("retrieval", app="compliance", rule_id=rule.id, pooled=pool is not None) as record:
+            if pool is not None and rule_vector is not None:
+                docs = pool.retrieve(rule_vector, self.retriever_k)
+            else:
+                compound_query = f"{question}\nRule: {rule.description}"
+                docs = self.retriever.get_relevant_documents(compound_query)
+                if pool is not None:
+                    pool.stats.rules += 1
+                    pool.stats.store_queries += 1
+            record.set(hits=len(docs))
+        if self.neighbours is not None and self.neighbour_window > 0:
+            with span("retrieval.expand", app="compliance", window=self.neighbour_window):
+                docs = self.neighbours.expand(docs, self.neighbour_window, dedupe=self.dedupe_neighbours)
+        return docs
+
+    def assess_rule(self, rule: Rule, question: str, pool: Optional[CandidatePool] = None) -> dict:
+        with span("compliance.assess_rule", rule_id=rule.id):
+            docs = self.retrieve(rule, question, pool)
+            with span("prompt.format", app="compliance") as record:
+                context = _format_context(docs, self.passage_char_limit, pool.passages if pool is not None else None)
+                record.set(context_chars=len(context))
+            inputs = {
                 "rule_id": rule.id,
                 "rule_description": rule.description,
                 "severity": rule.severity,
                 "question": question,
                 "context": context,
             }
-        )
-        payload = response["text"] if isinstance(response, dict) else response
-        try:
-            parsed = json.loads(payload)
-        except json.JSONDecodeError:
-            parsed = {
-                "verdict": "NotFound",
-                "evidence": [payload],
-                "remediation": "Could not parse structured output.",
-            }
+            response = self.chain.invoke(inputs)
+            payload = response["text"] if isinstance(response, dict) else response
+            parsed = self._parse_verdict(rule, payload, self.chain.prompt.format_prompt(**inputs).to_messages())
         return {
             "rule_id": rule.id,
             "category": rule.category,
@@ -100,27 +199,119 @@ class ComplianceAgent:
             "evidence": parsed.get("evidence", []),
             "remediation": parsed.get("remediation", ""),
             "sources": _summaries(docs),
+            "parse_failed": bool(parsed.get("parse_failed")),
+        }
+
+    def _parse_verdict(self, rule: Rule, payload: str, messages: Optional[List[BaseMessage]] = None) -> dict:
+        """Validated verdict, re-asking the model to reformat only this rule's reply if needed.
+
+        ``messages`` is the prompt that produced ``payload``; every reply that
+        fails validation is dropped from the LLM cache so a rerun regenerates it.
+        """
+        for attempt in range(self.reasks + 1):
+            with span("parse.json", rule_id=rule.id, attempt=attempt):
+                try:
+                    parsed = parse_structured(payload, VERDICT_FIELDS, schema="compliance_verdict")
+                except StructuredOutputError as exc:
+                    error = exc
+                    if messages is not None:
+                        forget_generation(self.chain.llm, messages)
+                else:
+                    if attempt:
+                        REASKS.inc(outcome="ok")
+                    return parsed
+            if attempt:
+                REASKS.inc(outcome="failed")
+            if attempt < self.reasks:
+                LOGGER.warning("Re-asking %s after malformed verdict: %s", rule.id, error)
+                reask = REASK_PROMPT.format(rule_id=rule.id, problems=error, reply=payload)
+                with span("llm.reask", rule_id=rule.id):
+                    reply = self.chain.llm.invoke(reask)
+                payload = getattr(reply, "content", reply)
+                messages = [HumanMessage(content=reask)]
+        PARSE_FAILURES.inc(rule_id=rule.id)
+        return {
+            "verdict": "NotFound",
+            "evidence": [payload],
+            "remediation": f"Could not parse structured output ({error}).",
+            "parse_failed": True,
         }
 
-    def run_assessment(self, question: str) -> List[dict]:
-        results = []
-        for rule in self.rules:
+    def iter_assessment(self, question: str, rules: Optional[List[Rule]] = None) -> Iterator[dict]:
+        """Yield each rule's verdict as soon as it is assessed, so callers can stream reports."""
+        pool = self.open_pool(question)
+        for rule in rules if rules is not None else self.rules:
             LOGGER.info("Assessing %s", rule.id)
-            results.append(self.assess_rule(rule, question))
-        return results
+            yield self.assess_rule(rule, question, pool)
+        if pool is not None:
+            self.last_stats = pool.stats
+            LOGGER.info(
+                "Assessment used %d store queries for %d rules (saved %d, %d pool fallbacks)",
+                pool.stats.store_queries,
+                pool.stats.rules,
+                pool.stats.store_queries_saved,
+                pool.stats.fallbacks,
+            )
+
+    def run_assessment(self, question: str, rules: Optional[List[Rule]] = None) -> List[dict]:
+        return list(self.iter_assessment(question, rules))
 
 
 def build_agent(config: ComplianceConfig | None = None) -> ComplianceAgent:
     config = config or ComplianceConfig()
-    manager = GeminiKeyManager.from_defaults()
-    chat = RotatingGeminiChat(manager)
-    embeddings = RotatingGeminiEmbeddings(manager)
-    store = load_chroma_store(embeddings, config.persist_directory)
-    retriever = store.as_retriever(search_kwargs={"k": 8})
+    resources = shared_resources()
+    cache = open_llm_cache(config.llm_cache_path, config.llm_cache_max_mb) if config.llm_cache else None
+    chat = resources.chat("compliance", cache=cache)
+    embeddings = resources.embeddings("compliance")
+    embedding_model = embeddings.model_name
+    if config.embed_batch_wait_ms > 0:
+        embeddings = resources.batcher("compliance", embeddings, config.embed_batch_size, config.embed_batch_wait_ms)
+    store = resources.vector_index(
+        embeddings,
+        config.persist_directory,
+        config.index_directory,
+        config.vector_backend,
+        IndexLayout(config.index_quantization, config.index_dimensions, config.index_reduction),
+        config.index_rescore_factor,
+    )
+    verify_build(
+        config.manifest_path,
+        partial(build_hash, config),
+        store,
+        config.persist_directory,
+        chunk_cache=config.cache_path,
+        corpus=lambda limit: corpus_fingerprint(config, limit),
+        embedding_model=embedding_model,
+        policy=config.stale_store_policy,
+    )
+    retriever = as_retriever(store, embeddings, config.retriever_k)
     prompt = PromptTemplate(
         template=PROMPT,
         input_variables=["rule_id", "rule_description", "severity", "question", "context"],
     )
     chain = LLMChain(llm=chat, prompt=prompt)
+    rules_watcher = RuleSetWatcher(config.rules_path)
     rules = load_rules(config.rules_path)
-    return ComplianceAgent(chain=chain, retriever=retriever, rules=rules)
+    neighbours = None
+    if config.neighbour_window > 0 and config.cache_path.exists():
+        neighbours = ChunkNeighbourIndex.from_cache(config.cache_path)
+    rule_index = RuleEmbeddingIndex(embeddings, config.rule_embeddings_path) if config.pool_k > 0 else None
+    rule_vectors = rule_index.vectors_for(rules) if rule_index is not None else {}
+    return ComplianceAgent(
+        chain=chain,
+        retriever=retriever,
+        rules=rules,
+        neighbours=neighbours,
+        neighbour_window=config.neighbour_window,
+        dedupe_neighbours=config.dedupe_neighbours,
+        passage_char_limit=config.passage_char_limit,
+        store=store,
+        embeddings=embeddings,
+        rule_vectors=rule_vectors,
+        retriever_k=config.retriever_k,
+        pool_k=config.pool_k,
+        pool_approx_margin=config.pool_approx_margin,
+        rule_index=rule_index,
+        rules_watcher=rules_watcher,
+        reasks=config.structured_reasks,
+    )
@@ -3,22 +3,23 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from langchain.schema import Document
-
-from rag_apps.common.key_manager import GeminiKeyManager
-from rag_apps.common.llm import RotatingGeminiEmbeddings
 from rag_apps.common.logging_utils import get_logger
-from rag_apps.common.vectorstores import build_chroma_store
+from rag_apps.common.manifest import BuildManifest, file_digest
 from .config import ComplianceConfig
-from .ingest import build_chunks
+from .ingest import build_chunks, build_hash
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
 
 
 LOGGER = get_logger(__name__)
 
 
 def load_cached_chunks(cache_path: Path) -> List[Document]:
+    from langchain.schema import Document
+
     with cache_path.open("r", encoding="utf-8") as handle:
         return [
             Document(page_content=payload["page_content"], metadata=payload["metadata"])
@@ -26,20 +27,52 @@ def load_cached_chunks(cache_path: Path) -> List[Document]:
         ]
 
 
-def ensure_chunks(config: ComplianceConfig, force: bool, limit: int | None = None) -> List[Document]:
+def ensure_chunks(
+    config: ComplianceConfig,
+    force: bool,
+    limit: int | None = None,
+    manifest: BuildManifest | None = None,
+) -> List[Document]:
+    manifest = manifest or BuildManifest("compliance")
     if config.cache_path.exists() and not force:
         LOGGER.info("Loading cached compliance chunks from %s", config.cache_path)
-        return load_cached_chunks(config.cache_path)
+        with manifest.stage("cache_load") as stats:
+            chunks = load_cached_chunks(config.cache_path)
+            stats["chunks"] = len(chunks)
+        if not manifest.continue_from(BuildManifest.load(config.chunk_manifest_path), config.cache_path):
+            LOGGER.warning("No chunk manifest matches %s; its chunking settings are unknown", config.cache_path)
+            manifest.chunk_cache = file_digest(config.cache_path)
+        elif manifest.config_hash != build_hash(config):
+            message = f"chunk cache {config.cache_path} was built with different chunking settings; pass --force-chunks"
+            LOGGER.warning("%s", message)
+            manifest.warnings.append(message)
+        return chunks
     LOGGER.info("Creating compliance chunks (force=%s)", force)
-    return build_chunks(config, limit=limit)
-
-
-def build_store(force_chunks: bool = False, force_store: bool = False, limit: int | None = None) -> None:
-    config = ComplianceConfig()
-    chunks = ensure_chunks(config, force_chunks, limit=limit)
-    manager = GeminiKeyManager.from_defaults()
-    embeddings = RotatingGeminiEmbeddings(manager)
-    build_chroma_store(chunks, embeddings, config.persist_directory, force_recreate=force_store)
+    return build_chunks(config, limit=limit, manifest=manifest)
+
+
+def build_store(
+    force_chunks: bool = False,
+    force_store: bool = False,
+    limit: int | None = None,
+    strategy: str = "recursive",
+) -> None:
+    config = ComplianceConfig(chunking_strategy=strategy)
+    manifest = BuildManifest("compliance")
+    chunks = ensure_chunks(config, force_chunks, limit=limit, manifest=manifest)
+    from rag_apps.common.resources import shared_resources
+    from rag_apps.common.vectorstores import build_chroma_store, count_vectors
+
+    embeddings = shared_resources().embeddings("compliance")
+    usage = BuildManifest.usage_snapshot()
+    with manifest.stage("embed_store") as stats:
+        store = build_chroma_store(chunks, embeddings, config.persist_directory, force_recreate=force_store)
+        stats["chunks"] = len(chunks)
+        stats["bytes"] = sum(len(chunk.page_content) for chunk in chunks)
+    manifest.embedding_model = embeddings.model_name
+    manifest.vectors = count_vectors(store)
+    manifest.capture_embedding_usage(usage)
+    manifest.write(config.manifest_path)
     LOGGER.info("Compliance vector store ready at %s", config.persist_directory)
 
 
@@ -48,12 +81,13 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--force-chunks", action="store_true", help="Recreate chunk cache")
     parser.add_argument("--force-store", action="store_true", help="Recreate Chroma store")
     parser.add_argument("--limit", type=int, default=None, help="Limit files for testing")
+    parser.add_argument("--strategy", choices=("recursive", "sections"), default="recursive", help="Chunking strategy")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    build_store(force_chunks=args.force_chunks, force_store=args.force_store, limit=args.limit)
+    build_store(force_chunks=args.force_chunks, force_store=args.force_store, limit=args.limit, strategy=args.strategy)
 
 
 if __name__ == "__main__":
@@ -3,49 +3,141 @@ from __future__ import annotations
 import argparse
 from datetime import datetime
 from pathlib import Path
-
-import pandas as pd
+from typing import Sequence
 
 from rag_apps.common import paths
+from rag_apps.common.instrumentation import REGISTRY
 from rag_apps.common.logging_utils import get_logger
-from .agent import build_agent
+from rag_apps.common.manifest import STALE_STORE_POLICIES
+from .reporting import FORMATS, PORTFOLIO_COLUMNS, RULE_COLUMNS, ReportWriter, report_row, summarize_sources  # noqa: F401
 
 
 LOGGER = get_logger(__name__)
 
 
-def summarize_sources(sources: list[dict]) -> str:
-    if not sources:
-        return ""
-    return "; ".join(f"{item.get('doc_name')} ({item.get('file_type')})" for item in sources)
+def _parse_formats(value: str | None, default: Sequence[str]) -> tuple[str, ...]:
+    if not value:
+        return tuple(default)
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+def generate_table(
+    question: str,
+    use_cache: bool = True,
+    formats: Sequence[str] = ("csv", "md"),
+    stale_store: str = "error",
+) -> list[Path]:
+    """Stream one row per rule verdict to every requested format as it is assessed."""
+    from .agent import build_agent
+    from .config import ComplianceConfig
+
+    agent = build_agent(ComplianceConfig(llm_cache=use_cache, stale_store_policy=stale_store))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_path = paths.EVAL_OUTPUT_DIR / f"compliance_comparison_{timestamp}"
+    with ReportWriter(base_path, formats, RULE_COLUMNS) as report:
+        for result in agent.iter_assessment(question):
+            report.write(report_row(result))
+    cache = agent.chain.llm.cache
+    if cache:
+        cache.log_stats("Compliance LLM cache")
+    LOGGER.info("Saved comparison table (%d rules) to %s", report.rows, ", ".join(map(str, report.paths)))
+    return report.paths
+
 
+def generate_portfolio(
+    question: str,
+    contracts: list[str] | None = None,
+    limit: int | None = None,
+    workers: int | None = None,
+    formats: Sequence[str] = ("csv",),
+    use_cache: bool = True,
+    checkpoint: Path | None = None,
+    stale_store: str = "error",
+) -> list[Path]:
+    """Contract x rule verdict matrix plus the per-cell detail rows, streamed as cells finish."""
+    from .agent import build_agent
+    from .config import ComplianceConfig
+    from .portfolio import VerdictCache, contract_fingerprints, run_portfolio, verdict_matrix
 
-def generate_table(question: str) -> tuple[Path, Path]:
-    agent = build_agent()
-    results = agent.run_assessment(question)
-    df = pd.DataFrame(results)
-    df["source_summary"] = df["sources"].apply(summarize_sources)
-    df["evidence"] = df["evidence"].apply(lambda ev: "; ".join(ev) if isinstance(ev, list) else ev)
+    config = ComplianceConfig(llm_cache=use_cache, stale_store_policy=stale_store)
+    agent = build_agent(config)
+    if limit and not contracts:
+        contracts = list(contract_fingerprints(agent.store))[:limit]
+    rule_ids = [rule.id for rule in agent.rules]
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_path = paths.EVAL_OUTPUT_DIR / f"compliance_comparison_{timestamp}.csv"
-    md_path = paths.EVAL_OUTPUT_DIR / f"compliance_comparison_{timestamp}.md"
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
-    df.drop(columns=["sources"], errors="ignore").to_csv(csv_path, index=False)
-    with md_path.open("w", encoding="utf-8") as handle:
-        handle.write(df.drop(columns=["sources"], errors="ignore").to_markdown(index=False))
-    LOGGER.info("Saved comparison table to %s and %s", csv_path, md_path)
-    return csv_path, md_path
+    base_path = paths.EVAL_OUTPUT_DIR / f"compliance_portfolio_{timestamp}"
+    # Both writers open before the run so a bad format fails before any cell is assessed.
+    with ReportWriter(Path(f"{base_path}_cells"), formats, PORTFOLIO_COLUMNS) as detail, ReportWriter(
+        base_path, formats, ["contract", *rule_ids, "non_compliant", "not_found"]
+    ) as matrix:
+        rows = run_portfolio(
+            agent,
+            question,
+            contracts=contracts,
+            workers=workers or config.portfolio_workers,
+            cache=VerdictCache(config.verdict_cache_path) if use_cache else None,
+            checkpoint_path=checkpoint,
+            on_row=lambda row: detail.write(report_row(row)),
+        )
+        for entry in verdict_matrix(rows, rule_ids):
+            matrix.write(entry)
+    cache = agent.chain.llm.cache
+    if cache:
+        cache.log_stats("Compliance LLM cache")
+    LOGGER.info(
+        "Saved portfolio matrix (%d contracts) to %s and cell detail to %s",
+        matrix.rows,
+        ", ".join(map(str, matrix.paths)),
+        ", ".join(map(str, detail.paths)),
+    )
+    return matrix.paths + detail.paths
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate compliance comparison report")
     parser.add_argument("question", help="Business question to evaluate, e.g. 'Do contracts meet security policies?'")
+    parser.add_argument("--no-cache", action="store_true", help="Call Gemini for every rule instead of reusing cached generations")
+    parser.add_argument("--portfolio", action="store_true", help="Assess every rule per contract and write a contract x rule matrix")
+    parser.add_argument("--contracts", default=None, help="Comma-separated doc_names to include in --portfolio (default: all)")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N contracts in --portfolio")
+    parser.add_argument("--workers", type=int, default=None, help="Contracts assessed concurrently in --portfolio")
+    parser.add_argument(
+        "--format",
+        default=None,
+        help=f"Comma-separated report formats from {', '.join(FORMATS)} (default: csv,md; csv for --portfolio)",
+    )
+    parser.add_argument("--checkpoint", type=Path, default=None, help="--portfolio progress file to resume from")
+    parser.add_argument("--stale-store", choices=STALE_STORE_POLICIES, default="error", help="What to do when the vector store no longer matches its build manifest")
+    parser.add_argument("--metrics-out", type=Path, default=None, help="Write stage timings (.json or .prom)")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    generate_table(args.question)
+    unknown = sorted(set(_parse_formats(args.format, ())) - set(FORMATS))
+    if unknown:
+        raise SystemExit(f"Unknown --format: {', '.join(unknown)}")
+    if args.portfolio:
+        contracts = [name.strip() for name in args.contracts.split(",") if name.strip()] if args.contracts else None
+        generate_portfolio(
+            args.question,
+            contracts=contracts,
+            limit=args.limit,
+            workers=args.workers,
+            formats=_parse_formats(args.format, ("csv",)),
+            use_cache=not args.no_cache,
+            checkpoint=args.checkpoint,
+            stale_store=args.stale_store,
+        )
+    else:
+        generate_table(
+            args.question,
+            use_cache=not args.no_cache,
+            formats=_parse_formats(args.format, ("csv", "md")),
+            stale_store=args.stale_store,
+        )
+    if args.metrics_out:
+        LOGGER.info("Wrote stage metrics to %s", REGISTRY.write(args.metrics_out))
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 from rag_apps.common import paths
 
@@ -12,7 +13,33 @@ class ComplianceConfig:
     txt_dir: Path = paths.CUAD_TXT_DIR
     chunk_size: int = 1500
     chunk_overlap: int = 250
+    chunk_workers: int = 1
+    chunking_strategy: str = "recursive"  # or "sections" to split at numbered clauses/articles
     persist_directory: Path = paths.COMPLIANCE_VECTOR_DIR
+    vector_backend: str = "chroma"  # or "memmap" to search an exported read-only index
+    index_quantization: str = "none"  # "int8" scans int8 codes of the memmap index
+    index_dimensions: int = 0  # > 0 scans vectors reduced to this many dimensions
+    index_reduction: str = "truncate"  # or "pca"
+    index_rescore_factor: int = 4  # float re-scoring of k * factor candidates; 0 trusts the compressed scores
+    llm_cache: bool = False  # reuse generations for byte-identical prompts; the report and eval CLIs turn it on
+    llm_cache_path: Path = paths.LLM_CACHE_FILE
+    llm_cache_max_mb: int = 256
+    embed_batch_wait_ms: float = 0.0  # > 0 micro-batches concurrent query embeddings (serving)
+    embed_batch_size: int = 32
+    index_directory: Path = paths.COMPLIANCE_INDEX_DIR
     cache_path: Path = paths.COMPLIANCE_CHUNK_CACHE
+    chunk_manifest_path: Path = paths.COMPLIANCE_CHUNK_MANIFEST
+    manifest_path: Path = paths.COMPLIANCE_BUILD_MANIFEST
+    stale_store_policy: str = "error"  # or "warn"/"ignore" when the store no longer matches its build manifest
     rules_path: Path = paths.RULES_FILE
+    rule_embeddings_path: Path = paths.RULE_EMBEDDING_CACHE
+    retriever_k: int = 8
+    pool_k: int = 48
+    pool_approx_margin: Optional[float] = None  # None keeps pool answers exact; a margin trades recall for fewer store queries
+    neighbour_window: int = 1
+    dedupe_neighbours: bool = True
+    passage_char_limit: int = 3600
+    structured_reasks: int = 1  # reformat-only re-asks for a rule whose verdict fails validation
+    portfolio_workers: int = 4  # contracts assessed concurrently in portfolio mode
+    verdict_cache_path: Path = paths.VERDICT_CACHE_FILE
     allowed_extensions: tuple[str, ...] = (".pdf", ".txt")
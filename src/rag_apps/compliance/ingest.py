@@ -2,21 +2,28 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
 from pathlib import Path
-from typing import Iterable, List
-
-from langchain.schema import Document
-from pypdf import PdfReader
+from typing import TYPE_CHECKING, Iterable, List
 
 from rag_apps.common.chunking import chunk_documents
 from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.manifest import BuildManifest, config_hash, file_digest, source_fingerprint
 from .config import ComplianceConfig
 
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
 
 LOGGER = get_logger(__name__)
 
+# Fields that change the chunks (and therefore the stored vectors).
+BUILD_FIELDS = ("chunk_size", "chunk_overlap", "chunking_strategy", "allowed_extensions")
+
 
 def extract_pdf_text(path: Path) -> str:
+    from pypdf import PdfReader
+
     reader = PdfReader(str(path))
     pages = [page.extract_text() or "" for page in reader.pages]
     return "\n".join(pages)
@@ -35,22 +42,48 @@ def iter_contract_files(config: ComplianceConfig) -> Iterable[Path]:
                 yield path
 
 
-def load_documents(config: ComplianceConfig, limit: int | None = None) -> List[Document]:
+def build_hash(config: ComplianceConfig, strategy: str | None = None) -> str:
+    """Hash of the build settings, optionally with the chunking ``strategy`` a store was built with."""
+    if strategy:
+        return config_hash(config, BUILD_FIELDS, chunking_strategy=strategy)
+    return config_hash(config, BUILD_FIELDS)
+
+
+def corpus_fingerprint(config: ComplianceConfig, limit: int | None = None) -> str | None:
+    files = list(iter_contract_files(config))
+    if not files:
+        return None
+    return source_fingerprint(files[:limit] if limit else files, config.pdf_dir.parent, limit)
+
+
+def load_documents(
+    config: ComplianceConfig,
+    limit: int | None = None,
+    manifest: BuildManifest | None = None,
+) -> List[Document]:
+    from langchain.schema import Document
+
     documents: List[Document] = []
     for idx, path in enumerate(iter_contract_files(config)):
         if limit and idx >= limit:
             break
         LOGGER.info("Reading %s", path)
+        started = time.perf_counter()
         text = extract_pdf_text(path) if path.suffix.lower() == ".pdf" else read_text_file(path)
-        if not text.strip():
-            continue
         base_root = config.pdf_dir.parent  # CUAD_v1 root
         try:
             relative_path = path.relative_to(base_root)
         except ValueError:
             relative_path = path.name
+        if manifest is not None:
+            manifest.record_file(str(relative_path), time.perf_counter() - started, path.stat().st_size)
+        if not text.strip():
+            continue
+        if manifest is not None:
+            manifest.add_content(str(relative_path), text)
         metadata = {
             "doc_name": path.stem,
+            "doc_id": str(relative_path),
             "source_path": str(relative_path),
             "file_type": path.suffix.lower(),
         }
@@ -68,22 +101,51 @@ def persist_chunks(chunks: List[Document], output_path: Path) -> None:
     LOGGER.info("Persisted %d chunks to %s", len(chunks), output_path)
 
 
-def build_chunks(config: ComplianceConfig, limit: int | None = None) -> List[Document]:
-    docs = load_documents(config, limit)
-    chunks = chunk_documents(docs, config.chunk_size, config.chunk_overlap)
-    persist_chunks(chunks, config.cache_path)
+def build_chunks(
+    config: ComplianceConfig,
+    limit: int | None = None,
+    manifest: BuildManifest | None = None,
+) -> List[Document]:
+    """Extract, chunk and cache contracts, timing each stage in ``manifest`` (written to ``chunk_manifest_path``)."""
+    manifest = manifest or BuildManifest("compliance")
+    with manifest.stage("extract") as stats:
+        docs = load_documents(config, limit, manifest)
+        stats["docs"] = len(docs)
+        stats["bytes"] = sum(len(doc.page_content) for doc in docs)
+    with manifest.stage("chunk") as stats:
+        chunks = chunk_documents(
+            docs,
+            config.chunk_size,
+            config.chunk_overlap,
+            workers=config.chunk_workers,
+            sections="contract" if config.chunking_strategy == "sections" else None,
+        )
+        stats["docs"] = len(docs)
+        stats["chunks"] = len(chunks)
+    with manifest.stage("cache_write") as stats:
+        persist_chunks(chunks, config.cache_path)
+        stats["chunks"] = len(chunks)
+        stats["bytes"] = config.cache_path.stat().st_size
+    manifest.config_hash = build_hash(config)
+    manifest.chunking_strategy = config.chunking_strategy
+    manifest.corpus_fingerprint = corpus_fingerprint(config, limit) or ""
+    manifest.limit = limit
+    manifest.chunk_cache = file_digest(config.cache_path)
+    manifest.write(config.chunk_manifest_path)
     return chunks
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Ingest CUAD contracts and create cached chunks")
     parser.add_argument("--limit", type=int, default=None, help="Restrict number of files for quick runs")
+    parser.add_argument("--workers", type=int, default=1, help="Chunking processes")
+    parser.add_argument("--strategy", choices=("recursive", "sections"), default="recursive", help="Chunking strategy")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    config = ComplianceConfig()
+    config = ComplianceConfig(chunk_workers=args.workers, chunking_strategy=args.strategy)
     build_chunks(config, limit=args.limit)
 
 
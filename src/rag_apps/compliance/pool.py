@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain.schema import Document
+
+from rag_apps.common.vectors import as_matrix, combine, normalize, top_k
+from rag_apps.common.vectorstores import StoredChunk, search_with_embeddings
+
+
+@dataclass
+class AssessmentStats:
+    rules: int = 0
+    store_queries: int = 0
+    fallbacks: int = 0
+    pool_size: int = 0
+
+    @property
+    def store_queries_saved(self) -> int:
+        return max(self.rules - self.store_queries, 0)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "store_queries_saved": self.store_queries_saved}
+
+
+@dataclass
+class CandidatePool:
+    """Chunks retrieved once for the business question and re-scored locally per rule.
+
+    A rule is answered from the pool only when no chunk outside it can
+    outrank the pool's k-th hit. An unseen chunk scores at most the pool's
+    lowest question score against the question and at most 1.0 against the
+    rule, so by default the shortcut is exact. With ``approx_margin`` set, an
+    unseen chunk is instead assumed to score no more than the pool's best rule
+    score plus that margin, which answers more rules from the pool but can
+    miss a chunk that matches the rule far better than the question.
+    """
+
+    store: any
+    question_vector: np.ndarray
+    chunks: List[StoredChunk]
+    exhaustive: bool
+    stats: AssessmentStats = field(default_factory=AssessmentStats)
+    passages: Dict[tuple, str] = field(default_factory=dict)
+    where: Optional[Dict[str, Any]] = None
+    approx_margin: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        self._matrix = normalize(as_matrix([chunk.embedding for chunk in self.chunks])) if self.chunks else None
+        self._question_scores = (
+            self._matrix @ normalize(self.question_vector) if self._matrix is not None else np.zeros(0, dtype=np.float32)
+        )
+        self._floor = float(self._question_scores.min()) if len(self._question_scores) else -1.0
+        self.stats.pool_size = len(self.chunks)
+
+    @classmethod
+    def fetch(
+        cls,
+        store: any,
+        question_vector: Sequence[float],
+        size: int,
+        where: Optional[Dict[str, Any]] = None,
+        approx_margin: Optional[float] = None,
+    ) -> "CandidatePool":
+        """Pool of the ``size`` best chunks for the question; ``where`` restricts it (and fallbacks) by metadata."""
+        chunks = search_with_embeddings(store, question_vector, size, where)
+        pool = cls(
+            store=store,
+            question_vector=np.asarray(question_vector, dtype=np.float32),
+            chunks=chunks,
+            exhaustive=len(chunks) < size,
+            where=where,
+            approx_margin=approx_margin,
+        )
+        pool.stats.store_queries += 1
+        return pool
+
+    def rank(self, rule_vector: Sequence[float], k: int) -> Optional[List[Document]]:
+        """Top-k pool documents for the question+rule intent, or ``None`` if the pool is insufficient."""
+        if self._matrix is None or (len(self.chunks) < k and not self.exhaustive):
+            return None
+        rule_scores = self._matrix @ normalize(np.asarray(rule_vector, dtype=np.float32))
+        norm = float(np.linalg.norm(normalize(self.question_vector) + normalize(np.asarray(rule_vector, dtype=np.float32))))
+        scores = (self._question_scores + rule_scores) / (norm or 1.0)
+        order = top_k(scores, k)
+        if not self.exhaustive:
+            best_unseen = 1.0 if self.approx_margin is None else min(float(rule_scores.max()) + self.approx_margin, 1.0)
+            ceiling = (self._floor + best_unseen) / (norm or 1.0)
+            if float(scores[order[-1]]) < ceiling:
+                return None
+        return [self.chunks[i].document for i in order]
+
+    def retrieve(self, rule_vector: Sequence[float], k: int) -> List[Document]:
+        self.stats.rules += 1
+        docs = self.rank(rule_vector, k)
+        if docs is not None:
+            return docs
+        self.stats.fallbacks += 1
+        self.stats.store_queries += 1
+        query_vector = combine(self.question_vector, rule_vector)
+        return [chunk.document for chunk in search_with_embeddings(self.store, query_vector, k, self.where)]
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from rag_apps.common import paths
+from rag_apps.common.instrumentation import counter, span
+from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.vectorstores import iter_stored_chunks
+from .agent import PROMPT, ComplianceAgent
+from .pool import CandidatePool
+from .rule_index import RuleEmbeddingIndex
+from .rules import Rule
+
+
+LOGGER = get_logger(__name__)
+
+PORTFOLIO_CELLS = counter("compliance_portfolio_cells_total", "Portfolio (contract, rule) cells by outcome")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key TEXT PRIMARY KEY,
+    contract TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+def contract_fingerprints(store: Any, names: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """Content hash of every contract (``doc_name``) in the store, from its indexed chunk texts.
+
+    Chunk ids are random per build, so the hash covers only text and position and
+    stays stable across re-ingests of an unchanged contract.
+    """
+    wanted = set(names) if names is not None else None
+    chunks: Dict[str, List[tuple]] = {}
+    for _, text, metadata in iter_stored_chunks(store):
+        name = metadata.get("doc_name")
+        if name is None or (wanted is not None and name not in wanted):
+            continue
+        position = metadata.get("start_index", metadata.get("chunk_index", -1))
+        chunks.setdefault(name, []).append((str(metadata.get("doc_id", "")), position, text))
+    fingerprints = {}
+    for name in sorted(chunks):
+        digest = hashlib.sha256()
+        for doc_id, position, text in sorted(chunks[name]):
+            digest.update(f"{doc_id}\x00{position}\x00{text}\x00".encode("utf-8"))
+        fingerprints[name] = digest.hexdigest()
+    return fingerprints
+
+
+def assessment_fingerprint(agent: ComplianceAgent) -> str:
+    """Hash of the settings that change a verdict for the same contract text and rule."""
+    payload = json.dumps(
+        [
+            PROMPT,
+            getattr(agent.chain.llm, "model_name", type(agent.chain.llm).__name__),
+            agent.retriever_k,
+            agent.neighbour_window,
+            agent.passage_char_limit,
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cell_key(contract_hash: str, rule: Rule, question: str, settings: str) -> str:
+    payload = json.dumps([contract_hash, rule.content_hash, question.strip(), settings])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """Per-(contract, rule) verdicts that outlive a run, keyed by :func:`cell_key`.
+
+    An edited contract, rule, question or prompt changes the key, so stale
+    verdicts are simply never looked up again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, dict]:
+        found: Dict[str, dict] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = list(keys[start:start + 500])
+                placeholders = ",".join("?" * len(batch))
+                for key, value in self._conn.execute(
+                    f"SELECT key, value FROM verdicts WHERE key IN ({placeholders})", batch
+                ):
+                    found[key] = json.loads(value)
+        return found
+
+    def put(self, key: str, contract: str, rule_id: str, result: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts (key, contract, rule_id, value, created) VALUES (?, ?, ?, ?, ?)",
+                (key, contract, rule_id, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+
+@dataclass
+class PortfolioProgress:
+    total: int
+    assessed: int = 0
+    cached: int = 0
+    resumed: int = 0
+    failed: int = 0
+    unparsed: int = 0  # assessed, but the verdict never validated; reported, not checkpointed or cached
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def done(self) -> int:
+        return self.assessed + self.unparsed + self.cached + self.resumed + self.failed
+
+    @property
+    def rate(self) -> float:
+        """Assessed cells per second; reused cells are free and would skew the ETA."""
+        elapsed = time.perf_counter() - self.started
+        return (self.assessed + self.unparsed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        return (self.total - self.done) / self.rate if self.rate else None
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "done": self.done,
+            "assessed": self.assessed,
+            "cached": self.cached,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "unparsed": self.unparsed,
+            "cells_per_second": round(self.rate, 3),
+            "eta_seconds": round(self.eta_seconds, 1) if self.eta_seconds is not None else None,
+        }
+
+
+def load_checkpoint(path: Path) -> Dict[str, dict]:
+    """Rows already written by an earlier (possibly interrupted) run, by cell key."""
+    rows: Dict[str, dict] = {}
+    if not path.exists():
+        return rows
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a torn final line from a crash
+            if isinstance(row, dict) and "key" in row and not row.get("parse_failed"):
+                rows[row["key"]] = row
+    return rows
+
+
+def default_checkpoint(question: str) -> Path:
+    digest = hashlib.sha256(question.strip().encode("utf-8")).hexdigest()[:12]
+    return paths.EVAL_OUTPUT_DIR / f"portfolio_{digest}.jsonl"
+
+
+def _ensure_rule_vectors(agent: ComplianceAgent) -> None:
+    if all(rule.id in agent.rule_vectors for rule in agent.rules):
+        return
+    if agent.rule_index is None:
+        agent.rule_index = RuleEmbeddingIndex(agent.embeddings, paths.RULE_EMBEDDING_CACHE)
+    agent.set_rules(agent.rules)
+
+
+def run_portfolio(
+    agent: ComplianceAgent,
+    question: str,
+    contracts: Optional[Sequence[str]] = None,
+    workers: int = 4,
+    cache: Optional[VerdictCache] = None,
+    checkpoint_path: Optional[Path] = None,
+    progress_every: float = 10.0,
+    on_progress: Optional[Callable[[PortfolioProgress], None]] = None,
+    on_row: Optional[Callable[[dict], None]] = None,
+) -> List[dict]:
+    """Assess every rule against every contract, retrieving only from that contract's chunks.
+
+    Each contract gets one filtered candidate pool that all rules re-rank, and
+    contracts run concurrently on ``workers`` threads. Finished cells are
+    appended to ``checkpoint_path`` as they complete, so re-running the same
+    question resumes where an interrupted run stopped. ``on_row`` sees every
+    finished cell once: reused cells first, then new ones as they complete.
+    """
+    if agent.store is None or agent.embeddings is None:
+        raise ValueError("Portfolio mode needs an agent with a vector store and embeddings")
+    fingerprints = contract_fingerprints(agent.store, contracts)
+    if contracts:
+        missing = sorted(set(contracts) - set(fingerprints))
+        if missing:
+            LOGGER.warning("Skipping %d contracts not in the index: %s", len(missing), ", ".join(missing[:10]))
+    rules = list(agent.rules)
+    settings = assessment_fingerprint(agent)
+    keys = {
+        (name, rule.id): cell_key(contract_hash, rule, question, settings)
+        for name, contract_hash in fingerprints.items()
+        for rule in rules
+    }
+    checkpoint_path = checkpoint_path or default_checkpoint(question)
+    checkpointed = load_checkpoint(checkpoint_path)
+    progress = PortfolioProgress(total=len(keys))
+    finished: Dict[str, dict] = {}
+    for key in keys.values():
+        if key in checkpointed:
+            finished[key] = checkpointed[key]
+            progress.resumed += 1
+    if cache is not None:
+        for key, row in cache.get_many([key for key in keys.values() if key not in finished]).items():
+            finished[key] = row
+            progress.cached += 1
+    PORTFOLIO_CELLS.inc(progress.resumed, outcome="resumed")
+    PORTFOLIO_CELLS.inc(progress.cached, outcome="cached")
+    pending = {
+        name: [rule for rule in rules if keys[(name, rule.id)] not in finished]
+        for name in fingerprints
+    }
+    pending = {name: todo for name, todo in pending.items() if todo}
+    if on_row is not None:
+        for row in finished.values():
+            on_row(row)
+    LOGGER.info(
+        "Portfolio: %d contracts x %d rules = %d cells (%d resumed, %d cached, %d to assess on %d workers)",
+        len(fingerprints),
+        len(rules),
+        progress.total,
+        progress.resumed,
+        progress.cached,
+        sum(len(todo) for todo in pending.values()),
+        workers,
+    )
+
+    lock = threading.Lock()
+    last_report = [time.perf_counter()]
+    checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint = checkpoint_path.open("a", encoding="utf-8")
+
+    def report(force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - last_report[0] < progress_every:
+            return
+        last_report[0] = now
+        eta = progress.eta_seconds
+        LOGGER.info(
+            "Portfolio progress: %d/%d cells (%d failed, %d unparsed), %.2f cells/s, ETA %s",
+            progress.done,
+            progress.total,
+            progress.failed,
+            progress.unparsed,
+            progress.rate,
+            f"{eta:.0f}s" if eta is not None else "n/a",
+        )
+
+    def record(key: str, row: Optional[dict]) -> None:
+        with lock:
+            if row is None:
+                progress.failed += 1
+            else:
+                finished[key] = row
+                if row.get("parse_failed"):
+                    # Reported, but left out of the checkpoint and cache so the next run retries it.
+                    progress.unparsed += 1
+                else:
+                    progress.assessed += 1
+                    checkpoint.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                if on_row is not None:
+                    on_row(row)
+            report()
+            if on_progress is not None:
+                on_progress(progress)
+        if row is not None and cache is not None and not row.get("parse_failed"):
+            cache.put(key, row["contract"], row["rule_id"], row)
+
+    def assess_contract(name: str, todo: List[Rule], question_vector: Sequence[float]) -> None:
+        with span("compliance.portfolio_contract", contract=name, rules=len(todo)):
+            pool = CandidatePool.fetch(
+                agent.store,
+                question_vector,
+                max(agent.pool_k, agent.retriever_k),
+                where={"doc_name": name},
+                approx_margin=agent.pool_approx_margin,
+            )
+            for rule in todo:
+                key = keys[(name, rule.id)]
+                try:
+                    result = agent.assess_rule(rule, question, pool)
+                except Exception as exc:  # noqa: BLE001 - one bad cell must not sink the run
+                    LOGGER.warning("Portfolio cell %s / %s failed: %s", name, rule.id, exc)
+                    PORTFOLIO_CELLS.inc(outcome="failed")
+                    record(key, None)
+                    continue
+                PORTFOLIO_CELLS.inc(outcome="unparsed" if result.get("parse_failed") else "assessed")
+                record(key, {"key": key, "contract": name, "contract_hash": fingerprints[name], **result})
+
+    try:
+        if pending:
+            _ensure_rule_vectors(agent)
+            question_vector = agent.embeddings.embed_query(question)
+            with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="portfolio") as executor:
+                futures = [executor.submit(assess_contract, name, todo, question_vector) for name, todo in pending.items()]
+                for future in as_completed(futures):
+                    future.result()
+    finally:
+        checkpoint.close()
+    report(force=True)
+
+    rows = []
+    for name in fingerprints:
+        for rule in rules:
+            row = finished.get(keys[(name, rule.id)])
+            if row is not None:
+                rows.append(row)
+    return rows
+
+
+def verdict_matrix(rows: Iterable[dict], rule_ids: Sequence[str]) -> List[dict]:
+    """One row per contract with a verdict column per rule; unassessed cells are empty."""
+    matrix: Dict[str, dict] = {}
+    for row in rows:
+        entry = matrix.setdefault(row["contract"], {"contract": row["contract"], **{rule_id: "" for rule_id in rule_ids}})
+        entry[row["rule_id"]] = row["verdict"]
+    for entry in matrix.values():
+        verdicts = [entry[rule_id] for rule_id in rule_ids]
+        entry["non_compliant"] = sum(verdict == "Non-Compliant" for verdict in verdicts)
+        entry["not_found"] = sum(verdict == "NotFound" for verdict in verdicts)
+    return list(matrix.values())
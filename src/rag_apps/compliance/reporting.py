@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import csv
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from rag_apps.common.logging_utils import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+RULE_COLUMNS = ("rule_id", "category", "severity", "verdict", "evidence", "remediation", "source_summary")
+PORTFOLIO_COLUMNS = ("contract", "contract_hash") + RULE_COLUMNS
+FORMATS = ("csv", "jsonl", "md", "parquet")
+
+
+def summarize_sources(sources: list[dict]) -> str:
+    if not sources:
+        return ""
+    return "; ".join(f"{item.get('doc_name')} ({item.get('file_type')})" for item in sources)
+
+
+def report_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten one rule verdict for tabular output: evidence joined, sources summarised."""
+    row = {key: value for key, value in result.items() if key not in ("sources", "key")}
+    evidence = row.get("evidence")
+    if isinstance(evidence, list):
+        row["evidence"] = "; ".join(evidence)
+    row["source_summary"] = summarize_sources(result.get("sources") or [])
+    return row
+
+
+class ReportSink(ABC):
+    """Append-only report file with a fixed column order."""
+
+    suffix = ""
+
+    def __init__(self, path: Path, columns: Sequence[str]):
+        self.path = Path(path)
+        self.columns = list(columns)
+        self.rows = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @abstractmethod
+    def write(self, row: Dict[str, Any]) -> None:
+        """Append one row; columns missing from ``row`` are left empty."""
+
+    def close(self) -> None:
+        pass
+
+
+class CsvSink(ReportSink):
+    suffix = ".csv"
+
+    def __init__(self, path: Path, columns: Sequence[str]):
+        super().__init__(path, columns)
+        self._handle = self.path.open("w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._handle, fieldnames=self.columns, extrasaction="ignore")
+        self._writer.writeheader()
+        self._handle.flush()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._writer.writerow(row)
+        self._handle.flush()
+        self.rows += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class JsonlSink(ReportSink):
+    suffix = ".jsonl"
+
+    def __init__(self, path: Path, columns: Sequence[str]):
+        super().__init__(path, columns)
+        self._handle = self.path.open("w", encoding="utf-8")
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._handle.write(json.dumps({column: row.get(column) for column in self.columns}, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        self.rows += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class MarkdownSink(ReportSink):
+    """GitHub-flavoured pipe table written row by row, without pandas/tabulate."""
+
+    suffix = ".md"
+
+    def __init__(self, path: Path, columns: Sequence[str]):
+        super().__init__(path, columns)
+        self._handle = self.path.open("w", encoding="utf-8")
+        self._handle.write(self._line(self.columns))
+        self._handle.write(self._line(["---"] * len(self.columns)))
+        self._handle.flush()
+
+    @staticmethod
+    def _cell(value: Any) -> str:
+        text = "" if value is None else str(value)
+        return text.replace("|", "\\|").replace("\r", "").replace("\n", "<br>")
+
+    def _line(self, cells: Iterable[Any]) -> str:
+        return "| " + " | ".join(self._cell(cell) for cell in cells) + " |\n"
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._handle.write(self._line(row.get(column) for column in self.columns))
+        self._handle.flush()
+        self.rows += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class ParquetSink(ReportSink):
+    """Buffers rows into Parquet row groups; the file is only readable once closed."""
+
+    suffix = ".parquet"
+
+    def __init__(self, path: Path, columns: Sequence[str], row_group_size: int = 1000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as exc:
+            raise RuntimeError(f"Parquet reports need a working pyarrow install ({exc})") from exc
+        super().__init__(path, columns)
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.row_group_size = row_group_size
+        self._buffer: List[Dict[str, Any]] = []
+        self._writer = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._buffer.append({column: row.get(column) for column in self.columns})
+        self.rows += 1
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        schema = self._writer.schema if self._writer is not None else None
+        table = self._pa.Table.from_pylist(self._buffer, schema=schema)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonlSink, "md": MarkdownSink, "parquet": ParquetSink}
+
+
+class ReportWriter:
+    """Fans every row out to one sink per format as soon as it arrives.
+
+    CSV, JSONL and Markdown are flushed per row, so a crash leaves a valid
+    report of the rows finished so far.
+    """
+
+    def __init__(self, base_path: Path, formats: Sequence[str], columns: Sequence[str]):
+        unknown = sorted(set(formats) - set(SINKS))
+        if unknown:
+            raise ValueError(f"Unknown report formats: {', '.join(unknown)}")
+        self.sinks: List[ReportSink] = []
+        try:
+            for name in formats:
+                sink_class = SINKS[name]
+                self.sinks.append(sink_class(Path(f"{base_path}{sink_class.suffix}"), columns))
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def paths(self) -> List[Path]:
+        return [sink.path for sink in self.sinks]
+
+    @property
+    def rows(self) -> int:
+        return self.sinks[0].rows if self.sinks else 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            sink.write(row)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        self.close()
+        if exc_type is not None:
+            LOGGER.warning("Report interrupted after %d rows; partial output kept in %s", self.rows, self.paths[0] if self.sinks else "-")
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from rag_apps.common.logging_utils import get_logger
+from .rules import Rule
+
+
+LOGGER = get_logger(__name__)
+
+
+class RuleEmbeddingIndex:
+    """Persistent rule-description embeddings keyed by model and description hash.
+
+    Vectors survive process restarts, so a new question or an edited rules file
+    only pays for embedding the descriptions that are actually new.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: Path, model_name: str | None = None):
+        self.embeddings = embeddings
+        self.path = Path(path)
+        self.model_name = model_name or getattr(embeddings, "model_name", type(embeddings).__name__)
+        self._vectors: Dict[str, List[float]] = self._load()
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[float]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            LOGGER.warning("Discarding unreadable rule embedding cache %s: %s", self.path, exc)
+            return {}
+
+    def _persist(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(self._vectors, handle)
+        tmp_path.replace(self.path)
+
+    def key(self, rule: Rule) -> str:
+        return hashlib.sha256(f"{self.model_name}\n{rule.description}".encode("utf-8")).hexdigest()
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        embed_queries = getattr(self.embeddings, "embed_queries", None)
+        if embed_queries is not None:
+            return embed_queries(texts)
+        return [self.embeddings.embed_query(text) for text in texts]
+
+    def vectors_for(self, rules: List[Rule]) -> Dict[str, List[float]]:
+        """Map rule id to its description embedding, embedding only unseen descriptions."""
+        with self._lock:
+            missing = {self.key(rule): rule.description for rule in rules if self.key(rule) not in self._vectors}
+            if missing:
+                LOGGER.info("Embedding %d new or changed rule descriptions", len(missing))
+                vectors = self._embed(list(missing.values()))
+                self._vectors.update(zip(missing.keys(), vectors))
+                self._persist()
+            return {rule.id: self._vectors[self.key(rule)] for rule in rules}
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Callable, List, Optional
 
 from rag_apps.common.logging_utils import get_logger
 from .config import ComplianceConfig
@@ -19,6 +21,11 @@ class Rule:
     description: str
     severity: str
 
+    @property
+    def content_hash(self) -> str:
+        payload = json.dumps([self.id, self.category, self.description, self.severity])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 def load_rules(path: Path | None = None) -> List[Rule]:
     config = ComplianceConfig()
@@ -30,3 +37,42 @@ def load_rules(path: Path | None = None) -> List[Rule]:
         raise ValueError("At least 15 compliance rules are required")
     LOGGER.info("Loaded %d compliance rules", len(rules))
     return rules
+
+
+class RuleSetWatcher:
+    """Polls the rules file and reparses it only when its mtime or size changes."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._signature = self._stat()
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self, apply: Callable[[List[Rule]], None]) -> Optional[List[Rule]]:
+        """Parse the rules file if it changed, hand the rules to ``apply`` and return them; otherwise ``None``.
+
+        Concurrent callers are serialised, so one edit is parsed and applied
+        once. The edit only counts as seen after ``apply`` returns: if it raises
+        (e.g. re-embedding failed) the next poll tries again. An unreadable or
+        invalid edit is logged and skipped so the caller keeps serving the
+        previous rule set until the file is fixed.
+        """
+        with self._lock:
+            signature = self._stat()
+            if signature == self._signature:
+                return None
+            try:
+                rules = load_rules(self.path)
+            except (OSError, ValueError, TypeError) as exc:
+                LOGGER.error("Ignoring invalid rules file %s: %s", self.path, exc)
+                self._signature = signature
+                return None
+            apply(rules)
+            self._signature = signature
+            return rules
@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
+from typing import TYPE_CHECKING
+
 import streamlit as st
 
 from rag_apps.common.logging_utils import get_logger
-from .agent import ComplianceAgent, build_agent
+from rag_apps.common.warmup import await_ready, start_in_background
+from .rules import load_rules
+
+if TYPE_CHECKING:
+    from .agent import ComplianceAgent
 
 
 LOGGER = get_logger(__name__)
 
 
+def _build_agent() -> ComplianceAgent:
+    from .agent import build_agent
+
+    return build_agent()
+
+
 @st.cache_resource(show_spinner=False)
+def warm_up_agent() -> Future:
+    LOGGER.info("Warming up compliance agent in the background")
+    return start_in_background("compliance-warmup", _build_agent)
+
+
 def load_agent() -> ComplianceAgent:
-    LOGGER.info("Loading compliance agent inside Streamlit")
-    return build_agent()
+    return await_ready(warm_up_agent(), warm_up_agent.clear)
 
 
 def render_results(results: list[dict]) -> None:
@@ -34,9 +51,17 @@ def main() -> None:
     st.title("📋 Policy Compliance Checker")
     st.write("Evaluate CUAD contracts against custom policy rules with LangChain + Gemini.")
 
-    agent = load_agent()
-    severities = sorted({rule.severity for rule in agent.rules})
-    categories = sorted({rule.category for rule in agent.rules})
+    warmup = warm_up_agent()
+    if warmup.done() and not warmup.exception():
+        agent = warmup.result()
+        if agent.refresh_rules():
+            st.toast(f"Reloaded {len(agent.rules)} rules from disk")
+        rules = agent.rules
+    else:
+        st.caption("Loading the vector store and Gemini clients in the background...")
+        rules = load_rules()
+    severities = sorted({rule.severity for rule in rules})
+    categories = sorted({rule.category for rule in rules})
 
     with st.form("compliance-form"):
         question = st.text_area(
@@ -49,19 +74,21 @@ def main() -> None:
         submitted = st.form_submit_button("Run Assessment")
 
     if submitted:
+        if not question.strip():
+            st.warning("Please enter a compliance question.")
+            return
+        with st.spinner("Waiting for the compliance agent to finish loading..."):
+            agent = load_agent()
         active_rules = [
             rule
             for rule in agent.rules
             if rule.severity in selected_severities and rule.category in selected_categories
         ]
-        if not question.strip():
-            st.warning("Please enter a compliance question.")
-            return
         if not active_rules:
             st.warning("No rules match the current filters.")
             return
         with st.spinner(f"Evaluating {len(active_rules)} rules..."):
-            results = [agent.assess_rule(rule, question) for rule in active_rules]
+            results = agent.run_assessment(question, rules=active_rules)
         render_results(results)
 
     st.caption("Build the vector store first via `python -m rag_apps.compliance.build_vector_store`. ")
@@ -3,22 +3,23 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from langchain.schema import Document
-
-from rag_apps.common.key_manager import GeminiKeyManager
-from rag_apps.common.llm import RotatingGeminiEmbeddings
 from rag_apps.common.logging_utils import get_logger
-from rag_apps.common.vectorstores import build_chroma_store
+from rag_apps.common.manifest import BuildManifest, file_digest
 from .config import MedicalRAGConfig
-from .prepare_dataset import prepare_chunks
+from .prepare_dataset import build_hash, prepare_chunks
+
+if TYPE_CHECKING:
+    from langchain.schema import Document
 
 
 LOGGER = get_logger(__name__)
 
 
 def load_cached_chunks(cache_path: Path) -> List[Document]:
+    from langchain.schema import Document
+
     with cache_path.open("r", encoding="utf-8") as handle:
         return [
             Document(page_content=line_obj["page_content"], metadata=line_obj["metadata"])
@@ -26,20 +27,42 @@ def load_cached_chunks(cache_path: Path) -> List[Document]:
         ]
 
 
-def ensure_chunks(config: MedicalRAGConfig, force: bool) -> List[Document]:
+def ensure_chunks(config: MedicalRAGConfig, force: bool, manifest: BuildManifest | None = None) -> List[Document]:
+    manifest = manifest or BuildManifest("medical")
     if config.cache_path.exists() and not force:
         LOGGER.info("Loading chunks from %s", config.cache_path)
-        return load_cached_chunks(config.cache_path)
+        with manifest.stage("cache_load") as stats:
+            chunks = load_cached_chunks(config.cache_path)
+            stats["chunks"] = len(chunks)
+        if not manifest.continue_from(BuildManifest.load(config.chunk_manifest_path), config.cache_path):
+            LOGGER.warning("No chunk manifest matches %s; its chunking settings are unknown", config.cache_path)
+            manifest.chunk_cache = file_digest(config.cache_path)
+        elif manifest.config_hash != build_hash(config):
+            message = f"chunk cache {config.cache_path} was built with different chunking settings; pass --force-chunks"
+            LOGGER.warning("%s", message)
+            manifest.warnings.append(message)
+        return chunks
     LOGGER.info("Cache missing or force rebuild requested; creating fresh chunks")
-    return prepare_chunks(config)
-
-
-def build_store(force_chunks: bool = False, force_store: bool = False) -> None:
-    config = MedicalRAGConfig()
-    chunks = ensure_chunks(config, force_chunks)
-    manager = GeminiKeyManager.from_defaults()
-    embeddings = RotatingGeminiEmbeddings(manager)
-    build_chroma_store(chunks, embeddings, config.persist_directory, force_recreate=force_store)
+    return prepare_chunks(config, manifest=manifest)
+
+
+def build_store(force_chunks: bool = False, force_store: bool = False, strategy: str = "recursive") -> None:
+    config = MedicalRAGConfig(chunking_strategy=strategy)
+    manifest = BuildManifest("medical")
+    chunks = ensure_chunks(config, force_chunks, manifest)
+    from rag_apps.common.resources import shared_resources
+    from rag_apps.common.vectorstores import build_chroma_store, count_vectors
+
+    embeddings = shared_resources().embeddings("medical")
+    usage = BuildManifest.usage_snapshot()
+    with manifest.stage("embed_store") as stats:
+        store = build_chroma_store(chunks, embeddings, config.persist_directory, force_recreate=force_store)
+        stats["chunks"] = len(chunks)
+        stats["bytes"] = sum(len(chunk.page_content) for chunk in chunks)
+    manifest.embedding_model = embeddings.model_name
+    manifest.vectors = count_vectors(store)
+    manifest.capture_embedding_usage(usage)
+    manifest.write(config.manifest_path)
     LOGGER.info("Medical vector store ready at %s", config.persist_directory)
 
 
@@ -47,12 +70,13 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Create or refresh the medical vector store")
     parser.add_argument("--force-chunks", action="store_true", help="Regenerate chunks even if cache exists")
     parser.add_argument("--force-store", action="store_true", help="Rebuild vector store from scratch")
+    parser.add_argument("--strategy", choices=("recursive", "sections"), default="recursive", help="Chunking strategy")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    build_store(force_chunks=args.force_chunks, force_store=args.force_store)
+    build_store(force_chunks=args.force_chunks, force_store=args.force_store, strategy=args.strategy)
 
 
 if __name__ == "__main__":
@@ -11,8 +11,27 @@ class MedicalRAGConfig:
     dataset_path: Path = paths.MEDICAL_DATASET
     chunk_size: int = 1200
     chunk_overlap: int = 200
+    chunk_workers: int = 1
+    chunking_strategy: str = "recursive"  # or "sections" to split at transcript headings
     persist_directory: Path = paths.MEDICAL_VECTOR_DIR
+    vector_backend: str = "chroma"  # or "memmap" to search an exported read-only index
+    index_quantization: str = "none"  # "int8" scans int8 codes of the memmap index
+    index_dimensions: int = 0  # > 0 scans vectors reduced to this many dimensions
+    index_reduction: str = "truncate"  # or "pca"
+    index_rescore_factor: int = 4  # float re-scoring of k * factor candidates; 0 trusts the compressed scores
+    llm_cache: bool = False  # reuse generations for byte-identical prompts; the report and eval CLIs turn it on
+    llm_cache_path: Path = paths.LLM_CACHE_FILE
+    llm_cache_max_mb: int = 256
+    embed_batch_wait_ms: float = 0.0  # > 0 micro-batches concurrent query embeddings (serving)
+    embed_batch_size: int = 32
+    index_directory: Path = paths.MEDICAL_INDEX_DIR
     cache_path: Path = paths.MEDICAL_CHUNK_CACHE
+    chunk_manifest_path: Path = paths.MEDICAL_CHUNK_MANIFEST
+    manifest_path: Path = paths.MEDICAL_BUILD_MANIFEST
+    stale_store_policy: str = "error"  # or "warn"/"ignore" when the store no longer matches its build manifest
+    retriever_k: int = 6
+    neighbour_window: int = 1
+    dedupe_neighbours: bool = True
     specialty_field: str = "medical_specialty"
     transcription_field: str = "transcription"
     metadata_fields: tuple[str, ...] = (
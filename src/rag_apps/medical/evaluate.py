@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import argparse
 import json
+from pathlib import Path
 
 from rag_apps.common import paths
 from rag_apps.common.evaluation import run_batch_queries
+from rag_apps.common.instrumentation import REGISTRY
 from rag_apps.common.logging_utils import get_logger
-from .pipeline import build_pipeline
+from rag_apps.common.manifest import STALE_STORE_POLICIES
 
 
 LOGGER = get_logger(__name__)
@@ -18,8 +20,16 @@ def load_queries(limit: int | None = None) -> list[str]:
     return queries[:limit] if limit else queries
 
 
-def evaluate(limit: int | None = None) -> None:
-    pipeline = build_pipeline()
+def evaluate(
+    limit: int | None = None,
+    metrics_out: Path | None = None,
+    use_cache: bool = True,
+    stale_store: str = "error",
+) -> None:
+    from .config import MedicalRAGConfig
+    from .pipeline import build_pipeline
+
+    pipeline = build_pipeline(MedicalRAGConfig(llm_cache=use_cache, stale_store_policy=stale_store))
     queries = load_queries(limit)
     LOGGER.info("Running evaluation on %d queries", len(queries))
     run_batch_queries(
@@ -28,17 +38,25 @@ def evaluate(limit: int | None = None) -> None:
         paths.EVAL_OUTPUT_DIR,
         prefix="medical_eval",
     )
+    cache = pipeline.chain.llm.cache
+    if cache:
+        cache.log_stats("Medical LLM cache")
+    if metrics_out:
+        LOGGER.info("Wrote stage metrics to %s", REGISTRY.write(metrics_out))
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Evaluate medical RAG answers")
     parser.add_argument("--limit", type=int, default=None, help="Restrict query count for smoke tests")
+    parser.add_argument("--no-cache", action="store_true", help="Call Gemini for every query instead of reusing cached generations")
+    parser.add_argument("--stale-store", choices=STALE_STORE_POLICIES, default="error", help="What to do when the vector store no longer matches its build manifest")
+    parser.add_argument("--metrics-out", type=Path, default=None, help="Write stage timings (.json or .prom)")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    evaluate(limit=args.limit)
+    evaluate(limit=args.limit, metrics_out=args.metrics_out, use_cache=not args.no_cache, stale_store=args.stale_store)
 
 
 if __name__ == "__main__":
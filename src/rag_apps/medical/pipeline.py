@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from functools import partial
+from typing import List, Optional
 
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 from langchain.schema import Document
 
-from rag_apps.common.key_manager import GeminiKeyManager
-from rag_apps.common.llm import RotatingGeminiChat, RotatingGeminiEmbeddings
+from rag_apps.common.instrumentation import span
+from rag_apps.common.llm_cache import open_llm_cache
 from rag_apps.common.logging_utils import get_logger
-from rag_apps.common.vectorstores import load_chroma_store
+from rag_apps.common.manifest import verify_build
+from rag_apps.common.neighbours import ChunkNeighbourIndex
+from rag_apps.common.resources import shared_resources
+from rag_apps.common.vector_index import IndexLayout
+from rag_apps.common.vectorstores import as_retriever
 from .config import MedicalRAGConfig
+from .prepare_dataset import build_hash, corpus_fingerprint
 
 
 LOGGER = get_logger(__name__)
@@ -60,24 +66,69 @@ def _summarize_sources(docs: List[Document]) -> List[dict]:
 class MedicalRAGPipeline:
     chain: LLMChain
     retriever: any
+    neighbours: Optional[ChunkNeighbourIndex] = None
+    neighbour_window: int = 0
+    dedupe_neighbours: bool = True
+
+    def retrieve(self, question: str) -> List[Document]:
+        with span("retrieval", app="medical") as record:
+            docs = self.retriever.get_relevant_documents(question)
+            record.set(hits=len(docs))
+        if self.neighbours is not None and self.neighbour_window > 0:
+            with span("retrieval.expand", app="medical", window=self.neighbour_window):
+                docs = self.neighbours.expand(docs, self.neighbour_window, dedupe=self.dedupe_neighbours)
+        return docs
 
     def answer(self, question: str) -> dict:
-        docs = self.retriever.get_relevant_documents(question)
-        if not docs:
-            return {"answer": "No relevant context found.", "sources": []}
-        context = _format_context(docs)
-        response = self.chain.invoke({"question": question, "context": context})
-        return {"answer": response["text"] if isinstance(response, dict) else response, "sources": _summarize_sources(docs)}
+        with span("medical.answer"):
+            docs = self.retrieve(question)
+            if not docs:
+                return {"answer": "No relevant context found.", "sources": []}
+            with span("prompt.format", app="medical") as record:
+                context = _format_context(docs)
+                record.set(context_chars=len(context))
+            response = self.chain.invoke({"question": question, "context": context})
+            return {"answer": response["text"] if isinstance(response, dict) else response, "sources": _summarize_sources(docs)}
 
 
 def build_pipeline(config: MedicalRAGConfig | None = None) -> MedicalRAGPipeline:
     config = config or MedicalRAGConfig()
-    manager = GeminiKeyManager.from_defaults()
-    chat = RotatingGeminiChat(manager)
-    embeddings = RotatingGeminiEmbeddings(manager)
-    vector_store = load_chroma_store(embeddings, config.persist_directory)
-    retriever = vector_store.as_retriever(search_kwargs={"k": 6})
+    resources = shared_resources()
+    cache = open_llm_cache(config.llm_cache_path, config.llm_cache_max_mb) if config.llm_cache else None
+    chat = resources.chat("medical", cache=cache)
+    embeddings = resources.embeddings("medical")
+    embedding_model = embeddings.model_name
+    if config.embed_batch_wait_ms > 0:
+        embeddings = resources.batcher("medical", embeddings, config.embed_batch_size, config.embed_batch_wait_ms)
+    vector_store = resources.vector_index(
+        embeddings,
+        config.persist_directory,
+        config.index_directory,
+        config.vector_backend,
+        IndexLayout(config.index_quantization, config.index_dimensions, config.index_reduction),
+        config.index_rescore_factor,
+    )
+    verify_build(
+        config.manifest_path,
+        partial(build_hash, config),
+        vector_store,
+        config.persist_directory,
+        chunk_cache=config.cache_path,
+        corpus=lambda limit: corpus_fingerprint(config, limit),
+        embedding_model=embedding_model,
+        policy=config.stale_store_policy,
+    )
+    retriever = as_retriever(vector_store, embeddings, config.retriever_k)
     prompt = PromptTemplate(template=PROMPT_TEMPLATE, input_variables=["context", "question"])
     chain = LLMChain(llm=chat, prompt=prompt)
+    neighbours = None
+    if config.neighbour_window > 0 and config.cache_path.exists():
+        neighbours = ChunkNeighbourIndex.from_cache(config.cache_path)
     LOGGER.info("Medical pipeline ready (vector dir: %s)", config.persist_directory)
-    return MedicalRAGPipeline(chain=chain, retriever=retriever)
+    return MedicalRAGPipeline(
+        chain=chain,
+        retriever=retriever,
+        neighbours=neighbours,
+        neighbour_window=config.neighbour_window,
+        dedupe_neighbours=config.dedupe_neighbours,
+    )
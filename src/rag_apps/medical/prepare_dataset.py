@@ -2,23 +2,51 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
 from pathlib import Path
-from typing import List
-
-import pandas as pd
-from langchain.schema import Document
+from typing import TYPE_CHECKING, List
 
 from rag_apps.common.chunking import chunk_documents
 from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.manifest import BuildManifest, config_hash, file_digest, source_fingerprint
 from .config import MedicalRAGConfig
 
+if TYPE_CHECKING:
+    from langchain.schema import Document
+
 
 LOGGER = get_logger(__name__)
 
+# Fields that change the chunks (and therefore the stored vectors).
+BUILD_FIELDS = ("chunk_size", "chunk_overlap", "chunking_strategy", "transcription_field", "metadata_fields")
+
+
+def build_hash(config: MedicalRAGConfig, strategy: str | None = None) -> str:
+    """Hash of the build settings, optionally with the chunking ``strategy`` a store was built with."""
+    if strategy:
+        return config_hash(config, BUILD_FIELDS, chunking_strategy=strategy)
+    return config_hash(config, BUILD_FIELDS)
+
+
+def corpus_fingerprint(config: MedicalRAGConfig, sample_size: int | None = None) -> str | None:
+    if not config.dataset_path.exists():
+        return None
+    return source_fingerprint([config.dataset_path], config.dataset_path.parent, sample_size)
+
+
+def load_medical_documents(
+    config: MedicalRAGConfig,
+    sample_size: int | None = None,
+    manifest: BuildManifest | None = None,
+) -> List[Document]:
+    import pandas as pd
+    from langchain.schema import Document
 
-def load_medical_documents(config: MedicalRAGConfig, sample_size: int | None = None) -> List[Document]:
     LOGGER.info("Loading medical dataset from %s", config.dataset_path)
+    started = time.perf_counter()
     df = pd.read_csv(config.dataset_path)
+    if manifest is not None:
+        manifest.record_file(config.dataset_path.name, time.perf_counter() - started, config.dataset_path.stat().st_size)
     if sample_size:
         df = df.head(sample_size)
 
@@ -32,8 +60,11 @@ def load_medical_documents(config: MedicalRAGConfig, sample_size: int | None = N
             continue
         metadata = {name: str(row.get(name, "")).strip() for name in config.metadata_fields}
         metadata["source_id"] = int(idx)
+        metadata["doc_id"] = f"mtsamples:{idx}"
         metadata["description"] = str(row.get("description", "")).strip()
         documents.append(Document(page_content=text, metadata=metadata))
+        if manifest is not None:
+            manifest.add_content(metadata["doc_id"], text)
     LOGGER.info("Loaded %d raw documents", len(documents))
     return documents
 
@@ -47,22 +78,51 @@ def persist_chunks(chunks: List[Document], output_path: Path) -> None:
     LOGGER.info("Persisted %d chunks to %s", len(chunks), output_path)
 
 
-def prepare_chunks(config: MedicalRAGConfig, sample_size: int | None = None) -> List[Document]:
-    documents = load_medical_documents(config, sample_size)
-    chunks = chunk_documents(documents, config.chunk_size, config.chunk_overlap)
-    persist_chunks(chunks, config.cache_path)
+def prepare_chunks(
+    config: MedicalRAGConfig,
+    sample_size: int | None = None,
+    manifest: BuildManifest | None = None,
+) -> List[Document]:
+    """Extract, chunk and cache transcriptions, timing each stage in ``manifest`` (written to ``chunk_manifest_path``)."""
+    manifest = manifest or BuildManifest("medical")
+    with manifest.stage("extract") as stats:
+        documents = load_medical_documents(config, sample_size, manifest)
+        stats["docs"] = len(documents)
+        stats["bytes"] = sum(len(doc.page_content) for doc in documents)
+    with manifest.stage("chunk") as stats:
+        chunks = chunk_documents(
+            documents,
+            config.chunk_size,
+            config.chunk_overlap,
+            workers=config.chunk_workers,
+            sections="transcript" if config.chunking_strategy == "sections" else None,
+        )
+        stats["docs"] = len(documents)
+        stats["chunks"] = len(chunks)
+    with manifest.stage("cache_write") as stats:
+        persist_chunks(chunks, config.cache_path)
+        stats["chunks"] = len(chunks)
+        stats["bytes"] = config.cache_path.stat().st_size
+    manifest.config_hash = build_hash(config)
+    manifest.chunking_strategy = config.chunking_strategy
+    manifest.corpus_fingerprint = corpus_fingerprint(config, sample_size) or ""
+    manifest.limit = sample_size
+    manifest.chunk_cache = file_digest(config.cache_path)
+    manifest.write(config.chunk_manifest_path)
     return chunks
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Prepare medical RAG dataset chunks")
     parser.add_argument("--sample-size", type=int, default=None, help="Limit rows for quick tests")
+    parser.add_argument("--workers", type=int, default=1, help="Chunking processes")
+    parser.add_argument("--strategy", choices=("recursive", "sections"), default="recursive", help="Chunking strategy")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    config = MedicalRAGConfig()
+    config = MedicalRAGConfig(chunk_workers=args.workers, chunking_strategy=args.strategy)
     prepare_chunks(config, sample_size=args.sample_size)
 
 
@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
+
 import streamlit as st
 
 from rag_apps.common.logging_utils import get_logger
-from .pipeline import build_pipeline
+from rag_apps.common.warmup import await_ready, start_in_background
 
 
 LOGGER = get_logger(__name__)
 
 
+def _build_pipeline():
+    from .pipeline import build_pipeline
+
+    return build_pipeline()
+
+
 @st.cache_resource(show_spinner=False)
+def warm_up_pipeline() -> Future:
+    LOGGER.info("Warming up medical RAG pipeline in the background")
+    return start_in_background("medical-warmup", _build_pipeline)
+
+
 def load_pipeline():
-    LOGGER.info("Loading medical RAG pipeline inside Streamlit")
-    return build_pipeline()
+    return await_ready(warm_up_pipeline(), warm_up_pipeline.clear)
 
 
 def render_sources(sources: list[dict]) -> None:
@@ -31,7 +43,8 @@ def main() -> None:
     st.title("🩺 Medical RAG QA System")
     st.write("Ask grounded medical questions answered with evidence from the mtsamples corpus.")
 
-    pipeline = load_pipeline()
+    if not warm_up_pipeline().done():
+        st.caption("Loading the vector store and Gemini clients in the background...")
 
     with st.form("medical-form", clear_on_submit=False):
         question = st.text_area("Question", height=120, placeholder="What risks were described before Lap-Band surgery?")
@@ -39,7 +52,7 @@ def main() -> None:
 
     if submitted and question:
         with st.spinner("Retrieving supporting context and generating answer..."):
-            result = pipeline.answer(question)
+            result = load_pipeline().answer(question)
         st.subheader("Answer")
         st.write(result["answer"])
         st.subheader("Citations")
@@ -0,0 +1 @@
+"""HTTP/JSON serving entry point for the medical and compliance pipelines."""
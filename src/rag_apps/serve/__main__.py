@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import multiprocessing
+import socket
+
+from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.manifest import STALE_STORE_POLICIES
+from .config import ServeConfig
+
+
+LOGGER = get_logger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = ServeConfig()
+    parser = argparse.ArgumentParser(description="Serve the medical QA and compliance pipelines over HTTP/JSON")
+    parser.add_argument("--host", default=defaults.host)
+    parser.add_argument("--port", type=int, default=defaults.port)
+    parser.add_argument("--workers", type=int, default=defaults.workers, help="Worker processes sharing the listening socket")
+    parser.add_argument("--apps", default=",".join(defaults.apps), help="Comma-separated apps to load (medical,compliance)")
+    parser.add_argument(
+        "--backend",
+        choices=("memmap", "chroma"),
+        default=defaults.vector_backend,
+        help="Search a memory-mapped export of the vector stores (shared by workers) or Chroma directly",
+    )
+    parser.add_argument(
+        "--per-key-concurrency",
+        type=int,
+        default=defaults.per_key_concurrency,
+        help="Concurrent pipeline calls allowed per Gemini key, split across workers",
+    )
+    parser.add_argument(
+        "--app-share",
+        type=float,
+        default=defaults.app_share,
+        help="Fraction of the concurrent Gemini calls one app may hold when both are served",
+    )
+    parser.add_argument("--quantize", choices=("none", "int8"), default=defaults.index_quantization, help="Scan int8 codes")
+    parser.add_argument("--dimensions", type=int, default=defaults.index_dimensions, help="Scan reduced vectors (0 = full)")
+    parser.add_argument("--reduction", choices=("truncate", "pca"), default=defaults.index_reduction)
+    parser.add_argument(
+        "--rescore-factor",
+        type=int,
+        default=defaults.index_rescore_factor,
+        help="Re-score k * factor compressed candidates with float vectors (0 disables)",
+    )
+    parser.add_argument(
+        "--embed-batch-ms",
+        type=float,
+        default=defaults.embed_batch_wait_ms,
+        help="Max wait for batching concurrent query embeddings (0 disables)",
+    )
+    parser.add_argument(
+        "--stale-store",
+        choices=STALE_STORE_POLICIES,
+        default=defaults.stale_store_policy,
+        help="Refuse (error), log (warn) or skip (ignore) a store that no longer matches its build manifest",
+    )
+    parser.add_argument("--embed-batch-size", type=int, default=defaults.embed_batch_size, help="Max distinct queries per batch")
+    return parser.parse_args()
+
+
+def prepare_indexes(config: ServeConfig) -> None:
+    """Export stale memory-mapped indexes and their scan layout once in the parent so workers only ever read them."""
+    if config.vector_backend != "memmap":
+        return
+    from rag_apps.common.key_manager import GeminiKeyManager
+    from rag_apps.common.llm import RotatingGeminiEmbeddings
+    from rag_apps.common.vector_index import IndexLayout
+    from rag_apps.common.vectorstores import load_vector_index
+    from rag_apps.compliance.config import ComplianceConfig
+    from rag_apps.medical.config import MedicalRAGConfig
+
+    embeddings = RotatingGeminiEmbeddings(GeminiKeyManager.from_defaults())
+    layout = IndexLayout(config.index_quantization, config.index_dimensions, config.index_reduction)
+    for name, app_config in (("medical", MedicalRAGConfig()), ("compliance", ComplianceConfig())):
+        if name in config.apps:
+            load_vector_index(
+                embeddings,
+                app_config.persist_directory,
+                app_config.index_directory,
+                "memmap",
+                layout,
+                persist_layout=True,
+            )
+
+
+def run_worker(sock: socket.socket, config: ServeConfig, capacity: int) -> None:
+    from .app import build_app, serve
+
+    app = build_app(config, capacity)
+    asyncio.run(serve(app, sock))
+
+
+def main() -> None:
+    args = parse_args()
+    config = ServeConfig(
+        host=args.host,
+        port=args.port,
+        workers=max(args.workers, 1),
+        apps=tuple(name.strip() for name in args.apps.split(",") if name.strip()),
+        vector_backend=args.backend,
+        per_key_concurrency=args.per_key_concurrency,
+        app_share=args.app_share,
+        index_quantization=args.quantize,
+        index_dimensions=args.dimensions,
+        index_reduction=args.reduction,
+        index_rescore_factor=args.rescore_factor,
+        embed_batch_wait_ms=args.embed_batch_ms,
+        embed_batch_size=args.embed_batch_size,
+        stale_store_policy=args.stale_store,
+    )
+    unknown = sorted(set(config.apps) - {"medical", "compliance"})
+    if unknown or not config.apps:
+        raise SystemExit(f"Unknown or empty --apps: {', '.join(unknown) or args.apps}")
+
+    from rag_apps.common.key_manager import GeminiKeyManager
+
+    key_count = len(GeminiKeyManager.from_defaults().all_keys)
+    capacity = max(math.ceil(key_count * config.per_key_concurrency / config.workers), 1)
+    prepare_indexes(config)
+    sock = socket.create_server((config.host, config.port), backlog=1024)
+    LOGGER.info(
+        "Listening on http://%s:%d with %d worker(s), %d concurrent calls each (%d keys)",
+        config.host,
+        config.port,
+        config.workers,
+        capacity,
+        key_count,
+    )
+    if config.workers == 1:
+        run_worker(sock, config, capacity)
+        return
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise SystemExit("--workers > 1 needs a platform with fork() to share the listening socket")
+    # Workers inherit the bound socket and load pipelines after the fork, so no gRPC or Chroma
+    # client state crosses the process boundary; the kernel spreads accepts between them.
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=run_worker, args=(sock, config, capacity), name=f"rag-serve-{index}")
+        for index in range(config.workers)
+    ]
+    for process in processes:
+        process.start()
+    sock.close()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        LOGGER.info("Shutting down %d workers", len(processes))
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from rag_apps.common.instrumentation import REGISTRY, counter, histogram, span
+from rag_apps.common.logging_utils import get_logger
+from rag_apps.common.resources import ResourceRegistry, configure_resources, share_quotas
+from .coalescing import RequestCoalescer, normalize_payload
+from .config import ServeConfig
+from .protocol import HttpError, Request, Response, read_request
+
+
+LOGGER = get_logger(__name__)
+
+REQUESTS = counter("serve_requests_total", "HTTP requests by route and status")
+REQUEST_SECONDS = histogram("serve_request_seconds", "HTTP request wall time by route")
+LIMITER_WAIT = histogram("serve_limiter_wait_seconds", "Time requests queued for a concurrency slot")
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+def _question(payload: Dict[str, Any]) -> str:
+    question = payload.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise HttpError(400, "'question' must be a non-empty string")
+    return question.strip()
+
+
+def _rule_ids(payload: Dict[str, Any]) -> Optional[List[str]]:
+    rule_ids = payload.get("rule_ids")
+    if rule_ids is None:
+        return None
+    if not isinstance(rule_ids, list) or not all(isinstance(rule_id, str) for rule_id in rule_ids):
+        raise HttpError(400, "'rule_ids' must be a list of strings")
+    return sorted(set(rule_ids))
+
+
+class ServiceApp:
+    """Routes JSON requests to the pipelines without blocking the event loop.
+
+    Pipeline calls run on a thread pool behind one semaphore per app, sized to
+    that app's quota of the Gemini key capacity, and identical in-flight
+    requests share one computation.
+    """
+
+    def __init__(
+        self,
+        medical: Any = None,
+        compliance: Any = None,
+        capacity: int = 4,
+        config: ServeConfig | None = None,
+        resources: ResourceRegistry | None = None,
+    ):
+        self.config = config or ServeConfig()
+        self.medical = medical
+        self.compliance = compliance
+        self.capacity = max(capacity, 1)
+        self.resources = resources
+        self.quotas = share_quotas(self.apps, self.capacity, self.config.app_share)
+        self._limiters = {app: asyncio.Semaphore(quota) for app, quota in self.quotas.items()}
+        self._executor = ThreadPoolExecutor(max_workers=max(sum(self.quotas.values()), 1), thread_name_prefix="serve")
+        self._coalescer = RequestCoalescer()
+        self._in_flight = 0
+        self.routes: Dict[Tuple[str, str], Handler] = {
+            ("POST", "/answer"): self.answer,
+            ("POST", "/assess"): self.assess,
+            ("GET", "/healthz"): self.healthz,
+            ("GET", "/metrics"): self.metrics,
+        }
+
+    @property
+    def apps(self) -> List[str]:
+        return [name for name, app in (("medical", self.medical), ("compliance", self.compliance)) if app is not None]
+
+    async def _call(self, app: str, func: Callable[..., Any], *args: Any) -> Any:
+        queued = time.perf_counter()
+        async with self._limiters[app]:
+            LIMITER_WAIT.observe(time.perf_counter() - queued, app=app)
+            self._in_flight += 1
+            try:
+                # Copy the context so spans opened in the worker thread nest under the request span.
+                context = contextvars.copy_context()
+                return await asyncio.get_running_loop().run_in_executor(self._executor, partial(context.run, func, *args))
+            finally:
+                self._in_flight -= 1
+
+    async def answer(self, request: Request) -> Response:
+        if self.medical is None:
+            raise HttpError(404, "The medical app is not enabled on this server")
+        question = _question(request.json())
+        key = normalize_payload("answer", {"question": question})
+        result = await self._coalescer.run(key, lambda: self._call("medical", self.medical.answer, question), route="/answer")
+        return Response.json(result)
+
+    async def assess(self, request: Request) -> Response:
+        if self.compliance is None:
+            raise HttpError(404, "The compliance app is not enabled on this server")
+        payload = request.json()
+        question, rule_ids = _question(payload), _rule_ids(payload)
+        key = normalize_payload("assess", {"question": question, "rule_ids": rule_ids})
+        results = await self._coalescer.run(key, lambda: self._call("compliance", self._assess, question, rule_ids), route="/assess")
+        return Response.json({"question": question, "results": results})
+
+    def _assess(self, question: str, rule_ids: Optional[List[str]]) -> List[dict]:
+        agent = self.compliance
+        agent.refresh_rules()
+        rules = agent.rules
+        if rule_ids is not None:
+            unknown = sorted(set(rule_ids) - {rule.id for rule in rules})
+            if unknown:
+                raise HttpError(400, f"Unknown rule ids: {', '.join(unknown)}")
+            rules = [rule for rule in rules if rule.id in rule_ids]
+        return agent.run_assessment(question, rules=rules)
+
+    async def healthz(self, request: Request) -> Response:
+        return Response.json(
+            {
+                "status": "ok",
+                "pid": os.getpid(),
+                "apps": self.apps,
+                "capacity": self.capacity,
+                "quotas": self.quotas,
+                "in_flight": self._in_flight,
+                "coalescing": len(self._coalescer),
+                "resources": self.resources.stats() if self.resources is not None else None,
+            }
+        )
+
+    async def metrics(self, request: Request) -> Response:
+        return Response.text(REGISTRY.to_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    async def dispatch(self, request: Request) -> Response:
+        handler = self.routes.get((request.method, request.path))
+        started = time.perf_counter()
+        with span("serve.request", route=request.path, method=request.method) as record:
+            try:
+                if handler is None:
+                    if any(path == request.path for _, path in self.routes):
+                        raise HttpError(405, f"{request.method} is not allowed on {request.path}")
+                    raise HttpError(404, f"No route for {request.path}")
+                response = await handler(request)
+            except HttpError as exc:
+                response = Response.json({"error": exc.message}, status=exc.status)
+            except Exception as exc:  # noqa: BLE001
+                LOGGER.exception("Request to %s failed", request.path)
+                response = Response.json({"error": f"{type(exc).__name__}: {exc}"}, status=500)
+            record.set(status=response.status)
+        route = request.path if handler is not None else "unmatched"
+        REQUESTS.inc(route=route, status=response.status)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route=route)
+        response.headers.setdefault("X-Worker-Pid", str(os.getpid()))
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        first = True
+        try:
+            while True:
+                try:
+                    timeout = None if first else self.config.keep_alive_seconds
+                    request = await asyncio.wait_for(read_request(reader, self.config.max_body_bytes), timeout)
+                except HttpError as exc:
+                    writer.write(Response.json({"error": exc.message}, status=exc.status).encode(keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                first = False
+                response = await self.dispatch(request)
+                writer.write(response.encode(keep_alive=request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.resources is not None:
+            self.resources.close()
+
+
+def build_app(config: ServeConfig, capacity: int) -> ServiceApp:
+    """Load the enabled pipelines in this process, sharing one resource registry between them."""
+    resources = configure_resources(capacity=capacity, quotas=share_quotas(config.apps, capacity, config.app_share))
+    medical = compliance = None
+    if "medical" in config.apps:
+        from rag_apps.medical.config import MedicalRAGConfig
+        from rag_apps.medical.pipeline import build_pipeline
+
+        medical = build_pipeline(
+            MedicalRAGConfig(
+                vector_backend=config.vector_backend,
+                index_quantization=config.index_quantization,
+                index_dimensions=config.index_dimensions,
+                index_reduction=config.index_reduction,
+                index_rescore_factor=config.index_rescore_factor,
+                embed_batch_wait_ms=config.embed_batch_wait_ms,
+                embed_batch_size=config.embed_batch_size,
+                stale_store_policy=config.stale_store_policy,
+            )
+        )
+    if "compliance" in config.apps:
+        from rag_apps.compliance.agent import build_agent
+        from rag_apps.compliance.config import ComplianceConfig
+
+        compliance = build_agent(
+            ComplianceConfig(
+                vector_backend=config.vector_backend,
+                index_quantization=config.index_quantization,
+                index_dimensions=config.index_dimensions,
+                index_reduction=config.index_reduction,
+                index_rescore_factor=config.index_rescore_factor,
+                embed_batch_wait_ms=config.embed_batch_wait_ms,
+                embed_batch_size=config.embed_batch_size,
+                stale_store_policy=config.stale_store_policy,
+            )
+        )
+    return ServiceApp(medical=medical, compliance=compliance, capacity=capacity, config=config, resources=resources)
+
+
+async def serve(app: ServiceApp, sock: socket.socket) -> None:
+    """Accept connections on an already-bound listening socket until SIGINT/SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    server = await asyncio.start_server(app.handle_connection, sock=sock)
+    LOGGER.info("Worker %d serving %s on %s (capacity %d)", os.getpid(), ", ".join(app.apps), sock.getsockname(), app.capacity)
+    async with server:
+        await stop.wait()
+    app.close()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from rag_apps.common.instrumentation import counter
+
+
+T = TypeVar("T")
+
+COALESCED = counter("serve_coalesced_total", "Requests answered by joining an identical in-flight request")
+
+
+def normalize_payload(route: str, payload: Dict[str, Any]) -> str:
+    """Coalescing key: route plus the payload with whitespace-collapsed strings and sorted keys."""
+
+    def clean(value: Any) -> Any:
+        if isinstance(value, str):
+            return " ".join(value.split())
+        if isinstance(value, dict):
+            return {key: clean(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [clean(item) for item in value]
+        return value
+
+    return f"{route}:{json.dumps(clean(payload), sort_keys=True)}"
+
+
+class RequestCoalescer:
+    """Shares one in-flight computation between concurrent callers with the same key.
+
+    Results are not cached: the key is dropped as soon as the leader finishes,
+    so a later identical request runs again.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]], **labels: Any) -> T:
+        future = self._in_flight.get(key)
+        if future is not None:
+            COALESCED.inc(**labels)
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Followers re-raise it; mark it retrieved so a lone leader does not log "never retrieved".
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
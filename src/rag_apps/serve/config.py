@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ServeConfig:
+    host: str = "127.0.0.1"
+    port: int = 8080
+    workers: int = 1
+    apps: tuple[str, ...] = ("medical", "compliance")
+    vector_backend: str = "memmap"  # workers share the exported index through the page cache
+    per_key_concurrency: int = 2  # in-flight Gemini-backed requests per API key, across all workers
+    app_share: float = 0.75  # most of a worker's Gemini slots one app may hold when both apps are loaded
+    index_quantization: str = "none"
+    index_dimensions: int = 0
+    index_reduction: str = "truncate"
+    index_rescore_factor: int = 4
+    embed_batch_wait_ms: float = 5.0  # window for coalescing concurrent query embeddings; 0 disables
+    embed_batch_size: int = 32
+    stale_store_policy: str = "error"  # "warn"/"ignore" serve a store that no longer matches its build manifest
+    max_body_bytes: int = 1_048_576
+    keep_alive_seconds: float = 15.0
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Dict, Optional
+
+
+MAX_HEADER_LINES = 100
+MAX_LINE_BYTES = 8192
+
+
+class HttpError(Exception):
+    """Request problem reported to the client as a JSON error body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass(slots=True)
+class Request:
+    method: str
+    path: str
+    version: str
+    headers: Dict[str, str]
+    body: bytes = b""
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            raise HttpError(400, "Request body must be a JSON object")
+        try:
+            payload = json.loads(self.body)
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise HttpError(400, f"Invalid JSON: {exc}") from exc
+        if not isinstance(payload, dict):
+            raise HttpError(400, "Request body must be a JSON object")
+        return payload
+
+
+@dataclass(slots=True)
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json"
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def json(cls, payload: Any, status: int = 200) -> "Response":
+        return cls(status=status, body=json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"))
+
+    @classmethod
+    def text(cls, text: str, content_type: str = "text/plain; charset=utf-8", status: int = 200) -> "Response":
+        return cls(status=status, body=text.encode("utf-8"), content_type=content_type)
+
+    def encode(self, keep_alive: bool) -> bytes:
+        reason = HTTPStatus(self.status).phrase
+        lines = [
+            f"HTTP/1.1 {self.status} {reason}",
+            f"Content-Type: {self.content_type}",
+            f"Content-Length: {len(self.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{name}: {value}" for name, value in self.headers.items()),
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+async def _read_line(reader: asyncio.StreamReader) -> bytes:
+    try:
+        line = await reader.readuntil(b"\n")
+    except asyncio.LimitOverrunError as exc:
+        raise HttpError(431, "Header line too long") from exc
+    if len(line) > MAX_LINE_BYTES:
+        raise HttpError(431, "Header line too long")
+    return line
+
+
+async def read_request(reader: asyncio.StreamReader, max_body_bytes: int) -> Optional[Request]:
+    """Parse one HTTP/1.x request; ``None`` when the client closed the connection cleanly."""
+    try:
+        request_line = await _read_line(reader)
+    except asyncio.IncompleteReadError:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        raise HttpError(400, "Malformed request line")
+    method, target, version = parts
+
+    headers: Dict[str, str] = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = (await _read_line(reader)).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(431, "Too many headers")
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(411, "Chunked request bodies are not supported; send Content-Length")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError as exc:
+        raise HttpError(400, "Invalid Content-Length") from exc
+    if length < 0:
+        raise HttpError(400, "Invalid Content-Length")
+    if length > max_body_bytes:
+        raise HttpError(413, f"Body exceeds {max_body_bytes} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method=method.upper(), path=target.split("?", 1)[0], version=version, headers=headers, body=body)
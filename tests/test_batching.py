@@ -0,0 +1,54 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from rag_apps.common.batching import EmbeddingMicroBatcher
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts):
+        with self.lock:
+            self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def test_concurrent_queries_share_a_batch():
+    inner = CountingEmbeddings()
+    batcher = EmbeddingMicroBatcher(inner, max_batch_size=32, max_wait_ms=50)
+    texts = ["a", "bb", "ccc", "bb"] * 4
+    try:
+        with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+            vectors = list(pool.map(batcher.embed_query, texts))
+    finally:
+        batcher.close()
+    assert vectors == [[float(len(text))] for text in texts]
+    assert sum(len(batch) for batch in inner.batches) < len(texts)
+
+
+def test_closed_batcher_raises_instead_of_hanging():
+    batcher = EmbeddingMicroBatcher(CountingEmbeddings(), max_wait_ms=1)
+    assert batcher.embed_query("abc") == [3.0]
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.embed_query("abc")
+    assert batcher.embed_documents(["abcd"]) == [[4.0]]
+    batcher.close()
+
+
+def test_close_before_first_query():
+    batcher = EmbeddingMicroBatcher(CountingEmbeddings())
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.embed_queries(["a", "b"])
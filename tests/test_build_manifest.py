@@ -0,0 +1,81 @@
+from functools import partial
+
+import pytest
+
+from rag_apps.bench.corpora import synthetic_contract_documents
+from rag_apps.bench.fakes import build_fake_resources
+from rag_apps.common import resources
+from rag_apps.common.manifest import BuildManifest, StaleVectorStoreError
+from rag_apps.common.vectorstores import load_vector_index
+from rag_apps.compliance import agent, build_vector_store
+from rag_apps.compliance.config import ComplianceConfig
+from rag_apps.compliance.ingest import build_hash
+
+
+class FakeRegistry:
+    """The parts of :class:`ResourceRegistry` that building and loading a store use, backed by the bench fakes."""
+
+    def __init__(self):
+        self.chat_model, self.embedding_model, _ = build_fake_resources()
+
+    def chat(self, app, cache=None, **kwargs):
+        return self.chat_model
+
+    def embeddings(self, app, **kwargs):
+        return self.embedding_model
+
+    def vector_index(self, embeddings, persist_directory, index_directory, backend="chroma", layout=None, rescore_factor=4):
+        return load_vector_index(embeddings, persist_directory, index_directory, backend, layout, rescore_factor)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    txt_dir = tmp_path / "contracts"
+    txt_dir.mkdir()
+    for index, document in enumerate(synthetic_contract_documents(3)):
+        (txt_dir / f"contract_{index}.txt").write_text(document.page_content, encoding="utf-8")
+
+    def config(**overrides):
+        settings = dict(
+            txt_dir=txt_dir,
+            pdf_dir=tmp_path / "pdf",
+            persist_directory=tmp_path / "chroma",
+            index_directory=tmp_path / "index",
+            cache_path=tmp_path / "chunks.jsonl",
+            chunk_manifest_path=tmp_path / "chunk_manifest.json",
+            manifest_path=tmp_path / "build_manifest.json",
+            rule_embeddings_path=tmp_path / "rule_embeddings.json",
+            verdict_cache_path=tmp_path / "verdicts.jsonl",
+            llm_cache=False,
+        )
+        settings.update(overrides)
+        return ComplianceConfig(**settings)
+
+    monkeypatch.setattr(resources, "shared_resources", FakeRegistry)
+    monkeypatch.setattr(agent, "shared_resources", FakeRegistry)
+    monkeypatch.setattr(build_vector_store, "ComplianceConfig", config)
+    return config
+
+
+def test_sections_store_loads_with_default_app_config(workspace):
+    build_vector_store.build_store(strategy="sections")
+    manifest = BuildManifest.load(workspace().manifest_path)
+    assert manifest.chunking_strategy == "sections"
+    assert manifest.config_hash == build_hash(workspace(chunking_strategy="sections"))
+    assert manifest.warnings == []
+
+    loaded = agent.build_agent(workspace())
+    assert loaded.rules
+
+
+def test_changed_chunk_settings_still_report_a_stale_store(workspace):
+    build_vector_store.build_store(strategy="sections")
+    with pytest.raises(StaleVectorStoreError, match="config changed"):
+        agent.build_agent(workspace(chunk_size=800))
+
+
+def test_build_hash_uses_the_recorded_strategy():
+    config = ComplianceConfig()
+    assert build_hash(config, None) == build_hash(config)
+    assert build_hash(config, "sections") == build_hash(ComplianceConfig(chunking_strategy="sections"))
+    assert partial(build_hash, config)("recursive") == build_hash(config)
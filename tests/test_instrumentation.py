@@ -0,0 +1,51 @@
+import threading
+import time
+
+from rag_apps.common.instrumentation import MetricsRegistry
+
+
+def test_export_while_series_are_created_concurrently():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total")
+    latency = registry.histogram("latency_seconds", buckets=(0.1, 1.0))
+    stop = threading.Event()
+
+    def record(worker):
+        index = 0
+        while not stop.is_set():
+            calls.inc(app=f"app-{worker}-{index % 50}")
+            latency.observe(0.05 * (index % 30), app=f"app-{worker}-{index % 50}")
+            registry.counter(f"dynamic_{worker}_{index % 50}_total").inc()
+            index += 1
+            if index % 100 == 0:
+                time.sleep(0.001)
+
+    writers = [threading.Thread(target=record, args=(worker,), daemon=True) for worker in range(4)]
+    for writer in writers:
+        writer.start()
+    try:
+        for _ in range(20):
+            lines = registry.to_prometheus().splitlines()
+            registry.to_dict()
+            latency.percentile(50, app="app-0-0")
+            inf = [line.rsplit(" ", 1)[1] for line in lines if line.startswith("latency_seconds_bucket") and "+Inf" in line]
+            counts = [line.rsplit(" ", 1)[1] for line in lines if line.startswith("latency_seconds_count")]
+            assert inf == counts
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join(5.0)
+
+
+def test_counter_and_histogram_reads():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total")
+    calls.inc(2, app="medical")
+    assert calls.value(app="medical") == 2
+    assert calls.value(app="compliance") == 0
+    latency = registry.histogram("latency_seconds", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        latency.observe(value, app="medical")
+    assert latency.percentile(50, app="medical") == 0.5
+    assert latency.percentile(50, app="compliance") is None
+    assert [line.rsplit(" ", 1)[1] for line in latency.prometheus() if "_bucket" in line] == ["1", "2", "3"]
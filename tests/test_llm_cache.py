@@ -0,0 +1,62 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.outputs import Generation
+
+from rag_apps.common.llm_cache import SQLiteLLMCache, forget_generation
+
+
+def generations(text):
+    return [Generation(text=text)]
+
+
+def test_identical_requests_hit_and_others_miss(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    assert cache.lookup("prompt", "model-a") is None
+    cache.update("prompt", "model-a", generations("answer"))
+    assert cache.lookup("prompt", "model-a")[0].text == "answer"
+    assert cache.lookup("prompt ", "model-a") is None
+    assert cache.lookup("prompt", "model-b") is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_keys_are_stable_across_processes(tmp_path):
+    assert SQLiteLLMCache.key("prompt", "model-a") == SQLiteLLMCache.key("prompt", "model-a")
+    assert SQLiteLLMCache.key("prompt", "model-a") != SQLiteLLMCache.key("model-a", "prompt")
+    SQLiteLLMCache(tmp_path / "cache.sqlite").update("prompt", "model-a", generations("answer"))
+    reopened = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    assert reopened.lookup("prompt", "model-a")[0].text == "answer"
+
+
+def test_least_recently_used_generations_are_evicted(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    cache.update("a", "model", generations("a" * 100))
+    cache.max_bytes = 3 * cache.stats()["bytes"]
+    for name in ("b", "c"):
+        cache.update(name, "model", generations(name * 100))
+    assert cache.lookup("a", "model") is not None
+    cache.update("d", "model", generations("d" * 100))
+    assert cache.lookup("b", "model") is None
+    assert all(cache.lookup(name, "model") is not None for name in ("a", "c", "d"))
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_oversized_generation_is_not_stored(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite", max_bytes=100)
+    cache.update("prompt", "model", generations("x" * 1000))
+    assert cache.stats()["entries"] == 0
+
+
+def test_forget_generation_makes_the_next_call_regenerate(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "cache.sqlite")
+    chat = FakeListChatModel(responses=["not json", '{"verdict": "Compliant"}'], cache=cache)
+    messages = [HumanMessage(content="Assess rule R1")]
+    assert chat.invoke(messages).content == "not json"
+    assert chat.invoke(messages).content == "not json"
+    assert forget_generation(chat, messages) is True
+    assert chat.invoke(messages).content == '{"verdict": "Compliant"}'
+    assert forget_generation(chat, [HumanMessage(content="other")]) is False
+
+
+def test_forget_generation_without_a_cache():
+    chat = FakeListChatModel(responses=["reply"])
+    assert forget_generation(chat, [HumanMessage(content="Assess rule R1")]) is False
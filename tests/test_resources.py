@@ -0,0 +1,105 @@
+import threading
+import time
+
+from rag_apps.common.resources import FairScheduler, ResourceRegistry, share_quotas
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for the scheduler"
+        time.sleep(0.005)
+
+
+class Caller(threading.Thread):
+    """Takes a slot for ``app``, records the grant, then holds it until released."""
+
+    def __init__(self, scheduler, app, granted, hold=True):
+        super().__init__(daemon=True)
+        self.scheduler = scheduler
+        self.app = app
+        self.granted = granted
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def run(self):
+        with self.scheduler.slot(self.app):
+            self.granted.append(self.app)
+            self.release.wait(5.0)
+
+
+def apps(scheduler):
+    return scheduler.snapshot()["apps"]
+
+
+def test_quota_defaults_and_clamping():
+    scheduler = FairScheduler(4, {"compliance": 2, "medical": 10, "bench": 0})
+    assert scheduler.quota("compliance") == 2
+    assert scheduler.quota("medical") == 4
+    assert scheduler.quota("bench") == 1
+    assert scheduler.quota("unknown") == 4
+
+
+def test_app_is_held_to_its_quota():
+    scheduler = FairScheduler(4, {"compliance": 2})
+    granted = []
+    burst = [Caller(scheduler, "compliance", granted) for _ in range(4)]
+    for caller in burst:
+        caller.start()
+    wait_until(lambda: apps(scheduler)["compliance"]["waiting"] == 2)
+    assert apps(scheduler)["compliance"]["running"] == 2
+
+    medical = Caller(scheduler, "medical", granted)
+    medical.start()
+    wait_until(lambda: apps(scheduler).get("medical", {}).get("running") == 1)
+    assert scheduler.snapshot()["in_flight"] == 3
+
+    for caller in burst + [medical]:
+        caller.release.set()
+    for caller in burst + [medical]:
+        caller.join(5.0)
+    assert sorted(granted) == ["compliance"] * 4 + ["medical"]
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_medical_is_not_starved_behind_a_compliance_burst():
+    scheduler = FairScheduler(2)
+    granted = []
+    holders = [Caller(scheduler, "compliance", granted) for _ in range(2)]
+    for caller in holders:
+        caller.start()
+    wait_until(lambda: apps(scheduler)["compliance"]["running"] == 2)
+
+    burst = [Caller(scheduler, "compliance", granted, hold=False) for _ in range(5)]
+    for caller in burst:
+        caller.start()
+    wait_until(lambda: apps(scheduler)["compliance"]["waiting"] == 5)
+    medical = Caller(scheduler, "medical", granted, hold=False)
+    medical.start()
+    wait_until(lambda: apps(scheduler).get("medical", {}).get("waiting") == 1)
+
+    del granted[:]
+    holders[0].release.set()
+    holders[0].join(5.0)
+    wait_until(lambda: granted)
+    assert granted[0] == "medical"
+
+    holders[1].release.set()
+    for caller in holders + burst + [medical]:
+        caller.join(5.0)
+    assert granted.count("compliance") == 5
+    assert scheduler.snapshot()["in_flight"] == 0
+
+
+def test_share_quotas_only_caps_shared_capacity():
+    assert share_quotas(["medical"], 8, 0.5) == {"medical": 8}
+    assert share_quotas(["medical", "compliance"], 8, 0.75) == {"medical": 6, "compliance": 6}
+    assert share_quotas(["medical", "compliance"], 1, 0.5) == {"medical": 1, "compliance": 1}
+
+
+def test_registry_only_schedules_with_a_capacity():
+    assert ResourceRegistry().scheduler is None
+    scheduler = ResourceRegistry(capacity=3, quotas={"compliance": 2}).scheduler
+    assert scheduler.capacity == 3
+    assert scheduler.quota("compliance") == 2
@@ -0,0 +1,24 @@
+import pytest
+
+from rag_apps.bench.retrieval_eval import LabelledQuery, RetrievalVariant, evaluate_variants, retrieval_metrics
+
+
+def test_evaluate_variants_rejects_an_empty_label_set():
+    variant = RetrievalVariant("chroma", store=None, index_bytes=0)
+    with pytest.raises(ValueError, match="No labelled queries"):
+        evaluate_variants([variant], [], [])
+
+
+def test_evaluate_variants_rejects_mismatched_vectors():
+    variant = RetrievalVariant("chroma", store=None, index_bytes=0)
+    labelled = [LabelledQuery("chest pain", frozenset({"doc-1"}))]
+    with pytest.raises(ValueError, match="query vectors"):
+        evaluate_variants([variant], labelled, [])
+
+
+def test_retrieval_metrics_count_each_relevant_key_once():
+    ranked = [{"doc-1"}, {"doc-1"}, {"doc-2"}, set()]
+    metrics = retrieval_metrics(ranked, frozenset({"doc-1", "doc-2"}), k=4)
+    assert metrics["recall"] == 1.0
+    assert metrics["mrr"] == 1.0
+    assert 0.0 < metrics["ndcg"] < 1.0
@@ -0,0 +1,73 @@
+import pytest
+
+from rag_apps.common.structured import (
+    FieldSpec,
+    StructuredOutputError,
+    as_text,
+    as_text_list,
+    extract_json_object,
+    one_of,
+    validate,
+)
+
+
+VERDICT_FIELDS = (
+    FieldSpec("verdict", one_of("Compliant", "Non-Compliant", "NotFound")),
+    FieldSpec("evidence", as_text_list, required=False, default=[]),
+    FieldSpec("remediation", as_text, required=False, default=""),
+)
+
+
+def test_extract_plain_object():
+    assert extract_json_object('{"verdict": "Compliant"}') == {"verdict": "Compliant"}
+
+
+def test_extract_fenced_object():
+    reply = 'Here is my assessment:\n```json\n{"verdict": "NotFound", "evidence": []}\n```\nLet me know.'
+    assert extract_json_object(reply) == {"verdict": "NotFound", "evidence": []}
+
+
+def test_extract_object_wrapped_in_prose():
+    reply = 'The clause is missing {see section 4}, so my answer is {"verdict": "Non-Compliant"} as requested.'
+    assert extract_json_object(reply) == {"verdict": "Non-Compliant"}
+
+
+def test_extract_skips_non_object_json():
+    assert extract_json_object('[1, 2] then {"verdict": "Compliant"}') == {"verdict": "Compliant"}
+
+
+@pytest.mark.parametrize("reply", ["", "I cannot answer that.", '{"verdict": "Compliant"', "```json\n[1, 2]\n```"])
+def test_extract_rejects_replies_without_an_object(reply):
+    with pytest.raises(StructuredOutputError) as excinfo:
+        extract_json_object(reply)
+    assert excinfo.value.stage == "extract"
+
+
+def test_validate_normalises_keys_and_values():
+    payload = {" Verdict ": "non compliant", "Evidence": "Clause 7.2", "remediation": ["Add", "a clause."]}
+    assert validate(payload, VERDICT_FIELDS) == {
+        "verdict": "Non-Compliant",
+        "evidence": ["Clause 7.2"],
+        "remediation": "Add a clause.",
+    }
+
+
+def test_validate_fills_optional_defaults():
+    assert validate({"verdict": "NOT_FOUND", "evidence": None}, VERDICT_FIELDS) == {
+        "verdict": "NotFound",
+        "evidence": [],
+        "remediation": "",
+    }
+
+
+def test_validate_reports_every_problem():
+    with pytest.raises(StructuredOutputError) as excinfo:
+        validate({"evidence": 3, "remediation": {"text": "x"}}, VERDICT_FIELDS)
+    assert excinfo.value.stage == "validate"
+    assert len(excinfo.value.problems) == 3
+    assert excinfo.value.problems[0] == "missing 'verdict'"
+
+
+def test_validate_rejects_unknown_enum_value():
+    with pytest.raises(StructuredOutputError, match="must be one of"):
+        validate({"verdict": "Partially compliant"}, VERDICT_FIELDS)
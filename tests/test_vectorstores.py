@@ -0,0 +1,35 @@
+from rag_apps.bench.corpora import synthetic_medical_documents
+from rag_apps.bench.fakes import build_fake_resources
+from rag_apps.common.vector_index import CODES_FILE, LAYOUT_FILE, IndexLayout, read_layout
+from rag_apps.common.vectorstores import build_chroma_store, load_vector_index
+
+
+def export(tmp_path, layout):
+    _, embeddings, _ = build_fake_resources()
+    build_chroma_store(synthetic_medical_documents(20), embeddings, tmp_path / "chroma", force_recreate=True)
+    index = load_vector_index(embeddings, tmp_path / "chroma", tmp_path / "index", "memmap", layout, persist_layout=True)
+    return embeddings, index
+
+
+def test_reader_applies_a_different_layout_in_memory(tmp_path):
+    int8 = IndexLayout(quantization="int8")
+    embeddings, _ = export(tmp_path, int8)
+    codes, layout_file = tmp_path / "index" / CODES_FILE, tmp_path / "index" / LAYOUT_FILE
+    before = (codes.read_bytes(), layout_file.read_bytes())
+
+    plain = load_vector_index(embeddings, tmp_path / "chroma", tmp_path / "index", "memmap", IndexLayout())
+    assert plain.layout == IndexLayout()
+    assert plain.compressed is None
+    stored = load_vector_index(embeddings, tmp_path / "chroma", tmp_path / "index", "memmap")
+    assert stored.layout == int8
+    assert (codes.read_bytes(), layout_file.read_bytes()) == before
+
+
+def test_export_step_persists_a_new_layout(tmp_path):
+    embeddings, _ = export(tmp_path, IndexLayout())
+    assert read_layout(tmp_path / "index") == IndexLayout()
+    int8 = IndexLayout(quantization="int8")
+    index = load_vector_index(embeddings, tmp_path / "chroma", tmp_path / "index", "memmap", int8, persist_layout=True)
+    assert index.layout == int8
+    assert read_layout(tmp_path / "index") == int8
+    assert (tmp_path / "index" / CODES_FILE).exists()